@@ -20,13 +20,13 @@
 # NOTE: uncomment all the script parts that are not part of the current stage
 #   besides parameter selection (I.) when running any of the script parts II.-VI.
 #
-# NOTE:init00.mod is the modified script for LAMMPS runs and it cannot have
-#   inline comments (only in separate lines)
+# NOTE:init00.mod is the template of init.mod for LAMMPS runs, it is parsed 
+#   once and 'variable ... equal' values and 'replicate' are substituted
 #
-# NOTE: part III. uses multithreading, requesting a thread per temperature used 
+# NOTE: parts III.-V. run each temperature (and subdirectory for split = 3n) 
+#   as a separate work unit on a pool of nproc worker processes
 #
-# NOTE: assumes log2txt.py is present in a directory which path is included in 
-#		the shell configuration settings i.e. it can be called directly
+# NOTE: log.lammps is parsed directly by avlmp (no external LAMMPS python tools)
 #
 # User Input: 
 # -------------
@@ -45,14 +45,40 @@
 
 # -- MODULES
 # PYTHON MODULES
-import os, datetime, threading, subprocess, numpy
+import os, datetime, subprocess, numpy
 # OPTIONAL MODULES 
 # Modification and submission of LAMMPS scripts
 #import runlmp
+# Local execution of LAMMPS jobs
+#import exelmp
+# Registry of LAMMPS runs
+#import reglmp
+# Result store of averages and elastic constants
+#import reslmp
+# Shared store of LAMMPS input files
+#import caslmp
 # Collection and averaging of Lammps output
 #import avlmp
 # Computation of elastic properties
 #import ellmp
+# Parallel execution of post-processing stages
+#import parlmp
+# Incremental post-processing as a stage graph
+#import daglmp
+# Timing and profiling of the post-processing stages
+#import prflmp
+# Monitoring of running LAMMPS jobs
+#import monlmp
+# Correlation analysis of Lammps output
+#import corlmp
+# Trajectory (movie.xyz) analysis
+#import trjlmp
+# Aggregation of many datasets
+#import aglmp
+# Static (0 K) elastic constants without LAMMPS
+#import eamlmp
+# Quasi-harmonic lattice parameters
+#import qhlmp
 # Data visualisation
 import vislmp
 
@@ -85,14 +111,27 @@ af = ['28.1448', '28.1598', '28.1652', '28.1715', '28.1787', '28.1867', '28.1955
 
 # --- LAMMPS simulation parameters 
 # names to appear exactly as in init.mod script
-parameters = {'dt': '0.5e-3', 'Pf': '1.0', 'P0': '1.0', 'DP': '10.0', 'HeatTime': '100.0'}
+# dumpN - interval of the atom position dump (movie.xyz) in steps
+# thermoN - interval of the thermo output (log.lammps) in steps
+parameters = {'dt': '0.5e-3', 'Pf': '1.0', 'P0': '1.0', 'DP': '10.0', 'HeatTime': '100.0', 'dumpN': '100',
+              'thermoN': '1'}
 # Number of atom replications in each direction
 # Total number of atoms is then (#unit cell)*Nat^3
 Nat = '8'
+# Material name for aggregation of datasets (see aglmp.py)
+material = 'Ni'
+# Uncomment to use quasi-harmonic box dimensions instead of the NPT 
+# results in af (pure FCC, type 2 - Ni, see qhlmp.py) 
+# Not valid for FeNiCr.eam.alloy - the quasi-harmonic lattice contracts
+# with T for this potential (af_list raises an error), keep the NPT af 
+# list above. Only for potentials with a positive expansion.
+#af = qhlmp.af_list('FeNiCr.eam.alloy', T, Nat, P=parameters['Pf'], itype=2)
 
 # --- Other simulation parameters
 # 
 # Ensemble - NPT or NVT
+# 'fluct' - equilibrium NPT run only (in.elastic_fluct, split = 'n'), 
+#   all constants from the box fluctuations, method 8) in part IV.
 ensemble = 'nvt'
 # Cluster job split
 # 'n' - run a single job for each T (in. script which has all the deformation cases)
@@ -101,8 +140,21 @@ ensemble = 'nvt'
 split = 'n'
 # Number of processors for each job
 p = '20'
+# Number of processors for each temperature of a packed run (all 
+# temperatures in one job, see the alternative in part II.) 
+q = '4'
+# Job execution - None submits to the COE cluster (SGE), uncomment 
+# the second line to run on this computer with a pool of cores, 
+# details in exelmp.py
+executor = None
+#executor = exelmp.LocalExecutor(32, timeout=48*3600, retries=1,
+#                                 callback=lambda job: reglmp.set_job(reg, job))
 # Files other than in.- needed for the run or to be modified
 files = ['data.Ni-unit', 'init00.mod', 'FeNiCr.eam.alloy', 'potential.mod', 'submit_lammps_parallel.pl']
+# Input files - False zips them and extracts the zip in each run directory, 
+# True keeps a single copy of each in newdir/store/ and links it into 
+# the run directories (see caslmp.py)
+store = True
 #
 # Path to current folder 
 path = os.getcwd()+ '/' 
@@ -123,10 +175,12 @@ resdir = newdir
 thermo = ['Step', 'T', 'p', 'ke', 'pe', 'pxx', 'pyy', 'pzz', 'pxy', 'pxz', 'pyz', 'lx', 'ly', 'lz', 'xy', 'xz', 'yz']
 # Variables to be averaged
 avars = ['T', 'pxx', 'pyy', 'pxy', 'lx', 'ly', 'xy']
-# Window for movig average
+# Window for movig average, time steps
 window = 2000.0 
 # Number of simulation steps
 nsteps = 2
+# Time spans are LAMMPS time steps (Step column of the thermo output), 
+# independent of the thermo interval thermoN
 # Initial time span (LAMMPS sample preparation)
 t00 = 2
 t0 = 200000
@@ -135,6 +189,9 @@ tf0 = 200000
 tf  = 400000
 # Deformation direction for C44
 dirC44 = 'xy'
+# Number of worker processes for parts III.-V. 
+# (None - all available cores, 1 - serial)
+nproc = 4
 
 # # # # # # # # # # # # # # # # # # # # # # # # # # # # # #
 # 
@@ -142,7 +199,13 @@ dirC44 = 'xy'
 #
 # # # # # # # # # # # # # # # # # # # # # # # # # # # # # #
 # Make main directory for all results from this batch run
-#zipname = runlmp.make_main(files, newdir, ensemble, split)
+#zipname = runlmp.make_main(files, newdir, ensemble, split, store)
+# Record material and Nat of this dataset for the aggregation 
+#aglmp.save_info(path + newdir + '/', material, Nat)
+# Run registry of this batch run (see reglmp.py)
+#reg = path + newdir + '/runs.db'
+# Parse the init.mod template once
+#model = runlmp.parse_template(path + 'init00.mod')
 # --- Main processes for each temperature  
 #for Ti in T:
 #    # Add or update temperature in the parameter list
@@ -153,32 +216,102 @@ dirC44 = 'xy'
 #    parameters['af'] = af[i]
 #    # Make sub-and subsub directories for each temperature T
 #    #   and each deformation if split = 3n
-#    runlmp.make_dirs(path, newdir, Ti, zipname, ensemble, split)
+#    runlmp.make_dirs(path, newdir, Ti, zipname, ensemble, split, reg, parameters, store)
 #    # Path to path/Ti/ directory 
 #    pathT = path + newdir + '/T_' + Ti + '/'    
-#    # Modify init.mod
-#    runlmp.num_atoms(Nat, pathT) 
-#    runlmp.mod_init(parameters, pathT)
+#    # Write init.mod with the new parameters and number of atoms
+#    runlmp.write_init(model, parameters, Nat, pathT)
+#    # Optional - stop the deformation when monlmp writes the STOP file
+#    # (checked every 1000 steps, needs split = n)
+#    runlmp.add_halt(pathT, 'in.elastic_' + ensemble, 1000)
+#    # Optional - no atom position dump (or e.g. 'bin' for LAMMPS binary)
+#    runlmp.set_dump(pathT, 'in.elastic_' + ensemble, 'none')
+#    # Optional - block averages of T, pressure tensor and box written by
+#    # LAMMPS to ave.<stage>.txt (100 samples every 10 steps per block),
+#    # averaged in part IV. with methods 6) and 7) without part III.
+#    runlmp.add_ave(pathT, 'in.elastic_' + ensemble, 10, 100)
 #    # Collect all files in proper subdirs, construct the commands and submit the jobs 
-#    runlmp.lmp_sub(p, Ti, pathT, split, ensemble)   
+#    runlmp.lmp_sub(p, Ti, pathT, split, ensemble, executor, reg)   
 #
+# Alternative to the loop above for split = n - all temperatures as 
+# partitions of a single job with q processors each, T_ directories
+# are filled from the partition logs with unpack after the job ends
+#pathP = runlmp.make_pack(path, newdir, 'pack', zipname, ensemble, store)
+#units = [(path + newdir + '/T_' + Ti + '/', {'Tf': Ti, 'T0': Ti, 'af': af[T.index(Ti)]}) for Ti in T]
+#runlmp.write_pack(model, parameters, Nat, units, pathP, ensemble)
+#runlmp.pack_sub(q, 'jobPack', pathP, ensemble, executor)
+#
+# Wait for the local jobs to end
+#if executor is not None:
+#    executor.wait()
+
+# Optional - check that the stored input files and their links in the 
+# run directories were not modified (store = True), lists bad files
+#pathR = path + newdir + '/'
+#keys = caslmp.load_manifest(pathR + zipname)
+#print(caslmp.verify(pathR + 'store/', keys))
+#for (Ti, sub, pathd) in parlmp.units(pathR, T, split):
+#    print(caslmp.verify(pathR + 'store/', keys, pathd))
+
+# Optional - follow the running jobs and stop each deformation once the
+# 95% confidence intervals of C11, C12 and C44 are below 2 GPa 
+# (requires runlmp.add_halt above), polls every 60 s
+#pathR = path + newdir + '/'
+#dirs = [(pathd, sub) for (Ti, sub, pathd) in parlmp.units(pathR, T, split)]
+#monlmp.monitor(dirs, thermo, dirC44, split, 2.0, 60.0)
 
 # # # # # # # # # # # # # # # # # # # # # # 
 # 
-# III. COLLECTION OF LAMMPS RESULTS
+# III.-VI. AS A STAGE GRAPH
 #
 # # # # # # # # # # # # # # # # # # # # # # 
+# Alternative to parts III.-VI. - log parsing, averaging, elastic 
+# constants, properties and plots as one graph, run as often as 
+# needed (e.g. while the jobs of part II. are running); only stages 
+# with changed inputs or parameters are recomputed, finished stages 
+# of each directory are listed in pathR/dag/nodes.json - details in 
+# daglmp.py
+#pathR = path + resdir + '/'
+#nodes = daglmp.elastic_graph(pathR, T, split, avars, thermo, 'moveav', dirC44, nsteps, window)
+#nodes = daglmp.elastic_graph(pathR, T, split, avars, thermo, 'fitstr', dirC44, times=(t00, t0, tf0, tf))
+#print(daglmp.run(nodes, pathR, nproc))
+
+# # # # # # # # # # # # # # # # # # # # # # 
+# 
+# III. COLLECTION OF LAMMPS RESULTS
 #
-# NOTE: this is imperfect but it speeds the program up considerably
+# # # # # # # # # # # # # # # # # # # # # # 
 #
-# Process lammps log into text in each subdirectory
-# Starts the process for each Ti as a different thread
-# Results are stored in data_out.txt and log info in log.out   
-#for Ti in T:
-#    # Path to path/Ti/ directory 
-#    pathT = path + resdir + '/T_' + Ti + '/'    
-#    thread = threading.Thread(target=avlmp.prc_log, args=(pathT, split))        
-#    thread.start() 
+# Process lammps log in each T directory and subdirectory
+# Each one is processed as a separate work unit on nproc processes
+# Results are cached as binary columns in thermo_cache/ and log info in log.out   
+#pathR = path + resdir + '/'
+# Packed run - move the partition logs to the T_ directories first
+#runlmp.unpack(pathR + 'pack/')
+#work = parlmp.units(pathR, T, split)
+# Alternatively process only runs that completed since the last time
+# (recorded in the run registry, no directory scans)
+#reg = pathR + 'runs.db'
+#reglmp.refresh(reg)
+#work = reglmp.pending(reg)
+#parlmp.run_units(avlmp.save_log, [(pathd,) for (Ti, sub, pathd) in work], nproc)
+# Optional - the same with wall/CPU time, peak memory, I/O and rows of 
+# each directory added to pathR/prof.json and prof.csv (any stage of 
+# parts III.-V. can be wrapped like this), printed per stage
+#out = parlmp.run_units(prflmp.timed, [(avlmp.save_log, 'log', pathd, pathd) for (Ti, sub, pathd) in work], nproc)
+#res, rec = prflmp.split(out)
+#print(prflmp.summary(prflmp.save_report(pathR, rec)))
+# Optional - cProfile and tracemalloc report of one directory, saved
+# to pathR/prof_log.prof and pathR/prof_log.txt
+#prflmp.profile(avlmp.save_log, (work[0][2],), pathR + 'prof_log', mem=True)
+
+# Optional - convert movie.xyz to float32 movie.npy (every 10th frame) 
+# and compute the radial distribution function of the last 100 frames
+# at the first temperature (split = n)
+#parlmp.run_units(trjlmp.to_binary, [(pathd + 'movie.xyz', None, 10) for (Ti, sub, pathd) in work], nproc)
+#pathd = pathR + 'T_' + T[0] + '/'
+#pos, steps, elements = trjlmp.load_binary(pathd + 'movie')
+#r, g = trjlmp.rdf(pos[-100:], trjlmp.boxes(pathd, thermo, steps[-100:]), 6.0)
 
 # # # # # # # # # # # # # # # # # # # # # # 
 # 
@@ -190,10 +323,12 @@ dirC44 = 'xy'
 # Current list and usage examples:
 #
 # 1) Moving average
-#   Not yet checked numpy moving average from the web.
+#   Box (default), exponential ('exp') or block ('block') averages
 #   avlmp.moveav(avars, thermo, window) 
 #   
 # 2) Average of the distributions
+#   Student t fit of all variables and steps at once, also returns
+#   the standard errors of the means
 #   avlmp.distav(avars, thermo)
 #
 # 3) Fit the stress/strain data and get the elastic constants from
@@ -202,23 +337,50 @@ dirC44 = 'xy'
 #
 # 4) Simple average
 #   avlmp.simpav(avars, thermo)
+#
+# 5) Fit the stress/strain data while parsing log.lammps - constant
+#       memory, no part III. needed, also returns standard errors 
+#       of the elastic constants corrected for time correlation
+#   avlmp.fitstr_log(thermo, path, dirC44, split, sub, pathd)
+#
+# 6) Average of the block averages written by LAMMPS (runlmp.add_ave),
+#       stages 1 (NVT) and 2 (deformation), also returns standard errors 
+#   avlmp.aveav(avars, pathd)
+#
+# 7) Fit the block averaged stress/strain data (runlmp.add_ave), also
+#       returns standard errors of the elastic constants
+#   avlmp.fitstr_log(thermo, path, dirC44, split, sub, pathd, prefix='ave')
+#
+# 8) Strain fluctuations of an NPT run (ensemble = 'fluct') - full 6x6 
+#       elastic tensor with standard errors from a single equilibrium
+#       run, cubic C11, C12 and C44 saved to res_CsFit.txt
+#   avlmp.fluct(thermo, path, pathd)
+#
+# Statistical inefficiency of the data and run length (steps of the 
+# deformation stage) needed for a target error of the elastic 
+# constants in GPa, saved in stat_res.txt of each directory - details 
+# in corlmp.py
+#   corlmp.stat_report(avars, thermo, 0.5, dirC44, split, sub, pathd)
 
-#for Ti in T:
-#    # Path to path/Ti/ directory 
-#    pathT = path + resdir + '/T_' + Ti + '/'
-#    # Change directory, perform averaging 
-#    # and change back to current directory        
-#    if split == '3n':
-#        subdir = ['x', 'y', 'yz']
-#        for sub in subdir:
-#            pathsub = pathT + sub + '/'
-#            with avlmp.ChangeDir(pathsub):
-#                # Change the averaging approach here
-#                avlmp.fitstr(avars, thermo, path+resdir+'/', t00, t0, tf0, tf, dirC44, split, sub)               
-#    elif split == 'n':
-#            with avlmp.ChangeDir(pathT):
-#                # Change the averaging approach here
-#                avlmp.fitstr(avars, thermo, path+resdir+'/', t00, t0, tf0, tf, dirC44, split, None)               
+# Each T directory (and subdirectory for split = 3n) is averaged 
+# as a separate work unit, paths are passed explicitly to avlmp
+# The methods 1), 2) and 4) take the directory as the last argument, e.g.
+#   parlmp.run_units(avlmp.distav, [(avars, thermo, pathd) for (Ti, sub, pathd) in work], nproc)
+# fitstr results are returned and saved in order of temperatures
+#pathR = path + resdir + '/'
+#work = parlmp.units(pathR, T, split)
+#args = [(avars, thermo, pathR, t00, t0, tf0, tf, dirC44, split, sub, pathd, False) for (Ti, sub, pathd) in work]
+#res = parlmp.run_units(avlmp.fitstr, args, nproc)
+#parlmp.save_res(pathR + 'res_CsFit.txt', res)
+# With the run registry - record the averaged runs
+#reglmp.set_averaged(reg, [pathd for (Ti, sub, pathd) in work])
+# Alternatively record averages and constants in the result store
+# pathR/results.db instead of appending to av_res.txt and res_CsFit.txt
+# (all methods take db as the last argument, see reslmp.py)
+#db = pathR + 'results.db'
+#parlmp.run_units(avlmp.moveav, [(avars, thermo, window, pathd, 'box', db) for (Ti, sub, pathd) in work], nproc)
+#args = [(avars, thermo, pathR, t00, t0, tf0, tf, dirC44, split, sub, pathd, False, (1, 2), db) for (Ti, sub, pathd) in work]
+#parlmp.run_units(avlmp.fitstr, args, nproc)
 
 # # # # # # # # # # # # # # # # # # # # # # 
 # 
@@ -226,21 +388,46 @@ dirC44 = 'xy'
 #
 # # # # # # # # # # # # # # # # # # # # # # 
 
-#for Ti in T:
-#    # Path to path/Ti/ directory 
-#    pathT = path + resdir + '/T_' + Ti + '/'
-#    # Compute elastic constants
-#    ellmp.cs(avars, nsteps, Ti, path + resdir + '/', pathT, split)     
+# Compute elastic constants for each T as a separate work unit
+# results are saved in order of temperatures
+#pathR = path + resdir + '/'
+#args = [(avars, nsteps, Ti, pathR, pathR + 'T_' + Ti + '/', split, False) for Ti in T]
+#res = parlmp.run_units(ellmp.cs, args, nproc)
+#parlmp.save_res(pathR + 'res_Cs.txt', res)
+# With the result store - averages of moveav from db, constants are 
+# recorded as method 'cs/moveav'
+#args = [(avars, nsteps, Ti, pathR, pathR + 'T_' + Ti + '/', split, False, db, 'moveav') for Ti in T]
+#parlmp.run_units(ellmp.cs, args, nproc)
+
+# Mean, standard error and number of datasets for each material, Nat 
+# and temperature from res_CsFit.txt of all RES_ directories in path,
+# saved to path/agg_res_CsFit.txt, only new or changed datasets are read
+#keys, mean, se, count = aglmp.aggregate(path, 'res_CsFit.txt')
+# Voigt, Reuss and Hill moduli, Zener ratio and Debye temperature of 
+# the same groups with bootstrap standard errors and 95% intervals 
+# (10000 resamples of the datasets), saved to path/boot_res_CsFit.txt
+#ellmp.elprops_boot(path, 'res_CsFit.txt', nboot=10000)
 
-# Compute other elastic properties - under development
+# Compute other elastic properties of this dataset, saved to res_props.txt
 #pathMain = path + resdir + '/'
 #ellmp.elprops(pathMain, 'res_CsFit.txt')
+#ellmp.elprops(pathMain, 'fitstr', pathMain + 'results.db')
 
 # # # # # # # # # # # # # # # # # # # # # # 
 # 
 # VI. BASIC VISUALIZATION OF THE RESULTS 
 #
 # # # # # # # # # # # # # # # # # # # # # # 
+# Optional - 0 K elastic constants of the potential for the plots, 
+# Nat x Nat x Nat unit cells (fractions - random alloy, e.g. Ni20Cr
+# is {2: 0.8, 3: 0.2} with the types of data.Ni-unit) 
+statics = None
+#statics = eamlmp.statics('FeNiCr.eam.alloy', 'data.Ni-unit', 1)
+#statics = eamlmp.statics('FeNiCr.eam.alloy', 'data.Ni-unit', 4, {2: 0.8, 3: 0.2}, seed=1)
 # Plot elastic constants as a function of temperature
-vislmp.vis_cs(path+resdir+'/', 'res_CsFit.txt')
+vislmp.vis_cs(path+resdir+'/', 'res_CsFit.txt', statics)
+# From the result store - constants of a method, e.g. 'fitstr' or 'cs/moveav'
+#vislmp.vis_cs(path+resdir+'/', 'fitstr', statics, path+resdir+'/results.db')
+# Young's moduli of all datasets with bootstrap intervals (elprops_boot)
+#vislmp.vis_boot(path)
 
@@ -0,0 +1,155 @@
+#!/usr/bin/python
+
+# Aggregation module - statistics over many datasets (RES_* directories):
+#   - Finds all result files (e.g. res_CsFit.txt) of datasets in a
+#       directory
+#   - Summary of every dataset is cached with the checksum of its
+#       result and info files, only new or changed datasets are read
+#   - Mean, standard error and number of datasets of every column for
+#       each material, number of atoms (Nat) and temperature
+#
+# Notes:
+#   - Material and Nat of a dataset are read from dataset.json in its
+#       directory (see save_info), without it Nat is taken from the
+#       replicate command in init.mod of its first T_ directory
+#   - Measured temperatures differ between datasets, they are grouped
+#       in bins of width dT centred at multiples of dT
+#   - Result files are append-only, a dataset contributes only its 
+#       last row of each temperature bin (e.g. a repeated fit)
+#   - Cache is agg_cache.json and the result agg_<resfile> in the
+#       directory with the datasets
+#
+# Last modified: October 18 2026
+#
+
+import os, glob, json, warnings, numpy
+import reglmp
+
+def save_info(pathR, material, Nat, **info):
+    """ Save material, Nat and other information about dataset pathR to dataset.json. """
+    info['material'] = material
+    info['Nat'] = int(Nat)
+    with open(pathR + 'dataset.json', 'w') as fp:
+        json.dump(info, fp, indent=1, sort_keys=True)
+
+def load_info(pathR):
+    """ Material and Nat of dataset pathR. """
+    if os.path.isfile(pathR + 'dataset.json'):
+        with open(pathR + 'dataset.json', 'r') as fp:
+            info = json.load(fp)
+        return info['material'], int(info['Nat'])
+    # Datasets from before dataset.json
+    Nat = 0
+    for fname in sorted(glob.glob(pathR + 'T_*/init.mod')):
+        with open(fname, 'r') as fp:
+            for line in fp:
+                words = line.split()
+                if words[:1] == ['replicate']:
+                    Nat = int(words[1])
+        break
+    return 'unknown', Nat
+
+def summary(pathR, resfile):
+    """ Summary of dataset pathR - material, Nat and the rows of resfile. """
+    material, Nat = load_info(pathR)
+    # Rows of 3n runs can be split over lines, all values are read in
+    # order and reshaped by the number of columns of the first line
+    with open(pathR + resfile, 'r') as fp:
+        text = fp.read()
+    lines = [line for line in text.split('\n') if line.strip()]
+    ncol = 0
+    if lines:
+        ncol = len(lines[0].strip().strip(',').split(','))
+    vals = [float(x) for x in text.replace('\n', ',').split(',') if x.strip()]
+    nrow = len(vals)//ncol if ncol else 0
+    return {'material': material, 'Nat': Nat, 'rows': vals[:nrow*ncol], 'ncol': ncol}
+
+def update(path, resfile='res_CsFit.txt', pattern='RES_*'):
+    """ Summaries of all datasets pattern/resfile in path, only new or changed datasets are read. """
+    cname = path + 'agg_cache.json'
+    cache = {}
+    if os.path.isfile(cname):
+        with open(cname, 'r') as fp:
+            cache = json.load(fp)
+    new = {}
+    nread = 0
+    for fname in sorted(glob.glob(path + pattern + '/' + resfile)):
+        pathR = os.path.dirname(fname) + '/'
+        key = os.path.basename(os.path.dirname(fname))
+        ck = reglmp.checksum(fname) + str(reglmp.checksum(pathR + 'dataset.json'))
+        if key in cache and cache[key]['hash'] == ck:
+            new[key] = cache[key]
+            continue
+        new[key] = summary(pathR, resfile)
+        new[key]['hash'] = ck
+        nread += 1
+    if nread or len(new) != len(cache):
+        with open(cname, 'w') as fp:
+            json.dump(new, fp)
+    return new
+
+def groups(path, resfile='res_CsFit.txt', pattern='RES_*', dT=25.0):
+    """ Rows of all datasets grouped by material, Nat and temperature.
+
+        Return group keys (material, Nat, T), rows (one per dataset and group) and group index of each row."""
+    sums = update(path, resfile, pattern)
+    mats, nats, rows = [], [], []
+    ncol = max([sums[key]['ncol'] for key in sums] + [0])
+    for key in sorted(sums):
+        s = sums[key]
+        if not s['rows']:
+            continue
+        if s['ncol'] != ncol:
+            warnings.warn('Dataset ' + key + ' skipped - ' + str(s['ncol']) + ' columns in ' + resfile
+                          + ' instead of ' + str(ncol))
+            continue
+        data = numpy.array(s['rows']).reshape(-1, ncol)
+        # Latest row of each temperature bin of the dataset
+        Tbin = numpy.round(data[:,0]/dT).astype(int)
+        last = len(Tbin) - 1 - numpy.unique(Tbin[::-1], return_index=True)[1]
+        data = data[numpy.sort(last)]
+        rows.append(data)
+        mats += [s['material']]*len(data)
+        nats += [s['Nat']]*len(data)
+    if not rows:
+        return [], numpy.zeros((0, ncol)), numpy.zeros(0, dtype=int)
+    data = numpy.vstack(rows)
+    mnames, mcode = numpy.unique(mats, return_inverse=True)
+    Tbin = numpy.round(data[:,0]/dT).astype(int)
+    keys = numpy.column_stack((mcode, nats, Tbin))
+    grp, inv = numpy.unique(keys, axis=0, return_inverse=True)
+    gkeys = [(str(mnames[g[0]]), int(g[1]), float(g[2]*dT)) for g in grp]
+    return gkeys, data, inv.ravel()
+
+def samples(path, resfile='res_CsFit.txt', pattern='RES_*', dT=25.0):
+    """ Result rows of all datasets for each material, Nat and temperature.
+
+        Return group keys (material, Nat, T) and list of arrays of rows (one per dataset)."""
+    gkeys, data, inv = groups(path, resfile, pattern, dT)
+    return gkeys, [data[inv == ik] for ik in range(len(gkeys))]
+
+def aggregate(path, resfile='res_CsFit.txt', pattern='RES_*', dT=25.0, save=True):
+    """ Mean, standard error and count of each result column per material, Nat and temperature.
+
+        Return group keys (material, Nat, T) and arrays of means, standard errors and counts."""
+    # First column of resfile is the temperature, the other columns are
+    # averaged, standard errors use ddof = 1 (zero for single datasets)
+    gkeys, data, inv = groups(path, resfile, pattern, dT)
+    if not gkeys:
+        nv = max(data.shape[1]-1, 0)
+        return [], numpy.zeros((0, nv)), numpy.zeros((0, nv)), numpy.zeros(0, dtype=int)
+    ng = len(gkeys)
+    count = numpy.bincount(inv, minlength=ng)
+    vals = data[:,1:]
+    mean = numpy.array([numpy.bincount(inv, vals[:,jk], ng) for jk in range(vals.shape[1])]).T/count[:,None]
+    dev = vals - mean[inv]
+    ss = numpy.array([numpy.bincount(inv, dev[:,jk]**2, ng) for jk in range(vals.shape[1])]).T
+    var = ss/numpy.maximum(count - 1, 1)[:,None]
+    se = numpy.sqrt(var/count[:,None])
+    if save:
+        with open(path + 'agg_' + resfile, 'w') as fr:
+            fr.write('# material, Nat, T, count, means, standard errors\n')
+            for ik in range(ng):
+                fr.write(','.join([gkeys[ik][0], str(gkeys[ik][1]), str(gkeys[ik][2]), str(count[ik])] +
+                                  [str(x) for x in mean[ik]] + [str(x) for x in se[ik]]) + '\n')
+    return gkeys, mean, se, count
@@ -1,13 +1,20 @@
 #!/usr/bin/python
 
 # Postprocessing module for lammps output averaging:
-#   - Retrieves the data from log.lammps and stores as txt 
+#   - Retrieves the data from log.lammps and caches it as binary columns 
 #   - Performs data averaging using selected approach
+#   - Reads block averages written by fix ave/time during the run 
+#       (see runlmp.add_ave) and averages or fits them directly
+#   - Full elastic tensor from the box fluctuations of an NPT run 
+#       (in.elastic_fluct, see fluct)
+#   - Results are appended to av_res.txt and res_CsFit.txt or, with
+#       db, recorded in the result store (see reslmp.py)
 #
 # Last modified: May  6  2015
 #
-import subprocess, os, numpy
-from scipy import stats
+import os, json, numpy
+import statlmp, reslmp
+from runlmp import AVE_COLS
 
 class ChangeDir:
     """Context manager for changing the current working directory"""
@@ -21,43 +28,202 @@ class ChangeDir:
     def __exit__(self, etype, value, traceback):
         os.chdir(self.savedPath)
 
+class LogReader:
+    """ Incremental parser of thermo blocks in a LAMMPS log. """
+    # Lines are fed in arbitrary pieces, each thermo block (one per 
+    # run or minimize command) is converted to numeric rows in chunks 
+    # of at most 'chunk' lines. Stage boundaries are stored as row 
+    # offsets: stage k spans rows stages[k]:stages[k+1] 
+    def __init__(self, chunk=50000):
+        self.chunk = chunk
+        # Thermo keywords as printed by LAMMPS
+        self.header = []
+        # Row offsets of stage boundaries and stage types
+        self.stages = [0]
+        self.kinds = []
+        # Number of rows parsed so far
+        self.nrows = 0
+        self.inblock = False
+        self.kind = 'run'
+        self.buf = []
+
+    def feed(self, lines):
+        """ Parse lines and return a list of (stage, rows) for new numeric row blocks. """
+        out = []
+        for line in lines:
+            s = line.lstrip()
+            if self.inblock:
+                if s[:1].isdigit() or s[:1] == '-':
+                    self.buf.append(s)
+                    if len(self.buf) >= self.chunk:
+                        out.append((len(self.kinds)-1, self.flush()))
+                elif s.startswith('Loop time') or s.startswith('ERROR'):
+                    out.append((len(self.kinds)-1, self.flush()))
+                    self.end_block()
+                # Anything else (e.g. warnings) is skipped
+            elif s.startswith('Step ') or s.rstrip() == 'Step':
+                header = s.split()
+                if self.header and header != self.header:
+                    raise ValueError('Thermo keywords changed between stages: ' + ' '.join(header))
+                self.header = header
+                self.kinds.append(self.kind)
+                self.inblock = True
+            elif s.startswith('Setting up'):
+                self.kind = 'minimize' if 'minimization' in s else 'run'
+        return [(ik, rows) for (ik, rows) in out if len(rows)]
+
+    def flush(self):
+        """ Convert buffered thermo lines to a 2D numeric array. """
+        ncol = len(self.header)
+        if not self.buf:
+            return numpy.zeros((0, ncol))
+        rows = numpy.array(' '.join(self.buf).split(), dtype=float)
+        if rows.size != len(self.buf)*ncol:
+            # Fall back to line by line check for incomplete lines
+            good = [ln for ln in self.buf if len(ln.split()) == ncol]
+            rows = numpy.array(' '.join(good).split(), dtype=float)
+        rows = rows.reshape(-1, ncol)
+        self.buf = []
+        self.nrows += len(rows)
+        return rows
+
+    def end_block(self):
+        """ Close current thermo block and record stage boundary. """
+        self.inblock = False
+        self.stages.append(self.nrows)
+
+    def close(self):
+        """ Finish parsing - close a block truncated by end of file. """
+        out = []
+        if self.inblock:
+            out.append((len(self.kinds)-1, self.flush()))
+            self.end_block()
+        return [(ik, rows) for (ik, rows) in out if len(rows)]
+
+def iter_log(fname, reader):
+    """ Parse LAMMPS log file fname with reader in a single pass, generate (stage, rows). """
+    with open(fname, 'r') as fp:
+        while True:
+            lines = fp.readlines(1 << 22)
+            if not lines:
+                break
+            for block in reader.feed(lines):
+                yield block
+    for block in reader.close():
+        yield block
+
+def read_log(fname, chunk=50000):
+    """ Read all thermo data from LAMMPS log file fname in a single pass. 
+
+        Return thermo keywords, 2D data array, stage boundaries and stage types."""
+    reader = LogReader(chunk)
+    blocks = [rows for (ik, rows) in iter_log(fname, reader)]
+    if blocks:
+        data = numpy.concatenate(blocks)
+    else:
+        data = numpy.zeros((0, len(reader.header)))
+    return reader.header, data, reader.stages, reader.kinds
+
+def cache_log(pathd):
+    """ Build columnar binary cache of pathd/log.lammps if missing or out of date. 
+
+        Return cache metadata (keywords, stage boundaries and types)."""
+    # Cache is stored in pathd/thermo_cache/ - one .npy array per thermo 
+    # keyword, stage boundaries and meta.json with log file size and mtime
+    # Cache is rebuilt only when log.lammps changes
+    pathc = pathd + 'thermo_cache/'
+    fname = pathd + 'log.lammps'
+    meta = {}
+    if os.path.isfile(pathc + 'meta.json'):
+        with open(pathc + 'meta.json', 'r') as fp:
+            meta = json.load(fp)
+    if not os.path.isfile(fname):
+        if not meta:
+            raise IOError('No log.lammps or thermo cache in ' + pathd)
+        return meta
+    st = os.stat(fname)
+    if meta.get('size') == st.st_size and meta.get('mtime') == st.st_mtime:
+        return meta
+    header, data, stages, kinds = read_log(fname)
+    if not os.path.isdir(pathc):
+        os.mkdir(pathc)
+    for jk in range(len(header)):
+        numpy.save(pathc + header[jk] + '.npy', numpy.ascontiguousarray(data[:,jk]))
+    meta = {'size': st.st_size, 'mtime': st.st_mtime, 'header': header, 
+            'stages': stages, 'kinds': kinds, 'nrows': len(data)}
+    # Write metadata last so an interrupted rebuild is redone next time
+    with open(pathc + 'meta.json', 'w') as fp:
+        json.dump(meta, fp)
+    return meta
+
+def save_log(pathd):
+    """ Parse pathd/log.lammps into the thermo cache, save info on stages in log.out. """
+    meta = cache_log(pathd)
+    with open(pathd + 'log.out', 'w') as fp:
+        fp.write('# ' + ' '.join(meta['header']) + '\n')
+        for ik in range(len(meta['kinds'])):
+            fp.write(meta['kinds'][ik] + ' ' + str(meta['stages'][ik]) + ' ' + str(meta['stages'][ik+1]) + '\n')
+
 def prc_log(pathT, split):
     """ Process log.lammps data in each subdirectory of pathT. """
-    # Saves the data in data_out.txt and info on simulation stages from log.lammps in log.out
+    # Saves the data in thermo_cache/ and info on simulation stages from log.lammps in log.out
     if split == 'n':
-        subprocess.call(['log2txt.py log.lammps data_out.txt > log.out'], shell=True, cwd=pathT)
+        save_log(pathT)
     elif split == '3n':
         subdir = ['x', 'y', 'yz']
         for sub in subdir:
             pathsub = pathT + sub + '/'
-            subprocess.call(['log2txt.py log.lammps data_out.txt > log.out'], shell=True, cwd=pathsub)
+            save_log(pathsub)
 
-def imp_data(avars, thermo):
-    """ Import data_out.txt as a numeric array and lammps steps in log.out. 
+def load_cols(pathd, cols):
+    """ Memory map thermo columns cols (LAMMPS keywords) from the cache in pathd. 
 
-        Process the data and return numeric arrays with target variables."""
+        Return dictionary of column arrays and stage boundaries."""
+    meta = cache_log(pathd)
+    pathc = pathd + 'thermo_cache/'
+    data = {}
+    for col in cols:
+        data[col] = numpy.load(pathc + col + '.npy', mmap_mode='r')
+    return data, meta['stages']
 
-    # Load thermo output from data_out.txt
-    data = numpy.loadtxt('data_out.txt')
-    # Load log info, delete the second row and convert first to int         
-    log =[] #numpy.genfromtxt('log.out')        
-    #log = map(int, log[0])
-    
-    # Find indices of avars in thermo
-    find = lambda searchlist, elem: [[i for i, x in enumerate(searchlist) if x==e] for e in elem]
-    ind = find(thermo, avars)
-    # Change 'data' into an array
-    data = numpy.array(data)
+def imp_data(avars, thermo, pathd=''):
+    """ Import thermo columns listed in avars and lammps stages from the thermo cache in pathd. 
+
+        Return numeric arrays with target variables."""
+    # Only the requested columns are read - thermo gives names and order
+    # of the thermo output, LAMMPS keywords come from the cache itself
+    # pathd defaults to the current directory
+    meta = cache_log(pathd)
+    header = meta['header']
+    cols = [header[thermo.index(var)] for var in avars]
+    data, log = load_cols(pathd, cols)
     # Generate variables from thermo data and return them along with log
     newvars = {}
-    for jk in ind:
-        newvars[thermo[jk[0]]] = data[:,jk[0]]         
+    for jk in range(len(avars)):
+        newvars[avars[jk]] = data[cols[jk]]
     return newvars, log
 
-def simpav(avars, thermo):
-    """ Compute average of all values for each simulation step. """
+def save_av(pathd, avars, avvar, db=None, method='', params=None, save=True):
+    """ Append stage averages avvar (rows are stages) to pathd/av_res.txt or record them in store db. """
+    # save = False and no db - the averages are only returned (daglmp)
+    if db is not None:
+        reslmp.put(db, pathd, method, params, avars, avvar)
+        return
+    if not save:
+        return
+    # Save to file (.npy binary also an option)
+    with open(pathd + "av_res.txt", "a") as resfile:
+        hstr = ' '*30
+        resfile.write(hstr.join(avars))
+        resfile.write('\n')
+        numpy.savetxt(resfile, avvar)
+
+def simpav(avars, thermo, pathd='', db=None, save=True):
+    """ Compute average of all values for each simulation step. 
+
+        Return the averages, rows are stages."""
     # Import thermo data with target variables and log info
-    [data, logL] = imp_data(avars, thermo)
+    [data, logL] = imp_data(avars, thermo, pathd)
     nd = len(data)
     nl = len(logL)
     # Initialize array with results
@@ -69,24 +235,28 @@ def simpav(avars, thermo):
         for jk in range(nd):
             temp = data[avars[jk]]
             meanvar[ik,jk] = numpy.mean(temp[t0-1:tf], axis=0, dtype=numpy.float128)
-    # Save to file (.npy binary also an option)
-    with open("av_res.txt", "a") as resfile:
-        hstr = ' '*30
-        resfile.write(hstr.join(avars))
-        resfile.write('\n')
-        numpy.savetxt(resfile, meanvar)
+    save_av(pathd, avars, meanvar, db, 'simpav', None, save)
+    return meanvar
 
-def moveav(avars, thermo, window):
-    """ Moving average averaging. Saves mean over averages. """
-    # NOTE: numpy.convolve() option 'valid' makes sure that the
-    # average will always be computed from number of datapoints 
-    # specified by 'window' - otherwise it will patch missing 
+def moveav(avars, thermo, window, pathd='', method='box', db=None, save=True):
+    """ Moving average averaging. Saves mean over averages. 
+
+        Return the means, rows are stages."""
+    # NOTE: the moving average uses numpy.convolve() option 'valid' 
+    # semantics - the average will always be computed from number of 
+    # datapoints specified by 'window' - otherwise it would patch missing 
     # entries at the far ends of the data with 0 
     # E.g. - first point (e.g.=1, window=3) average will be 1+0+0=0.333  
+    #
+    # method - 'box' moving average (default), 'exp' exponential moving
+    #   average with span window, 'block' averages of blocks of window rows
+    # window is in time steps, it is converted to rows with the thermo
+    #   output interval of each stage
+    # All variables of a step are averaged at once, see statlmp 
 
-    # Import thermo data with target variables and log info
-    [data, logL] = imp_data(avars, thermo)
-    nd = len(data)
+    # Import thermo data with target variables, time steps and log info
+    [data, logL] = imp_data(avars + ['Step'], thermo, pathd)
+    nd = len(avars)
     nl = len(logL)
     # Initialize array with results
     mvavar = numpy.zeros((nl-1,nd))
@@ -95,112 +265,326 @@ def moveav(avars, thermo, window):
     for ik in range(nl-1):    
         t0 = logL[ik] + 1
         tf = logL[ik+1]
-        for jk in range(nd):
-            temp = data[avars[jk]]
-            weights = numpy.repeat(1.0, window)/window
-            mvavar[ik,jk] = numpy.mean(numpy.convolve(temp[t0-1:tf], weights, 'valid'))
-    # Save to file (.npy binary also an option)
-    with open("av_res.txt", "a") as resfile:
-        hstr = ' '*30
-        resfile.write(hstr.join(avars))
-        resfile.write('\n')
-        numpy.savetxt(resfile, mvavar)
+        temp = numpy.column_stack([data[avars[jk]][t0-1:tf] for jk in range(nd)])
+        nwin = max(1, int(round(window/thermo_every(data['Step'][t0-1:tf]))))
+        mvavar[ik,:] = statlmp.mean_movav(temp, nwin, method)
+    save_av(pathd, avars, mvavar, db, 'moveav', {'window': window, 'method': method}, save)
+    return mvavar
 
-def distav(avars, thermo):
-    """ Mean of the distribution. Currently using t student distribution. """
+def distav(avars, thermo, pathd='', db=None, save=True):
+    """ Mean of the distribution. Currently using t student distribution. 
+
+        Return the means and their standard errors."""
     # Import thermo data with target variables and log info
-    [data, logL] = imp_data(avars, thermo)
+    [data, logL] = imp_data(avars, thermo, pathd)
     nd = len(data)
     nl = len(logL)
-    # Initialize array with results
-    dstavar = numpy.zeros((nl-1,nd))
     # Fit the data for each step to t-student distribution and save the distribution mean    
-    for ik in range(nl-1):    
-        t0 = logL[ik] + 1
-        tf = logL[ik+1]
-        for jk in range(nd):
-            temp = data[avars[jk]]
-            # prm[0] - unknown; prm[1] - mu/mean; prm[2] - sigma/std  
-            prm = stats.t.fit(temp[t0-1:tf])
-            dstavar[ik,jk] = prm[1]
-    # Save to file (.npy binary also an option)
-    with open("av_res.txt", "a") as resfile:
-        hstr = ' '*30
-        resfile.write(hstr.join(avars))
-        resfile.write('\n')
-        numpy.savetxt(resfile, dstavar)
+    # All variables of a step are fitted at once, one column each (no 
+    # padding of the short minimization stages)
+    dstavar = numpy.zeros((nl-1, nd))
+    dsterr = numpy.zeros((nl-1, nd))
+    for ik in range(nl-1):
+        cols = statlmp.stack_cols([data[avars[jk]][logL[ik]:logL[ik+1]] for jk in range(nd)])
+        # mu - mean; sigma - scale; nu - degrees of freedom; se - standard error of mu
+        mu, sigma, nu, se = statlmp.tfit(cols)
+        dstavar[ik,:] = mu
+        dsterr[ik,:] = se
+    save_av(pathd, avars, dstavar, db, 'distav', None, save)
+    return dstavar, dsterr
     
-def fitstr(avars, thermo, path, t00, t0, tf0, tf, dirC44, split, sub):
+def write_fit(path, pathd, T, C, split, sub, save=True, db=None, method='', params=None):
+    """ Result string of temperature T and constants C of a fit, saved to path/res_CsFit.txt and store db. """
+    # split = n - C11, C12 and C44 in one line
+    # split = 3n - the constant of subdirectory sub, the x, y and yz
+    #   results of a temperature make up one line of the file
+    # db - record the constants of run directory pathd as method with
+    #   parameters params, see reslmp.put_res
+    if split == 'n':
+        res = str(T)+','+str(C[0])+','+str(C[1])+','+str(C[2])+'\n'
+    elif split == '3n':
+        if sub == 'x':
+            res = str(T)+','+str(C[0])+','
+        elif sub == 'y':
+            res = str(C[0])+','
+        elif sub == 'yz':
+            res = str(C[0])+'\n'
+    if save:
+        with open(path+'res_CsFit.txt','a+') as fr:
+            fr.write(res)
+    if db is not None:
+        reslmp.put_res(db, pathd, method, params, res, split, sub)
+    return res
+
+def fitstr(avars, thermo, path, t00, t0, tf0, tf, dirC44, split, sub, pathd='', save=True, stages=(1, 2), db=None):
     """ Obtain elastic constants from linear fit of stress/strain curve. """
     # Input:
-    # t00, t0 - initial time span
-    # tf0, tf - final time span    
+    # t00, t0 - initial time span, time steps of stage stages[0]
+    # tf0, tf - final time span, time steps of stage stages[1]
     # dirC44 - direction of straining for C44 computation 
+    # pathd - directory with the thermo data (default - current)
+    # save - append the result to path/res_CsFit.txt, the result 
+    #   string is returned in any case so parallel runs can write 
+    #   results in order
     #
-	# Comment/uncomment sections of this code for different
-	# deformation strategies - currently x and xy
-	#
-    # Import thermo data with target variables and log info
-    [data, logL] = imp_data(avars, thermo)
-    nd = len(data)
-    # Initial box dimensions
-    for jk in range(nd):
-        if avars[jk]=='lx':
-            temp = data[avars[jk]]
-            # prm[0] - unknown; prm[1] - mu/mean; prm[2] - sigma/std  
-            prm = stats.t.fit(temp[t00:t0])
-            lx0 = prm[1]
-#        elif avars[jk]=='ly':
-#            temp = data[avars[jk]]
-#            # prm[0] - unknown; prm[1] - mu/mean; prm[2] - sigma/std  
-#            prm = stats.t.fit(temp[t00:t0])
-#            ly0 = prm[1]
-        else:
-            pass
-    # Compute the average temperature during the deformation part
-    # saves only the x component for now (in 3n)
-    temp = data['T']
-    prm = stats.t.fit(temp[tf0:tf])
-    T = prm[1]
-    # Compute strain
-    eta11 = (data['lx']-lx0)/lx0
-    #eta12 = (data['lx']-lx0)/lx0
-    #eta44 = (data[dirC44]-lx0)/lx0
-    # Collect only the deformation part
-    eta11 = eta11[tf0:tf]
-    #eta12 = eta12[tf0:tf]
-    #eta44 = eta44[tf0:tf]
-    # Collect the stresses
-    p11 = data['pxx']
-    p11 = p11[tf0:tf]
-    p12 = data['pyy']
-    p12 = p12[tf0:tf]
-    p44 = data['p'+dirC44]
-    p44 = p44[tf0:tf]
+    # Time spans are LAMMPS time steps (Step column), rows are found 
+    # within the stages so any thermo output interval can be used
+    # Deformation strategies are the same as in fitstr_log, see fit_spec
+    #
+    # Import only the thermo columns needed for the fit and log info
+    xvar, lvar, yvars, fac = fit_spec(dirC44, split, sub)
+    fvars = ['Step', 'T']
+    fvars += [var for var in [xvar, lvar] + yvars if var not in fvars]
+    [data, logL] = imp_data(fvars, thermo, pathd)
+    r00, r0 = step_rows(data['Step'], logL, stages[0], t00, t0)
+    rf0, rf = step_rows(data['Step'], logL, stages[1], tf0, tf)
+    # Initial box dimension and the average temperature during 
+    # the deformation part from t-student distribution fits - 
+    # mean of each window
+    win = statlmp.stack_cols([data[lvar][r00:r0], data['T'][rf0:rf]])
+    mu = statlmp.tfit(win)[0]
+    l0 = mu[0]
+    T = mu[1]
+    # Strain of the deformation part
+    eta = (data[xvar][rf0:rf]-l0)/l0
     # Fit - collect the slopes (elastic constants)
+    C = [numpy.polyfit(eta, -data[var][rf0:rf], 1)[0]*fac[jk] for jk, var in enumerate(yvars)]
+    return write_fit(path, pathd, T, C, split, sub, save, db, 'fitstr',
+                     {'t00': t00, 't0': t0, 'tf0': tf0, 'tf': tf, 'stages': stages})
+
+def step_rows(step, logL, ik, s0, s1):
+    """ Rows of stage ik with time steps s0 <= Step < s1. """
+    # Step increases within a stage, consecutive stages share the step
+    # at their boundary
+    t0 = logL[ik]
+    tf = logL[ik+1]
+    r0 = t0 + numpy.searchsorted(step[t0:tf], s0, 'left')
+    r1 = t0 + numpy.searchsorted(step[t0:tf], s1, 'left')
+    return r0, r1
+
+def thermo_every(step):
+    """ Thermo output interval in time steps of rows with time steps step. """
+    dstep = numpy.diff(step)
+    dstep = dstep[dstep > 0]
+    if len(dstep) == 0:
+        return 1.0
+    return float(numpy.median(dstep))
+
+def fitrows(blocks, cols, xvar, lvar, yvars, stages=(1, 2), block=16):
+    """ Fit -y against strain from (stage, rows) blocks with columns cols in a single pass. 
+
+        Return slopes, standard errors, reference length, its standard error and mean temperature."""
+    # Strain is (xvar - lvar0)/lvar0, lvar0 is the mean of lvar in 
+    # stage stages[0], the fit is done on the rows of stage stages[1] 
+    # Slopes are in pressure units of the rows, standard errors account 
+    # for time correlation of MD data, see statlmp.LinFit
+    # Stages are numbered in order of run/minimize commands from 0
+    # blocks - e.g. iter_log (thermo rows, cols = thermo) or the block
+    #   averages of runlmp.add_ave (block = 1, rows are already block
+    #   averages), lvar of stages[0] is kept for the error of lvar0
+    #   only if block = 1
+    ix = cols.index(xvar)
+    il = cols.index(lvar)
+    iT = cols.index('T')
+    iy = [cols.index(var) for var in yvars]
+    lfit = statlmp.LinFit(len(iy), block=block)
+    lsum, nl = 0.0, 0
+    Tsum, nT = 0.0, 0
+    lrows = []
+    for (ik, rows) in blocks:
+        if ik == stages[0]:
+            lsum += numpy.sum(rows[:,il])
+            nl += len(rows)
+            if block == 1:
+                lrows.append(rows[:,il])
+        elif ik == stages[1]:
+            lfit.add(rows[:,ix], -rows[:,iy])
+            Tsum += numpy.sum(rows[:,iT])
+            nT += len(rows)
+    l0 = lsum/nl
+    l0err = 0.0
+    if lrows:
+        import corlmp
+        l0err = corlmp.block_se(numpy.concatenate(lrows))[0]
+    # Slope in strain = slope in xvar times reference length
+    b, a, se, g = lfit.fit()
+    return b*l0, se*l0, l0, l0err, Tsum/nT
+
+def fit_spec(dirC44, split, sub):
+    """ Variables of the stress/strain fit for the deformation strategy.
+
+        Return strain variable, reference length variable, stresses and factors to GPa."""
+    # Same deformation strategies as fitstr - x and xy for split n,
+    # x, y and yz subdirectories for split 3n
     if split == 'n':
-        coefs = numpy.polyfit(eta11, -p11, 1)
-        C11 = coefs[0]*1.0e-4
-        coefs = numpy.polyfit(eta11, -p12, 1)
-        C12 = coefs[0]*1.0e-4
-        coefs = numpy.polyfit(0.5*eta11, -p44, 1)
-        C44 = coefs[0]*1.0e-4
-        with open(path+'res_CsFit.txt','a+') as fr:
-            fr.write(str(T)+','+str(C11)+','+str(C12)+','+str(C44)+'\n')
+        # C44 from the shear stress against 0.5*eta11
+        return 'lx', 'lx', ['pxx', 'pyy', 'p'+dirC44], numpy.array([1.0e-4, 1.0e-4, 2.0e-4])
     elif split == '3n':
         if sub == 'x':
-            coefs = numpy.polyfit(eta11, -p11, 1)
-            C11 = coefs[0]*1.0e-4
-            with open(path+'res_CsFit.txt','a+') as fr:
-                fr.write(str(T)+','+str(C11)+',')  
+            return 'lx', 'lx', ['pxx'], numpy.array([1.0e-4])
         elif sub == 'y':
-            coefs = numpy.polyfit(eta12, -p11, 1)
-            C12 = coefs[0]*1.0e-4
-            with open(path+'res_CsFit.txt','a+') as fr:
-                fr.write(str(C12)+ ',') 
-        elif sub == dirC44:
-            coefs = numpy.polyfit(eta44, -p44, 1)
-            C44 = coefs[0]*1.0e-4
-            with open(path+'res_CsFit.txt','a+') as fr:
-                fr.write(str(C44)+'\n') 
+            return 'ly', 'ly', ['pxx'], numpy.array([1.0e-4])
+        elif sub == 'yz':
+            return 'yz', 'lz', ['pyz'], numpy.array([1.0e-4])
+
+def fitstr_log(thermo, path, dirC44, split, sub, pathd='', stages=(1, 2), save=True, db=None, prefix=None):
+    """ Obtain elastic constants from linear fit of stress/strain curve fused with log parsing. 
+
+        Return the result string and standard errors of the constants."""
+    # The whole stages[0] is used for the reference box size and the 
+    # whole stages[1] for the fit, see fit_spec for the deformations
+    # Constants are in GPa, result is saved to path/res_CsFit.txt 
+    # prefix - fit the block averages written by LAMMPS to 
+    #   pathd/<prefix>.<stage>.txt (runlmp.add_ave) instead of the log,
+    #   errors include the error of the reference length (method 
+    #   'fitave' in the result store)
+    xvar, lvar, yvars, fac = fit_spec(dirC44, split, sub)
+    if prefix is None:
+        blocks = iter_log(pathd + 'log.lammps', LogReader())
+        b, se, l0, l0err, T = fitrows(blocks, thermo, xvar, lvar, yvars, stages)
+        method, params = 'fitstr_log', {'stages': stages}
+    else:
+        blocks = [(ik, read_ave(pathd, ik, prefix, True)) for ik in stages]
+        b, se, l0, l0err, T = fitrows(blocks, ['Step'] + AVE_COLS, xvar, lvar, yvars, stages, 1)
+        method, params = 'fitave', {'stages': stages, 'prefix': prefix}
+    C = b*fac
+    err = fac*numpy.sqrt(se**2 + (b/l0*l0err)**2)
+    res = write_fit(path, pathd, T, C, split, sub, save, db, method, params)
+    return res, err
+
+# Block averages from the LAMMPS run
+#
+# runlmp.add_ave makes every run command write block averages of the
+# columns in AVE_COLS to <prefix>.<stage>.txt (fix ave/time), stages are
+# numbered as in the log. Each row is the mean of nrepeat samples, so 
+# the blocks only need to be averaged (aveav) or fitted (fitstr_log 
+# with prefix) here. Standard errors 
+# come from the block averages themselves - blocking is continued on 
+# the block averages until the error reaches its plateau (see 
+# corlmp.block_se), so blocks shorter than the correlation time are 
+# still handled correctly. Columns (AVE_COLS) are defined in runlmp
+# next to their LAMMPS expressions, corlmp (which imports avlmp) is 
+# imported where it is used.
+
+def read_ave(pathd, stage, prefix='ave', rows=False):
+    """ Block averages of stage from pathd/prefix.stage.txt.
+
+        Return time steps and dictionary of columns (AVE_COLS), or all rows with rows = True."""
+    data = numpy.loadtxt(pathd + prefix + '.' + str(stage) + '.txt', ndmin=2)
+    if rows:
+        return data
+    cols = {}
+    for jk in range(len(AVE_COLS)):
+        cols[AVE_COLS[jk]] = data[:,jk+1]
+    return data[:,0], cols
+
+def read_corr(pathd, stage, prefix='cor'):
+    """ Last autocorrelation functions in pathd/prefix.stage.txt (fix ave/correlate).
+
+        Return time lags and correlation functions of the shear stresses, one column each."""
+    # Each output is a line with the time step and number of lags
+    # followed by the rows of the lags
+    with open(pathd + prefix + '.' + str(stage) + '.txt', 'r') as fp:
+        lines = [line for line in fp if not line.startswith('#')]
+    block = []
+    ik = 0
+    while ik < len(lines):
+        nlag = int(lines[ik].split()[1])
+        block = lines[ik+1:ik+1+nlag]
+        ik += 1 + nlag
+    data = numpy.array([line.split() for line in block], dtype=float).reshape(len(block), -1)
+    return data[:,1], data[:,3:]
+
+def aveav(avars, pathd='', stages=(1, 2), prefix='ave', db=None):
+    """ Mean of the block averages of each stage in stages. 
+
+        Return the means and their standard errors."""
+    import corlmp
+    nd = len(avars)
+    avvar = numpy.zeros((len(stages), nd))
+    averr = numpy.zeros((len(stages), nd))
+    for ik in range(len(stages)):
+        step, data = read_ave(pathd, stages[ik], prefix)
+        temp = numpy.column_stack([data[var] for var in avars])
+        avvar[ik,:] = numpy.mean(temp, axis=0)
+        averr[ik,:] = corlmp.block_se(temp)
+    save_av(pathd, avars, avvar, db, 'aveav', {'stages': stages, 'prefix': prefix})
+    return avvar, averr
+
+# Strain fluctuation method
+#
+# In an NPT run with a fully flexible (triclinic) box the strain 
+# fluctuations give the compliance, C = kT/V <de de>^-1 in Voigt 
+# notation (Parrinello and Rahman), so one equilibrium run gives the 
+# whole 6x6 tensor. The strain is taken with respect to the mean box,
+# errors come from a jackknife over contiguous blocks of the run, so 
+# the blocks have to be longer than the correlation time of the box.
+# The method converges slowly - long runs and small systems help.
+
+# Boltzmann constant, GPa*A^3/K
+KB_GPA = 1.380649e-2
+
+def box_strain(h, h0):
+    """ Voigt strains (e11, e22, e33, 2e23, 2e13, 2e12) of boxes h (n,3,3) relative to h0. """
+    # Columns of h are the box vectors, Lagrangian strain 
+    # e = (h0^-T h^T h h0^-1 - I)/2
+    h0i = numpy.linalg.inv(h0)
+    e = 0.5*(numpy.einsum('ji,njk,kl->nil', h0i, numpy.einsum('nji,njk->nik', h, h), h0i) - numpy.eye(3))
+    return numpy.column_stack((e[:,0,0], e[:,1,1], e[:,2,2], 2.0*e[:,1,2], 2.0*e[:,0,2], 2.0*e[:,0,1]))
+
+def box_matrix(data, r0, r1):
+    """ Box matrices (columns are the box vectors) of rows r0:r1 of the thermo columns data. """
+    h = numpy.zeros((r1-r0, 3, 3))
+    h[:,0,0] = data['lx'][r0:r1]
+    h[:,1,1] = data['ly'][r0:r1]
+    h[:,2,2] = data['lz'][r0:r1]
+    h[:,0,1] = data['xy'][r0:r1]
+    h[:,0,2] = data['xz'][r0:r1]
+    h[:,1,2] = data['yz'][r0:r1]
+    return h
+
+def fluct_tensor(sums, T, V):
+    """ Elastic tensors (GPa) from the sums (count, sum of e, sum of e e^T) of strains. """
+    n, s1, s2 = sums
+    m = s1/n[...,None]
+    cov = s2/n[...,None,None] - m[...,:,None]*m[...,None,:]
+    return KB_GPA*T/V*numpy.linalg.inv(cov)
+
+def fluct(thermo, path, pathd='', stage=2, nblocks=16, save=True, db=None):
+    """ Elastic tensor from the box fluctuations of stage of an NPT run.
 
+        Return the result string (cubic C11, C12, C44), 6x6 tensor and its standard errors."""
+    # Strain sums are accumulated block by block (rows of each block at 
+    # once), the jackknife tensors leave out one block each
+    # Saves the result string to path/res_CsFit.txt, tensor and errors
+    # to pathd/fluct_res.txt
+    [data, logL] = imp_data(['T', 'lx', 'ly', 'lz', 'xy', 'xz', 'yz'], thermo, pathd)
+    r0, r1 = logL[stage], logL[stage+1]
+    h0 = numpy.mean(box_matrix(data, r0, r1), axis=0)
+    V = numpy.linalg.det(h0)
+    T = numpy.mean(data['T'][r0:r1])
+    bounds = numpy.linspace(r0, r1, nblocks+1).astype(int)
+    n = numpy.zeros(nblocks)
+    s1 = numpy.zeros((nblocks, 6))
+    s2 = numpy.zeros((nblocks, 6, 6))
+    for ik in range(nblocks):
+        e = box_strain(box_matrix(data, bounds[ik], bounds[ik+1]), h0)
+        n[ik] = len(e)
+        s1[ik] = numpy.sum(e, axis=0)
+        s2[ik] = numpy.dot(e.T, e)
+    C = fluct_tensor((numpy.sum(n), numpy.sum(s1, axis=0), numpy.sum(s2, axis=0)), T, V)
+    Cj = fluct_tensor((numpy.sum(n) - n, numpy.sum(s1, axis=0) - s1, numpy.sum(s2, axis=0) - s2), T, V)
+    se = numpy.sqrt((nblocks-1.0)/nblocks*numpy.sum((Cj - numpy.mean(Cj, axis=0))**2, axis=0))
+    # Cubic constants - averages of the equivalent elements
+    C11 = numpy.mean(numpy.diag(C)[:3])
+    C12 = numpy.mean([C[0,1], C[0,2], C[1,2], C[1,0], C[2,0], C[2,1]])
+    C44 = numpy.mean(numpy.diag(C)[3:])
+    params = {'stage': stage, 'nblocks': nblocks}
+    res = write_fit(path, pathd, T, [C11, C12, C44], 'n', None, save, db, 'fluct', params)
+    if save:
+        numpy.savetxt(pathd + 'fluct_res.txt', numpy.vstack((C, se)), 
+                      header='Elastic tensor (GPa, Voigt) and standard errors, T = ' + str(T))
+    if db is not None:
+        reslmp.put(db, pathd, 'fluct', params, ['C'+str(i)+str(j) for i in range(1, 7) for j in range(1, 7)],
+                   C.ravel(), 'tensor')
+    return res, C, se
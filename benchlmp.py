@@ -0,0 +1,117 @@
+#!/usr/bin/python
+
+# Benchmarks of the post-processing pipeline on synthetic logs:
+#   - Synthetic log.lammps files of given sizes (synlmp.py) with known
+#       elastic constants
+#   - Times log parsing, imp_data, each averaging method of avlmp,
+#       ellmp.cs, fitstr and fitstr_log (prflmp records)
+#   - Checks that the recovered C11, C12 and C44 match the planted
+#       values within a relative tolerance
+#
+# Usage: $ python benchlmp.py [rows ...]
+#   e.g. $ python benchlmp.py 10000 100000 1000000
+# Results are printed and written to bench_output.txt, timing records
+# are added to bench/prof.json and bench/prof.csv
+#
+# Notes:
+#   - Logs are kept in bench/rows_<n>/ and reused for the same size
+#       and seed, only the thermo cache is rebuilt
+#   - distav (Student t fit) is the slowest method, it is run only for
+#       logs with up to slow rows (all default sizes)
+#   - Averages of the full stages give the constants from the
+#       difference of the NVT and deformation stage (ellmp.cs), fits
+#       use the whole stages
+#
+# Last modified: October 18 2026
+#
+
+import os, sys, json, shutil
+import synlmp, avlmp, ellmp, prflmp
+
+THERMO = ['Step', 'T', 'p', 'ke', 'pe', 'pxx', 'pyy', 'pzz', 'pxy', 'pxz', 'pyz', 'lx', 'ly', 'lz', 'xy', 'xz', 'yz']
+AVARS = ['T', 'pxx', 'pyy', 'pzz', 'pxy', 'pxz', 'pyz', 'lx', 'ly', 'lz', 'xy', 'xz', 'yz']
+
+def case(pathd, nrows, seed=1, **kwargs):
+    """ Synthetic log in pathd with nrows rows, reused if it exists. Return the planted values. """
+    fname = pathd + 'synthetic.json'
+    if os.path.isfile(fname):
+        with open(fname, 'r') as fp:
+            info = json.load(fp)
+        if info.get('seed') == seed and info.get('nrows') == nrows:
+            return info
+    if not os.path.isdir(pathd):
+        os.makedirs(pathd)
+    info = synlmp.write_log(pathd + 'log.lammps', nrows, seed=seed, **kwargs)
+    info['seed'] = seed
+    info['nrows'] = nrows
+    with open(fname, 'w') as fp:
+        json.dump(info, fp)
+    return info
+
+def check(res, info, tol):
+    """ Relative errors of the constants in result string res and whether all are within tol. """
+    vals = [float(x) for x in res.strip().split(',')]
+    err = [abs(vals[jk+1]/info[key] - 1.0) for jk, key in enumerate(['C11', 'C12', 'C44'])]
+    return err, max(err) < tol
+
+def bench_case(pathd, info, window=1000.0, tol=0.02, methods=('simpav', 'moveav', 'distav')):
+    """ Time all stages for the log in pathd. Return prflmp records with errors of the constants. """
+    recs = []
+    # Parsing from scratch
+    if os.path.isdir(pathd + 'thermo_cache'):
+        shutil.rmtree(pathd + 'thermo_cache')
+    if os.path.isfile(pathd + 'av_res.txt'):
+        os.remove(pathd + 'av_res.txt')
+    recs.append(prflmp.timed(avlmp.save_log, 'parse', pathd, pathd)[1])
+    recs.append(prflmp.timed(avlmp.imp_data, 'imp_data', pathd, AVARS, THERMO, pathd)[1])
+    # Averages of the stages and the constants from the last two stages
+    for method in methods:
+        if method == 'moveav':
+            args = (AVARS, THERMO, window, pathd)
+        else:
+            args = (AVARS, THERMO, pathd)
+        recs.append(prflmp.timed(getattr(avlmp, method), method, pathd, *args)[1])
+        res, rec = prflmp.timed(ellmp.cs, 'cs/' + method, pathd, AVARS, 2, '', '', pathd, 'n', False)
+        rec['err'], rec['ok'] = check(res, info, tol)
+        recs.append(rec)
+    # Fits of the whole stages
+    s1, s2 = info['stage1'], info['stage2']
+    res, rec = prflmp.timed(avlmp.fitstr, 'fitstr', pathd, AVARS, THERMO, '', s1[0], s1[1]+1, s2[0], s2[1]+1,
+                            'xy', 'n', None, pathd, False)
+    rec['err'], rec['ok'] = check(res, info, tol)
+    recs.append(rec)
+    # Log parsing fused with the fit, cache not used
+    res, rec = prflmp.timed(avlmp.fitstr_log, 'fitstr_log', pathd, THERMO, '', 'xy', 'n', None, pathd, (1, 2), False)
+    rec['err'], rec['ok'] = check(res[0], info, tol)
+    recs.append(rec)
+    return recs
+
+def bench(path, sizes=(10000, 100000, 1000000), seed=1, window=1000.0, tol=0.02, slow=1000000, out='bench_output.txt'):
+    """ Benchmark all stages for synthetic logs with sizes rows in path. Return the prflmp records. """
+    recs = []
+    lines = ['%10s %-14s %9s %9s %9s %12s %8s %8s %8s %5s' %
+             ('rows', 'stage', 'wall,s', 'cpu,s', 'rss,MB', 'rows/s', 'C11', 'C12', 'C44', 'ok')]
+    for n in sizes:
+        pathd = path + 'rows_' + str(n) + '/'
+        info = case(pathd, n, seed)
+        methods = ('simpav', 'moveav', 'distav') if n <= slow else ('simpav', 'moveav')
+        for rec in bench_case(pathd, info, window, tol, methods):
+            rate = info['rows']/rec['wall'] if rec['wall'] > 0 else 0.0
+            err = ['%8.4f' % e for e in rec.get('err', [])] or ['%8s' % '-']*3
+            ok = {True: 'yes', False: 'NO'}.get(rec.get('ok'), '-')
+            lines.append('%10d %-14s %9.3f %9.3f %9.1f %12.0f %s %5s' %
+                         (info['rows'], rec['stage'], rec['wall'], rec['cpu'], rec['rss'], rate, ' '.join(err), ok))
+            rec['nrows'] = info['rows']
+            recs.append(rec)
+    lines.append('Relative errors of the constants, tolerance ' + str(tol))
+    text = '\n'.join(lines) + '\n'
+    print(text)
+    with open(out, 'w') as fp:
+        fp.write(text)
+    prflmp.save_report(path, [dict((key, rec[key]) for key in prflmp.FIELDS) for rec in recs])
+    return recs
+
+if __name__ == '__main__':
+    sizes = [int(x) for x in sys.argv[1:]] or [10000, 100000, 1000000]
+    recs = bench('bench/', sizes)
+    sys.exit(0 if all(rec.get('ok', True) for rec in recs) else 1)
@@ -0,0 +1,79 @@
+#!/usr/bin/python
+
+# Content addressed store of immutable input files for lammps runs:
+#   - Input files (potential, data, modules) are stored once per results
+#       directory, named by their SHA1 checksum
+#   - Run directories reference the stored files through hardlinks
+#       (symlinks if hardlinks are not possible)
+#   - Stored and linked files are verified against their checksums
+#
+# Notes:
+#   - The manifest (inputs.json) maps file names to checksums
+#   - Stored files are read-only, only the rendered init.mod, in. and
+#       executable scripts (runlmp.SCRIPTS) are written per run
+#
+# Last modified: October 18 2026
+#
+
+import os, json, shutil, stat
+import reglmp
+
+def put(storedir, fname):
+    """ Add file fname to the store in storedir, return its key (checksum). """
+    key = reglmp.checksum(fname)
+    obj = storedir + key
+    if not os.path.isfile(obj):
+        tmp = obj + '.tmp'
+        shutil.copyfile(fname, tmp)
+        os.chmod(tmp, stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH)
+        os.rename(tmp, obj)
+    return key
+
+def make_store(storedir, files, manifest):
+    """ Store files in storedir and save their names and keys to manifest.
+
+        Return the name to key dictionary."""
+    if not os.path.isdir(storedir):
+        os.makedirs(storedir)
+    keys = {}
+    for fname in files:
+        keys[os.path.basename(fname)] = put(storedir, fname)
+    with open(manifest, 'w') as fp:
+        json.dump(keys, fp, indent=1, sort_keys=True)
+    return keys
+
+def load_manifest(manifest):
+    """ Load name to key dictionary from manifest. """
+    with open(manifest, 'r') as fp:
+        return json.load(fp)
+
+def link(storedir, keys, pathd):
+    """ Link stored files with names and keys in keys into directory pathd. """
+    for name in keys:
+        obj = storedir + keys[name]
+        dest = pathd + name
+        if os.path.lexists(dest):
+            os.remove(dest)
+        try:
+            os.link(obj, dest)
+        except OSError:
+            # e.g. different file system
+            os.symlink(os.path.abspath(obj), dest)
+
+def verify(storedir, keys, pathd=None):
+    """ Check stored files (or files linked in pathd) against their keys.
+
+        Return list of missing, stale or modified files."""
+    bad = []
+    for name in keys:
+        if pathd is None:
+            fname = storedir + keys[name]
+        else:
+            fname = pathd + name
+        if reglmp.checksum(fname) != keys[name]:
+            bad.append(fname)
+    return bad
+
+def is_shared(fname):
+    """ True if fname is a link to a stored file. """
+    return os.path.islink(fname) or os.stat(fname).st_nlink > 1
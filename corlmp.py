@@ -0,0 +1,149 @@
+#!/usr/bin/python
+
+# Correlation analysis module for lammps thermo data:
+#   - Autocorrelation functions and integrated autocorrelation times
+#   - Block averaging (Flyvbjerg-Petersen) error estimates
+#   - Effective sample sizes and run lengths needed for a target
+#       error of the elastic constants
+#
+# Notes:
+#   - All functions work on all columns of a 2D array at once
+#   - Integrated autocorrelation time follows Sokal's convention,
+#       tau = 1/2 + sum of the normalized autocorrelation function,
+#       statistical inefficiency is 2*tau and effective sample size
+#       is n/(2*tau)
+#
+# Last modified: October 18 2026
+#
+
+import numpy
+import avlmp
+
+def acf(x):
+    """ Normalized autocorrelation function of each column of x. """
+    # FFT with zero padding, biased (1/n) estimator
+    x = numpy.asarray(x, dtype=float)
+    if x.ndim == 1:
+        x = x[:,None]
+    n = len(x)
+    nfft = 1
+    while nfft < 2*n:
+        nfft *= 2
+    xc = x - numpy.mean(x, axis=0)
+    f = numpy.fft.rfft(xc, nfft, axis=0)
+    r = numpy.fft.irfft(f*numpy.conj(f), nfft, axis=0)[:n]
+    # Constant columns are uncorrelated
+    var = numpy.where(r[0] > 0.0, r[0], 1.0)
+    r = r/var
+    r[0] = 1.0
+    return r
+
+def tau_int(x, c=5.0):
+    """ Integrated autocorrelation time of each column of x.
+
+        Return autocorrelation times and summation windows."""
+    # Automatic windowing (Sokal) - the sum is cut at the smallest
+    # window M with M >= c*tau(M)
+    rho = acf(x)
+    n = len(rho)
+    if n < 2:
+        return 0.5*numpy.ones(rho.shape[1]), numpy.zeros(rho.shape[1], dtype=int)
+    tau = 0.5 + numpy.cumsum(rho[1:], axis=0)
+    M = numpy.arange(1, n)[:,None]
+    cond = M >= c*tau
+    # Columns without a suitable window use the full sum
+    win = numpy.where(numpy.any(cond, axis=0), numpy.argmax(cond, axis=0), n-2)
+    tau = tau[win, numpy.arange(tau.shape[1])]
+    return numpy.maximum(tau, 0.5), win+1
+
+def block_curve(x, minblocks=4):
+    """ Block averaging (Flyvbjerg-Petersen) of each column of x.
+
+        Return standard errors of the mean, their errors and numbers of blocks at each level."""
+    # Neighbouring blocks are averaged at each level until less than
+    # minblocks remain, rows are (level, column)
+    x = numpy.asarray(x, dtype=float)
+    if x.ndim == 1:
+        x = x[:,None]
+    se, err, nblocks = [], [], []
+    while len(x) >= minblocks:
+        nk = len(x)
+        s = numpy.sqrt(numpy.var(x, axis=0)/(nk-1.0))
+        se.append(s)
+        err.append(s/numpy.sqrt(2.0*(nk-1.0)))
+        nblocks.append(nk)
+        m = nk//2
+        x = 0.5*(x[0:2*m:2] + x[1:2*m:2])
+    return numpy.array(se), numpy.array(err), numpy.array(nblocks)
+
+def block_se(x, minblocks=4):
+    """ Standard error of the mean of each column of x from the block averaging plateau. """
+    # Plateau - first level after which the error does not grow by more
+    # than its own uncertainty, last level if the curve keeps growing
+    se, err, nblocks = block_curve(x, minblocks)
+    if len(se) == 0:
+        return numpy.nan*numpy.ones(numpy.shape(x)[1:] or (1,))
+    grow = se[1:] - se[:-1] > err[:-1]
+    flat = ~grow
+    level = numpy.where(numpy.any(flat, axis=0), numpy.argmax(flat, axis=0), len(se)-1)
+    return se[level, numpy.arange(se.shape[1])]
+
+def neff(x, c=5.0):
+    """ Effective number of independent samples in each column of x. """
+    tau, win = tau_int(x, c)
+    return len(x)/(2.0*tau)
+
+def stat_stages(avars, thermo, pathd=''):
+    """ Correlation analysis of variables in avars for each simulation stage in pathd.
+
+        Return autocorrelation times, effective sample sizes and block standard errors, rows are stages."""
+    # Uses the thermo cache of pathd, see avlmp.imp_data
+    [data, logL] = avlmp.imp_data(avars, thermo, pathd)
+    nd = len(avars)
+    nl = len(logL)
+    tau = numpy.zeros((nl-1, nd))
+    ness = numpy.zeros((nl-1, nd))
+    se = numpy.zeros((nl-1, nd))
+    for ik in range(nl-1):
+        t0 = logL[ik]
+        tf = logL[ik+1]
+        temp = numpy.column_stack([data[avars[jk]][t0:tf] for jk in range(nd)])
+        tau[ik,:] = tau_int(temp)[0]
+        ness[ik,:] = len(temp)/(2.0*tau[ik,:])
+        se[ik,:] = block_se(temp)
+    return tau, ness, se
+
+def run_length(thermo, target, dirC44, split, sub, pathd='', stages=(1, 2)):
+    """ Number of deformation steps needed for standard error target (GPa) of each elastic constant.
+
+        Return required steps and current standard errors."""
+    # At a fixed strain rate the strain range grows with the run length,
+    # so the standard error of a fitted slope decreases as steps^(-3/2)
+    # with correlated noise, required steps = steps*(se/target)^(2/3)
+    res, err = avlmp.fitstr_log(thermo, '', dirC44, split, sub, pathd, stages, False)
+    # Current length of the deformation stage in steps
+    meta = avlmp.cache_log(pathd)
+    step = meta['header'][thermo.index('Step')]
+    data, logL = avlmp.load_cols(pathd, [step])
+    step = data[step][logL[stages[1]]:logL[stages[1]+1]]
+    nsteps = step[-1] - step[0]
+    return nsteps*(err/target)**(2.0/3.0), err
+
+def stat_report(avars, thermo, target, dirC44, split, sub, pathd='', stages=(1, 2)):
+    """ Save correlation analysis of pathd to stat_res.txt. """
+    # For each stage and variable: integrated autocorrelation time (rows),
+    # effective sample size and block averaging standard error of the mean,
+    # followed by the current standard errors and required deformation
+    # steps for the elastic constants
+    tau, ness, se = stat_stages(avars, thermo, pathd)
+    req, err = run_length(thermo, target, dirC44, split, sub, pathd, stages)
+    hstr = ' '*30
+    with open(pathd + 'stat_res.txt', 'w') as resfile:
+        resfile.write('# tau_int\n' + hstr.join(avars) + '\n')
+        numpy.savetxt(resfile, tau)
+        resfile.write('# effective sample size\n' + hstr.join(avars) + '\n')
+        numpy.savetxt(resfile, ness)
+        resfile.write('# block standard error\n' + hstr.join(avars) + '\n')
+        numpy.savetxt(resfile, se)
+        resfile.write('# elastic constants standard error [GPa] and steps for target ' + str(target) + ' GPa\n')
+        numpy.savetxt(resfile, numpy.vstack((err, req)))
@@ -0,0 +1,262 @@
+#!/usr/bin/python
+
+# Stage graph module - incremental post-processing of lammps runs:
+#   - Each stage of a work unit (log parsing, averaging, elastic
+#       constants, properties, plots) is a node of a graph
+#   - Node results are cached as artifacts keyed by a hash of the
+#       function, its arguments, checksums of its input files and the
+#       keys of the nodes it depends on
+#   - Only nodes without an artifact for their current key are run,
+#       independent nodes on a pool of worker processes (parlmp)
+#
+# Notes:
+#   - Artifacts are pickled results in pathR/dag/<key>.pkl, the state
+#       of every node (key, status, time) is saved to pathR/dag/nodes.json
+#   - A changed argument (e.g. the averaging window) changes the keys
+#       of that node and of all nodes depending on it, the log parsing
+#       is not repeated
+#   - Nodes with missing input files, or with a log.lammps of a run
+#       that did not finish, wait together with all nodes depending on
+#       them - run the graph again once the jobs are done
+#   - Nodes writing shared files or plotting run in the calling process
+#       (serial = True), vislmp (matplotlib) is imported only by plot nodes
+#   - Averages are kept only as artifacts, av_res.txt is not written
+#   - Output files of a node (outputs) are recorded with the node key
+#       and their checksum in pathR/dag/outputs.json, a node whose files
+#       are missing, were written for another key or were modified is
+#       run again from the cached results of its dependencies
+#
+# Last modified: October 18 2026
+#
+
+import os, json, time, pickle, hashlib
+import avlmp, ellmp, parlmp, reglmp
+
+class Node:
+    """ Stage func(*args) of the graph. """
+    def __init__(self, name, func, args=(), deps=(), files=(), serial=False, gather=False, outputs=()):
+        # name - unique name, e.g. 'log:T_300/x'
+        # deps - names of the nodes that have to run first
+        # files - input files, their checksums are part of the key
+        # gather - pass the list of results of deps as the last argument
+        # outputs - files written by the node
+        self.name = name
+        self.func = func
+        self.args = tuple(args)
+        self.deps = list(deps)
+        self.files = list(files)
+        self.outputs = list(outputs)
+        self.serial = serial
+        self.gather = gather
+
+def node_key(node, dkeys):
+    """ Hash of the function, arguments, input file checksums and dependency keys dkeys of node. """
+    sums = []
+    for fname in node.files:
+        if fname.endswith('log.lammps') and not reglmp.is_complete(fname):
+            return None
+        sums.append(reglmp.checksum(fname))
+    if None in sums or None in dkeys:
+        return None
+    spec = [node.func.__module__ + '.' + node.func.__name__, node.args, sums, dkeys]
+    return hashlib.sha1(json.dumps(spec, default=str, sort_keys=True).encode()).hexdigest()
+
+def order(nodes):
+    """ Nodes sorted so that every node follows its dependencies. """
+    byname = dict((node.name, node) for node in nodes)
+    done = set()
+    res = []
+    def visit(name, stack):
+        if name in done:
+            return
+        if name in stack:
+            raise ValueError('Cycle in the stage graph at ' + name)
+        for dep in byname[name].deps:
+            visit(dep, stack + [name])
+        done.add(name)
+        res.append(byname[name])
+    for node in nodes:
+        visit(node.name, [])
+    return res
+
+def _call(func, args):
+    """ Run func(*args) in a worker. """
+    return func(*args)
+
+def load(pathR, key):
+    """ Cached result with key in pathR/dag/. """
+    with open(pathR + 'dag/' + key + '.pkl', 'rb') as fp:
+        return pickle.load(fp)
+
+def store(pathR, key, result):
+    """ Cache result with key in pathR/dag/. """
+    fname = pathR + 'dag/' + key + '.pkl'
+    with open(fname + '.tmp', 'wb') as fp:
+        pickle.dump(result, fp)
+    os.rename(fname + '.tmp', fname)
+
+def load_outputs(pathR):
+    """ Node keys and checksums of the output files recorded in pathR/dag/outputs.json. """
+    fname = pathR + 'dag/outputs.json'
+    if not os.path.isfile(fname):
+        return {}
+    with open(fname, 'r') as fp:
+        return json.load(fp)
+
+def save_outputs(pathR, outputs):
+    """ Save the output file records to pathR/dag/outputs.json. """
+    with open(pathR + 'dag/outputs.json', 'w') as fp:
+        json.dump(outputs, fp, indent=1, sort_keys=True)
+
+def current(node, key, outputs):
+    """ True if all output files of node were written for key and not modified since. """
+    for fname in node.outputs:
+        rec = outputs.get(fname)
+        if rec is None or rec['key'] != key or reglmp.checksum(fname) != rec['sum']:
+            return False
+    return True
+
+def run(nodes, pathR, nproc=None):
+    """ Run the stale nodes of the graph, artifacts are kept in pathR/dag/.
+
+        Return dictionary of node names and status (cached, done, waiting)."""
+    if not os.path.isdir(pathR + 'dag/'):
+        os.makedirs(pathR + 'dag/')
+    nodes = order(nodes)
+    keys = {}
+    for node in nodes:
+        keys[node.name] = node_key(node, [keys[dep] for dep in node.deps])
+    outputs = load_outputs(pathR)
+    status = {}
+    for node in nodes:
+        if keys[node.name] is None:
+            status[node.name] = 'waiting'
+        elif os.path.isfile(pathR + 'dag/' + keys[node.name] + '.pkl') and current(node, keys[node.name], outputs):
+            status[node.name] = 'cached'
+        else:
+            status[node.name] = 'stale'
+    # Waves of stale nodes whose dependencies are all available, the
+    # state is saved also when a node fails
+    results = {}
+    try:
+        while True:
+            wave = [node for node in nodes if status[node.name] == 'stale'
+                    and all(status[dep] in ('cached', 'done') for dep in node.deps)]
+            if not wave:
+                break
+            args = []
+            for node in wave:
+                arg = node.args
+                if node.gather:
+                    arg = arg + ([get(pathR, keys[dep], results) for dep in node.deps],)
+                args.append(arg)
+            par = [ik for ik in range(len(wave)) if not wave[ik].serial]
+            res = parlmp.run_units(_call, [(wave[ik].func, args[ik]) for ik in par], nproc)
+            for ik, r in zip(par, res):
+                results[keys[wave[ik].name]] = r
+            for ik in range(len(wave)):
+                if wave[ik].serial:
+                    results[keys[wave[ik].name]] = wave[ik].func(*args[ik])
+            for node in wave:
+                store(pathR, keys[node.name], results[keys[node.name]])
+                for fname in node.outputs:
+                    outputs[fname] = {'key': keys[node.name], 'sum': reglmp.checksum(fname)}
+                status[node.name] = 'done'
+    finally:
+        save_outputs(pathR, outputs)
+        save_state(pathR, keys, status)
+    return status
+
+def get(pathR, key, results):
+    """ Result with key from this run or from the cache. """
+    if key in results:
+        return results[key]
+    return load(pathR, key)
+
+def save_state(pathR, keys, status):
+    """ Record key, status and time of every node in pathR/dag/nodes.json. """
+    fname = pathR + 'dag/nodes.json'
+    state = {}
+    if os.path.isfile(fname):
+        with open(fname, 'r') as fp:
+            state = json.load(fp)
+    now = time.time()
+    for name in keys:
+        if status[name] == 'done' or name not in state:
+            state[name] = {'key': keys[name], 'status': status[name], 'time': now}
+        else:
+            state[name]['key'] = keys[name]
+            state[name]['status'] = status[name]
+    with open(fname, 'w') as fp:
+        json.dump(state, fp, indent=1, sort_keys=True)
+
+def write_res(fname, results):
+    """ Write result strings of the work units to fname (replaces the old results). """
+    with open(fname, 'w') as fr:
+        fr.write(''.join(results))
+    return fname
+
+def elastic_graph(pathR, T, split, avars, thermo, method, dirC44, nsteps=1, window=None,
+                  times=None, avmethod='box', statics=None, plot=True):
+    """ Stage graph from the thermo logs of pathR to the elastic constants, properties and plots. """
+    # method - 'moveav', 'distav', 'simpav' (averages, then ellmp.cs to
+    #   res_Cs.txt), 'fitstr', 'fitstr_log' or 'fitave' (res_CsFit.txt)
+    # window, avmethod - moving average window (time steps) and method
+    # times - (t00, t0, tf0, tf) for fitstr
+    nodes = []
+    work = parlmp.units(pathR, T, split)
+    fit = method in ('fitstr', 'fitstr_log', 'fitave')
+    resfile = 'res_CsFit.txt' if fit else 'res_Cs.txt'
+    last = []
+    for Ti in T:
+        # Averaging nodes return the averages of all stages, the cs node
+        # gets them in the order of the subdirectories (x, y, yz)
+        avn = []
+        for (Tj, sub, pathd) in work:
+            if Tj != Ti:
+                continue
+            unit = pathd[len(pathR):]
+            logn = 'log:' + unit
+            nodes.append(Node(logn, avlmp.save_log, (pathd,), files=[pathd + 'log.lammps']))
+            avname = method + ':' + unit
+            if method == 'moveav':
+                nodes.append(Node(avname, avlmp.moveav, (avars, thermo, window, pathd, avmethod, None, False), [logn]))
+            elif method == 'simpav':
+                nodes.append(Node(avname, avlmp.simpav, (avars, thermo, pathd, None, False), [logn]))
+            elif method == 'distav':
+                nodes.append(Node(avname, _first, (avlmp.distav, avars, thermo, pathd, None, False), [logn]))
+            elif method == 'fitstr':
+                t00, t0, tf0, tf = times
+                nodes.append(Node(avname, avlmp.fitstr, (avars, thermo, pathR, t00, t0, tf0, tf,
+                                  dirC44, split, sub, pathd, False), [logn]))
+            elif method == 'fitstr_log':
+                nodes.append(Node(avname, _first, (avlmp.fitstr_log, thermo, pathR, dirC44, split, sub,
+                                  pathd, (1, 2), False), files=[pathd + 'log.lammps']))
+            elif method == 'fitave':
+                nodes.append(Node(avname, _first, (avlmp.fitstr_log, thermo, pathR, dirC44, split, sub,
+                                  pathd, (1, 2), False, None, 'ave'), files=[pathd + 'log.lammps']))
+            avn.append(avname)
+        if fit:
+            last += avn
+        else:
+            # Elastic constants from the averages of all subdirectories
+            csn = 'cs:T_' + Ti
+            nodes.append(Node(csn, ellmp.cs, (avars, nsteps, Ti, pathR, pathR + 'T_' + Ti + '/', split, False,
+                              None, method), avn, gather=True))
+            last.append(csn)
+    nodes.append(Node('res:' + resfile, write_res, (pathR + resfile,), last, serial=True, gather=True,
+                      outputs=[pathR + resfile]))
+    nodes.append(Node('elprops:' + resfile, ellmp.elprops, (pathR, resfile), ['res:' + resfile], serial=True,
+                      outputs=[pathR + 'res_props.txt']))
+    if plot:
+        nodes.append(Node('plot:' + resfile, plot_cs, (pathR, resfile, statics), ['res:' + resfile], serial=True))
+    return nodes
+
+def _first(func, *args):
+    """ First returned value of func(*args) (result string of fitstr_log, means of distav). """
+    return func(*args)[0]
+
+def plot_cs(path, filename, statics=None):
+    """ Plot the elastic constants of path/filename (vislmp.vis_cs). """
+    import vislmp
+    return vislmp.vis_cs(path, filename, statics)
@@ -1,10 +1,16 @@
 #!/usr/bin/python
 
 # Delete running cluster jobs
-# First run $ qstat | grep your_onid > jobs.out
-# then run this script
-# Last modified: May 28 2015
-import subprocess
+# Either run $ qstat | grep your_onid > jobs.out
+# then run this script, or give the results directory with
+# a run registry: $ del_jobs.py RES_2015-05-08/
+# to delete all submitted jobs recorded there (see reglmp.py)
+# Last modified: October 18 2026
+import subprocess, sys
+if len(sys.argv) > 1:
+    import reglmp
+    reglmp.cancel(sys.argv[1] + '/runs.db')
+    sys.exit()
 with open("jobs.out", 'r') as fp:
     lines = fp.readlines()
     for line in lines:
@@ -0,0 +1,351 @@
+#!/usr/bin/python
+
+# EAM/alloy module - static (0 K) calculations without LAMMPS:
+#   - Reads setfl potential files (pair_style eam/alloy) into cubic
+#       spline tables, same interpolation as LAMMPS
+#   - Builds periodic cells from LAMMPS data files (e.g. data.Ni-unit),
+#       random alloys by random assignment of atom types
+#   - Neighbor lists with a cell list over periodic images
+#   - Energy, forces and virial stress of the whole cell at once
+#   - 0 K elastic constants from finite strains of the relaxed cell
+#
+# Notes:
+#   - metal units - eV, Angstrom, stress in GPa (not bar)
+#   - Stress follows LAMMPS pressure sign convention, positive is
+#       compressive, elastic constants are C = -dP/de
+#   - Cell rows are the lattice vectors, positions are cartesian
+#   - Atom types are 1-based as in the data file and map to the
+#       elements of the potential in pair_coeff order
+#
+# Last modified: October 18 2026
+#
+
+import os, numpy
+import scipy.optimize
+
+# eV/A^3 to GPa
+EV_GPA = 160.21766208
+
+# Parsed potentials, keyed by file path, size and modification time
+_cache = {}
+
+def spline(f, delta):
+    """ Cubic spline coefficients of values f tabulated with spacing delta.
+
+        Return (n,7) array, columns 0-2 derivative and 3-6 value coefficients."""
+    # Same construction as PairEAM::interpolate in LAMMPS
+    n = len(f)
+    c = numpy.zeros((n, 7))
+    c[:,6] = f
+    # r = 0 entries can be INF or NAN, they are never used
+    if not numpy.isfinite(f[0]):
+        c[0,6] = f[1]
+    c[0,5] = c[1,6] - c[0,6]
+    c[1,5] = 0.5*(c[2,6] - c[0,6])
+    c[n-2,5] = 0.5*(c[n-1,6] - c[n-3,6])
+    c[n-1,5] = c[n-1,6] - c[n-2,6]
+    c[2:n-2,5] = ((c[0:n-4,6] - c[4:n,6]) + 8.0*(c[3:n-1,6] - c[1:n-3,6]))/12.0
+    c[:n-1,4] = 3.0*(c[1:,6] - c[:n-1,6]) - 2.0*c[:n-1,5] - c[1:,5]
+    c[:n-1,3] = c[:n-1,5] + c[1:,5] - 2.0*(c[1:,6] - c[:n-1,6])
+    c[:,2] = c[:,5]/delta
+    c[:,1] = 2.0*c[:,4]/delta
+    c[:,0] = 3.0*c[:,3]/delta
+    return c
+
+def splev(c, x, delta):
+    """ Values and derivatives of spline tables c at x, c can have leading dimensions indexed by x. """
+    # c - (n,7) table or (k,n,7) tables, then x is a pair (table index, x)
+    if isinstance(x, tuple):
+        it, x = x
+        n = c.shape[1]
+    else:
+        it = None
+        n = c.shape[0]
+    p = x/delta
+    m = numpy.clip(p.astype(int), 0, n-2)
+    p = numpy.clip(p - m, 0.0, 1.0)
+    if it is None:
+        cm = c[m]
+    else:
+        cm = c[it, m]
+    val = ((cm[...,3]*p + cm[...,4])*p + cm[...,5])*p + cm[...,6]
+    der = (cm[...,0]*p + cm[...,1])*p + cm[...,2]
+    return val, der
+
+class Potential:
+    """ EAM/alloy potential from a setfl file. """
+    def __init__(self, fname):
+        with open(fname, 'r') as fp:
+            lines = fp.readlines()
+        # Three comment lines, elements, tabulation, then for each element
+        # a line with mass and the F(rho) and rho(r) tables, followed by
+        # the r*phi(r) tables of all element pairs i >= j
+        words = lines[3].split()
+        nel = int(words[0])
+        self.elements = words[1:nel+1]
+        words = lines[4].split()
+        self.nrho, self.drho = int(words[0]), float(words[1])
+        self.nr, self.dr = int(words[2]), float(words[3])
+        self.cutoff = float(words[4])
+        # Remaining numbers in one array, element header lines are
+        # read separately
+        self.masses = []
+        F = numpy.zeros((nel, self.nrho))
+        rho = numpy.zeros((nel, self.nr))
+        z2r = numpy.zeros((nel, nel, self.nr))
+        k = 5
+        for iel in range(nel):
+            self.masses.append(float(lines[k].split()[1]))
+            k += 1
+            vals, k = self.read_values(lines, k, self.nrho + self.nr)
+            F[iel] = vals[:self.nrho]
+            rho[iel] = vals[self.nrho:]
+        vals, k = self.read_values(lines, k, nel*(nel+1)//2*self.nr)
+        vals = vals.reshape(-1, self.nr)
+        ip = 0
+        for iel in range(nel):
+            for jel in range(iel+1):
+                z2r[iel,jel] = vals[ip]
+                z2r[jel,iel] = vals[ip]
+                ip += 1
+        self.F = numpy.array([spline(F[iel], self.drho) for iel in range(nel)])
+        self.rho = numpy.array([spline(rho[iel], self.dr) for iel in range(nel)])
+        self.z2r = numpy.array([spline(z2r[iel,jel], self.dr)
+                                for iel in range(nel) for jel in range(nel)]).reshape(nel, nel, self.nr, 7)
+        self.nel = nel
+
+    def read_values(self, lines, k, n):
+        """ Read n numbers starting at line k, return them and the next line. """
+        vals = []
+        while len(vals) < n:
+            vals.extend(lines[k].split())
+            k += 1
+        return numpy.array(vals[:n], dtype=float), k
+
+def load_potential(fname):
+    """ Potential from setfl file fname, parsed only once per file version. """
+    st = os.stat(fname)
+    key = (os.path.abspath(fname), st.st_size, st.st_mtime)
+    if key not in _cache:
+        _cache[key] = Potential(fname)
+    return _cache[key]
+
+def read_data(fname):
+    """ Cell, positions and atom types from LAMMPS data file fname. """
+    with open(fname, 'r') as fp:
+        lines = [line.split('#')[0].split() for line in fp]
+    lo = numpy.zeros(3)
+    hi = numpy.zeros(3)
+    tilt = numpy.zeros(3)
+    pos, types = [], []
+    for ik, words in enumerate(lines):
+        if len(words) == 4 and words[2] in ('xlo', 'ylo', 'zlo'):
+            jk = ('xlo', 'ylo', 'zlo').index(words[2])
+            lo[jk], hi[jk] = float(words[0]), float(words[1])
+        elif len(words) == 6 and words[3] == 'xy':
+            tilt = numpy.array(words[:3], dtype=float)
+        elif words == ['Atoms']:
+            for words in lines[ik+1:]:
+                if not words:
+                    if pos:
+                        break
+                    continue
+                types.append(int(words[1]))
+                pos.append([float(x) for x in words[2:5]])
+    L = hi - lo
+    cell = numpy.array([[L[0], 0.0, 0.0], [tilt[0], L[1], 0.0], [tilt[1], tilt[2], L[2]]])
+    return cell, numpy.array(pos) - lo, numpy.array(types)
+
+def replicate(cell, pos, types, n):
+    """ Replicate the cell n times in each direction (n can be a triple). """
+    n = numpy.broadcast_to(n, 3).astype(int)
+    shifts = numpy.array([[i, j, k] for i in range(n[0]) for j in range(n[1]) for k in range(n[2])])
+    pos = (pos[None,:,:] + numpy.dot(shifts, cell)[:,None,:]).reshape(-1, 3)
+    return cell*n[:,None], pos, numpy.tile(types, len(shifts))
+
+def random_alloy(types, fractions, seed=None):
+    """ Random assignment of atom types with fractions {type: fraction}, e.g. {2: 0.8, 3: 0.2}. """
+    rng = numpy.random.RandomState(seed)
+    n = len(types)
+    new = numpy.empty(n, dtype=int)
+    start = 0
+    keys = sorted(fractions)
+    for ik, key in enumerate(keys):
+        # Last type takes the rounding remainder
+        nk = n - start if ik == len(keys)-1 else int(round(fractions[key]*n))
+        new[start:start+nk] = key
+        start += nk
+    return new[rng.permutation(n)]
+
+def neighbors(cell, pos, rc):
+    """ Full neighbor list within rc of periodic cell.
+
+        Return indices i, j of all pairs, vectors r_i - r_j and distances."""
+    # Periodic images within rc of the cell are added as ghost atoms,
+    # pairs are searched in a cell list with bins of size >= rc
+    n = len(pos)
+    inv = numpy.linalg.inv(cell)
+    frac = numpy.dot(pos, inv) % 1.0
+    pos = numpy.dot(frac, cell)
+    # Distances between opposite faces of the cell
+    vol = abs(numpy.linalg.det(cell))
+    dface = vol/numpy.linalg.norm(numpy.cross(cell[[1,2,0]], cell[[2,0,1]]), axis=1)
+    nim = numpy.ceil(rc/dface).astype(int)
+    shifts = numpy.array([[i, j, k] for i in range(-nim[0], nim[0]+1)
+                          for j in range(-nim[1], nim[1]+1) for k in range(-nim[2], nim[2]+1)])
+    gfrac = (frac[None,:,:] + shifts[:,None,:]).reshape(-1, 3)
+    gind = numpy.tile(numpy.arange(n), len(shifts))
+    # Only images within rc of the cell
+    keep = numpy.all((gfrac > -rc/dface) & (gfrac < 1.0 + rc/dface), axis=1)
+    gfrac, gind = gfrac[keep], gind[keep]
+    gpos = numpy.dot(gfrac, cell)
+    # Cell list on a cartesian grid
+    lo = numpy.min(gpos, axis=0)
+    nbin = numpy.maximum((numpy.max(gpos, axis=0) - lo)//rc, 1).astype(int)
+    size = (numpy.max(gpos, axis=0) - lo)/nbin
+    gbin = numpy.minimum(((gpos - lo)//size).astype(int), nbin-1)
+    key = (gbin[:,0]*nbin[1] + gbin[:,1])*nbin[2] + gbin[:,2]
+    order = numpy.argsort(key, kind='stable')
+    skey = key[order]
+    pbin = numpy.minimum(((pos - lo)//size).astype(int), nbin-1)
+    ii, jj = [], []
+    for off in shifts_27():
+        nb = pbin + off
+        ok = numpy.all((nb >= 0) & (nb < nbin), axis=1)
+        ia = numpy.nonzero(ok)[0]
+        nk = (nb[ok,0]*nbin[1] + nb[ok,1])*nbin[2] + nb[ok,2]
+        start = numpy.searchsorted(skey, nk, 'left')
+        count = numpy.searchsorted(skey, nk, 'right') - start
+        # Expand the ranges [start, start+count) for all atoms
+        total = numpy.sum(count)
+        if total == 0:
+            continue
+        rep = numpy.repeat(numpy.arange(len(ia)), count)
+        within = numpy.arange(total) - numpy.repeat(numpy.cumsum(count) - count, count)
+        ii.append(ia[rep])
+        jj.append(order[start[rep] + within])
+    i = numpy.concatenate(ii)
+    g = numpy.concatenate(jj)
+    d = pos[i] - gpos[g]
+    r = numpy.sqrt(numpy.sum(d*d, axis=1))
+    sel = (r < rc) & (r > 0.0)
+    return i[sel], gind[g[sel]], d[sel], r[sel]
+
+def shifts_27():
+    """ Offsets of a bin and its 26 neighbors. """
+    return numpy.array([[i, j, k] for i in (-1, 0, 1) for j in (-1, 0, 1) for k in (-1, 0, 1)])
+
+def compute(pot, cell, pos, types, forces=True):
+    """ Energy (eV), forces (eV/A) and stress (GPa, LAMMPS pressure tensor) of the cell.
+
+        Stress is xx, yy, zz, yz, xz, xy (Voigt order)."""
+    i, j, d, r = neighbors(cell, pos, pot.cutoff)
+    ti = types[i] - 1
+    tj = types[j] - 1
+    n = len(pos)
+    # Electron density of each atom
+    rhoj, drhoj = splev(pot.rho, (tj, r), pot.dr)
+    rho = numpy.bincount(i, rhoj, n)
+    Fi, dF = splev(pot.F, (types - 1, rho), pot.drho)
+    # Pair term from the r*phi tables
+    z2, dz2 = splev(pot.z2r.reshape(-1, pot.nr, 7), (ti*pot.nel + tj, r), pot.dr)
+    phi = z2/r
+    energy = numpy.sum(Fi) + 0.5*numpy.sum(phi)
+    # dE/dr of each pair, both densities and the pair term
+    rhoi, drhoi = splev(pot.rho, (ti, r), pot.dr)
+    dphi = (dz2 - phi)/r
+    dEdr = dF[i]*drhoj + dF[j]*drhoi + dphi
+    fpair = -dEdr/r
+    f = None
+    if forces:
+        f = numpy.zeros((n, 3))
+        for k in range(3):
+            f[:,k] = numpy.bincount(i, fpair*d[:,k], n)
+    # Virial, each pair is in the list twice
+    vol = abs(numpy.linalg.det(cell))
+    w = 0.5*fpair[:,None]*d[:,[0,1,2,1,0,0]]*d[:,[0,1,2,2,2,1]]
+    stress = numpy.sum(w, axis=0)/vol*EV_GPA
+    return energy, f, stress
+
+def relax_atoms(pot, cell, pos, types, ftol=1e-6, maxiter=1000):
+    """ Minimize energy with respect to atom positions at fixed cell, return new positions. """
+    def fun(x):
+        e, f, s = compute(pot, cell, x.reshape(-1, 3), types)
+        return e, -f.ravel()
+    res = scipy.optimize.minimize(fun, pos.ravel(), jac=True, method='L-BFGS-B',
+                                  options={'gtol': ftol, 'maxiter': maxiter})
+    return res.x.reshape(-1, 3)
+
+def relax_box(pot, cell, pos, types, relax=False, ptol=1e-4, maxiter=50):
+    """ Scale the cell isotropically to zero pressure (atoms relaxed too if relax).
+
+        Return new cell and positions."""
+    # Secant iterations on the hydrostatic pressure as a function of
+    # the volumetric strain
+    def pressure(s):
+        c = cell*(1.0 + s)
+        x = pos*(1.0 + s)
+        if relax:
+            x = relax_atoms(pot, c, x, types)
+        return numpy.mean(compute(pot, c, x, types, False)[2][:3]), c, x
+    s0, s1 = 0.0, 1e-3
+    p0 = pressure(s0)[0]
+    p1, c, x = pressure(s1)
+    for it in range(maxiter):
+        if abs(p1) < ptol or p1 == p0:
+            break
+        s0, s1 = s1, s1 - p1*(s1 - s0)/(p1 - p0)
+        p0 = p1
+        p1, c, x = pressure(s1)
+    return c, x
+
+def strain_stress(pot, cell, pos, types, eps, relax=False):
+    """ Stress (GPa) of the cell with homogeneous strain eps (3x3, symmetric). """
+    F = numpy.eye(3) + eps
+    c = numpy.dot(cell, F.T)
+    x = numpy.dot(pos, F.T)
+    if relax:
+        x = relax_atoms(pot, c, x, types)
+    return compute(pot, c, x, types, False)[2]
+
+def elastic(pot, cell, pos, types, delta=1e-4, relax=False):
+    """ 6x6 elastic constant matrix (GPa, Voigt order) from central differences of the stress. """
+    # relax - relax atom positions in each strained cell (needed for alloys,
+    #   pure fcc has no internal relaxation)
+    # Voigt shear strains are engineering strains, eps_yz = gamma/2
+    voigt = [(0, 0), (1, 1), (2, 2), (1, 2), (0, 2), (0, 1)]
+    C = numpy.zeros((6, 6))
+    for jk, (a, b) in enumerate(voigt):
+        eps = numpy.zeros((3, 3))
+        h = delta if a == b else 0.5*delta
+        eps[a,b] = h
+        eps[b,a] = h
+        sp = strain_stress(pot, cell, pos, types, eps, relax)
+        sm = strain_stress(pot, cell, pos, types, -eps, relax)
+        C[:,jk] = -(sp - sm)/(2.0*delta)
+    return C
+
+def cubic(C):
+    """ Cubic averages C11, C12 and C44 of 6x6 matrix C. """
+    C11 = numpy.mean(numpy.diag(C)[:3])
+    C12 = numpy.mean([C[0,1], C[0,2], C[1,2], C[1,0], C[2,0], C[2,1]])
+    C44 = numpy.mean(numpy.diag(C)[3:])
+    return C11, C12, C44
+
+def statics(potfile, datafile, Nat=1, fractions=None, seed=None, delta=1e-4):
+    """ 0 K C11, C12, C44 (GPa) and lattice constant scale of the cell in datafile.
+
+        fractions - random alloy composition {type: fraction}, None keeps the data file types."""
+    # Returns also the scale factor of the relaxed cell relative to the
+    # data file cell (cf. af in NiElastic.py)
+    pot = load_potential(potfile)
+    cell0, pos, types = read_data(datafile)
+    cell, pos, types = replicate(cell0, pos, types, int(Nat))
+    relax = fractions is not None
+    if relax:
+        types = random_alloy(types, fractions, seed)
+        pos = relax_atoms(pot, cell, pos, types)
+    cell, pos = relax_box(pot, cell, pos, types, relax)
+    C = elastic(pot, cell, pos, types, delta, relax)
+    scale = cell[0,0]/(cell0[0,0]*int(Nat))
+    return cubic(C) + (scale,)
@@ -3,37 +3,66 @@
 # Postprocessing module for lammps output averaging:
 #   - Retrieves average properties computed by avlmpy.py
 #   - Computes elastic constants in GPa
+#   - Derived properties (Voigt, Reuss and Hill moduli, Zener ratio,
+#       Debye temperature) with bootstrap uncertainties over datasets
 #
 # Last modified: May  6  2015
 #
 
 import numpy as np 
+import reslmp, aglmp
 
-def cs(avars, nsteps, T, path, pathT, split):
+def av_rows(avars, nsteps, pathd, db=None, method=None, vals=None):
+    """ Averages of stage -nsteps and of the last stage as dictionaries. """
+    # From the bottom of pathd/av_res.txt, the latest record of the
+    # averaging method in the result store db or the given averages 
+    # vals (rows are stages, columns avars)
+    if vals is not None:
+        return dict(zip(avars, vals[-nsteps])), dict(zip(avars, vals[-1]))
+    if db is not None:
+        rec = reslmp.latest(db, pathd, method)
+        if rec is None:
+            raise ValueError('No ' + str(method) + ' averages stored for ' + pathd + ' in ' + db)
+        names, vals = rec
+        return dict(zip(names, vals[-nsteps])), dict(zip(names, vals[-1]))
+    data0 = {}
+    data = {}
+    with open(pathd + 'av_res.txt', 'r') as fp:
+        lines = fp.readlines()
+        # Extract bottom nsteps lines as a dictionary
+        tmp0 = np.array(lines[-nsteps].split(" "), ndmin=2)
+        tmp = np.array(lines[-1].split(" "), ndmin=2)
+        for jk in range(len(avars)):
+            data0[avars[jk]] = tmp0[0][jk]
+            data[avars[jk]] = tmp[0][jk]
+    return data0, data
+
+def cs(avars, nsteps, T, path, pathT, split, save=True, db=None, method='moveav', avs=None):
     """ Compute elastic constants, C11, C12 and C44. """
     # Read averaged properties for variables in avars
     # for chosen steps of simulations in nsteps.    
+    # save - append the result to path/res_Cs.txt, the result 
+    #   string is returned in any case so parallel runs can write 
+    #   results in order
+    # db - read the averages of method from the result store db 
+    #   instead of av_res.txt and record the constants there 
+    #   (method 'cs/' + method)
+    # avs - averages returned by the averaging method (one array for 
+    #   split = n, three for x, y and yz), used instead of the files 
+    #   or the store (daglmp)
     if split == 'n':
-        data = {}
         resC = []
-        with open(pathT + 'av_res.txt', 'r') as fp:
-            lines = fp.readlines()
-            # Extract bottom nsteps lines as a dictionary
-            data0 = dict.fromkeys(lines[-nsteps-1], [])
-            data = dict.fromkeys(lines[-nsteps-1], [])
-            tmp0 = np.array(lines[-nsteps].split(" "), ndmin=2)
-            tmp = np.array(lines[-1].split(" "), ndmin=2)
-            for jk in range(len(avars)):
-                data0[avars[jk]] = tmp0[0][jk]
-                data[avars[jk]] = tmp[0][jk]
+        data0, data = av_rows(avars, nsteps, pathT, db, method, avs[0] if avs else None)
         # Generate variables and compute the constants
-		# Temperature, K
-		T = float(data0['T'])
+        # Temperature, K
+        T = float(data0['T'])
         resC.append(str(T) + ',') 
-		# Average pressures pij [bar] and system dimensions lj
-		# Initial dimensions: lj0, final: lj [Angstroms]
-		pxx0 = float(data0['pxx'])
+        # Average pressures pij [bar] and system dimensions lj
+        # Initial dimensions: lj0, final: lj [Angstroms]
+        pxx0 = float(data0['pxx'])
         pxx  = float(data['pxx'])
+        pyy0 = float(data0['pyy'])
+        pyy  = float(data['pyy'])
         lx0 = float(data0['lx'])
         lx = float(data['lx'])
         ly0 = float(data0['lx'])
@@ -44,43 +73,30 @@ def cs(avars, nsteps, T, path, pathT, split):
         yz = float(data['xy'])
         lz0 = float(data0['lx'])    
 
-		# Elastic constants in GPa
-		# Append to result list with temperatures
+        # Elastic constants in GPa
+        # Append to result list with temperatures
         # C11
         C11 =-(pxx-pxx0)/((lx-lx0)/lx0)*1.0e-4
         resC.append(str(C11) +',')
-        # C12
-        C12 = -(pxx-pxx0)/((ly-ly0)/ly0)*1.0e-4
+        # C12 - transverse stress of the x deformation
+        C12 = -(pyy-pyy0)/((ly-ly0)/ly0)*1.0e-4
         resC.append(str(C12) + ',')
         # C44
         C44 = -(pyz-pyz0)/((yz-yz0)/lz0)*1.0e-4
         resC.append(str(C44))
         
-		# Save the results
-        with open(path+'res_Cs.txt', 'a+') as fr:
-            resC.append('\n') 
-            fr.write(''.join(resC)) 
+        resC.append('\n') 
     elif split == '3n':
         subdir = ['x', 'y', 'yz']
         resC = []
-        for sub in subdir:            
+        for ik, sub in enumerate(subdir):            
             pathsub = pathT + sub + '/'
-            data = {} 
-            with open(pathsub + 'av_res.txt', 'r') as fp:
-                lines = fp.readlines()
-                # Extract bottom nsteps lines as a dictionary
-                data0 = dict.fromkeys(lines[-nsteps-1], [])
-                data = dict.fromkeys(lines[-nsteps-1], [])
-                tmp0 = np.array(lines[-nsteps].split(" "), ndmin=2)
-                tmp = np.array(lines[-1].split(" "), ndmin=2)
-                for jk in range(len(avars)):
-                    data0[avars[jk]] = tmp0[0][jk]
-                    data[avars[jk]] = tmp[0][jk]
+            data0, data = av_rows(avars, nsteps, pathsub, db, method, avs[ik] if avs else None)
             # Generate variables and compute the constants
-        	# Temperature, K
-			T = float(data0['T'])
-			# Pressures, pij in [bar]
-			# System dimensions, initial: lj0 and final: lj [Angstroms]
+            # Temperature, K
+            T = float(data0['T'])
+            # Pressures, pij in [bar]
+            # System dimensions, initial: lj0 and final: lj [Angstroms]
             if sub=='x':
                 pxx0 = float(data0['pxx'])
                 pxx  = float(data['pxx'])
@@ -108,39 +124,105 @@ def cs(avars, nsteps, T, path, pathT, split):
                 # C44
                 C44 = -(pyz-pyz0)/((yz-yz0)/lz0)*1.0e-4
                 resC.append(str(C44))
+        resC.append('\n') 
+    # Save the results
+    if save:
         with open(path+'res_Cs.txt', 'a+') as fr:
-			# Write the result
-            resC.append('\n') 
             fr.write(''.join(resC)) 
+    if db is not None:
+        vals = [float(x) for x in ''.join(resC).strip().split(',')]
+        reslmp.put(db, pathT, 'cs/' + method, None, ['T', 'C11', 'C12', 'C44'], vals, 'cs')
+    return ''.join(resC)
 
-def elprops(path, filename):
-    """ Compute elastic properties from elastic constants. """
+# Derived properties in order of the output columns
+PROPS = ['B', 'GV', 'GR', 'GH', 'EV', 'ER', 'EH', 'nuV', 'nuR', 'nuH', 'A', 'thetaD']
+# Planck constant / Boltzmann constant, K s; atomic mass unit, kg
+HKB = 4.799243073e-11
+AMU = 1.66053906660e-27
 
-    ## Load the data stored in path/filename
-    data = np.loadtxt(path + filename, delimiter=',')
-    T = data[0:,0]
-    C11 = data[0:,1]
-    C12 = data[0:,2]
-    C44 = data[0:,3]
+def props(C11, C12, C44, mass=58.6934, a=3.52):
+    """ Elastic properties of cubic crystals from C11, C12, C44 (GPa, arrays of any shape).
 
-    ## Compute and save elastic properties, all in GPa
+        Return dictionary of arrays, keys in PROPS."""
+    # B, G, E in GPa, nu dimensionless, A - Zener anisotropy ratio,
+    # thetaD - Debye temperature (K) from the Hill moduli, needs the 
+    # atomic mass (amu) and the FCC lattice parameter a (A)
+    C11 = np.asarray(C11, dtype=float)
+    C12 = np.asarray(C12, dtype=float)
+    C44 = np.asarray(C44, dtype=float)
+    res = {}
     # Bulk modulus
     B = (C11+2.0*C12)/3.0
+    res['B'] = B
     # Shear moduli
-    GV = (C11-C12+3.0*C44)/5.0
-    GR = 5.0*np.divide((np.multiply((C11-C12),C44)),(3.0*(C11-C12)+4.0*C44))
-    # Young's modulus
-    EV = 9.0*np.divide(np.multiply(B,GV),(3.0*B+GV)) 
-    ER = 9.0*np.divide(np.multiply(B,GR),(3.0*B+GR))
-    # Poisson ratio
-    nuV = np.divide((3.0*B-GV),(2.0*(3.0*B+GV)))
-    nuR = np.divide((3.0*B-GR),(2.0*(3.0*B+GR)))
-    # Save
-    np.savetxt(path+'resB.txt', np.dstack((T,B))[0][0:], delimiter=',')
-    np.savetxt(path+'resGV.txt', np.dstack((T,GV))[0][0:], delimiter=',')
-    np.savetxt(path+'resGR.txt', np.dstack((T,GR))[0][0:], delimiter=',')
-    np.savetxt(path+'resEV.txt', np.dstack((T,EV))[0][0:], delimiter=',')
-    np.savetxt(path+'resER.txt', np.dstack((T,ER))[0][0:], delimiter=',')
-    np.savetxt(path+'resnuV.txt', np.dstack((T,nuV))[0][0:], delimiter=',')
-    np.savetxt(path+'resnuR.txt', np.dstack((T,nuR))[0][0:], delimiter=',')
+    res['GV'] = (C11-C12+3.0*C44)/5.0
+    res['GR'] = 5.0*(C11-C12)*C44/(3.0*(C11-C12)+4.0*C44)
+    res['GH'] = 0.5*(res['GV']+res['GR'])
+    # Young's modulus and Poisson ratio
+    for av in ['V', 'R', 'H']:
+        G = res['G'+av]
+        res['E'+av] = 9.0*B*G/(3.0*B+G)
+        res['nu'+av] = (3.0*B-2.0*G)/(2.0*(3.0*B+G))
+    # Zener ratio
+    res['A'] = 2.0*C44/(C11-C12)
+    # Debye temperature from the mean sound velocity
+    n = 4.0/(np.asarray(a, dtype=float)*1e-10)**3
+    rho = mass*AMU*n
+    vl = np.sqrt((B+4.0/3.0*res['GH'])*1e9/rho)
+    vt = np.sqrt(res['GH']*1e9/rho)
+    vm = (1.0/3.0*(2.0/vt**3+1.0/vl**3))**(-1.0/3.0)
+    res['thetaD'] = HKB*(3.0*n/(4.0*np.pi))**(1.0/3.0)*vm
+    return res
+
+def bootstrap(C, nboot=10000, seed=None, alpha=0.05, **kwargs):
+    """ Bootstrap distribution of the properties of the mean constants of datasets C (rows C11, C12, C44).
+
+        Return dictionaries of means, standard errors and (1-alpha) intervals, keys in PROPS."""
+    # All nboot resamples of the datasets at once, kwargs go to props
+    C = np.atleast_2d(np.asarray(C, dtype=float))
+    n = len(C)
+    rng = np.random.default_rng(seed)
+    idx = rng.integers(0, n, (nboot, n))
+    Cb = np.mean(C[idx], axis=1)
+    pb = props(Cb[:,0], Cb[:,1], Cb[:,2], **kwargs)
+    p0 = props(*np.mean(C, axis=0), **kwargs)
+    mean = dict((key, float(p0[key])) for key in PROPS)
+    se = dict((key, float(np.std(pb[key], ddof=1))) for key in PROPS)
+    ci = dict((key, tuple(np.percentile(pb[key], [50.0*alpha, 100.0-50.0*alpha]))) for key in PROPS)
+    return mean, se, ci
+
+def elprops(path, filename, db=None, mass=58.6934, a=3.52):
+    """ Compute elastic properties from elastic constants. """
+
+    ## Load the data stored in path/filename (or of method filename 
+    ## in the result store db, see reslmp.load_cs)
+    T, C11, C12, C44 = reslmp.load_cs(path, filename, db)
+
+    ## Compute and save elastic properties, all in GPa (see props),
+    ## one column each to path/res_props.txt
+    res = props(C11, C12, C44, mass, a)
+    np.savetxt(path+'res_props.txt', np.column_stack([T] + [res[key] for key in PROPS]), 
+               delimiter=',', header=','.join(['T'] + PROPS))
+    return res
+
+def elprops_boot(path, resfile='res_CsFit.txt', pattern='RES_*', dT=25.0, nboot=10000, seed=None, 
+                 mass=58.6934, a=3.52):
+    """ Elastic properties with bootstrap errors over all datasets pattern/resfile in path.
 
+        Saved to path/boot_<resfile>, one row per material, Nat and temperature."""
+    # Datasets are grouped as in aglmp.aggregate, columns are the group, 
+    # number of datasets and for each property the value of the mean 
+    # constants, bootstrap standard error and 95% interval
+    gkeys, rows = aglmp.samples(path, resfile, pattern, dT)
+    cols = ['material', 'Nat', 'T', 'count']
+    for key in PROPS:
+        cols += [key, key+'_se', key+'_lo', key+'_hi']
+    with open(path + 'boot_' + resfile, 'w') as fr:
+        fr.write('# ' + ','.join(cols) + '\n')
+        for ik in range(len(gkeys)):
+            mean, se, ci = bootstrap(rows[ik][:,1:4], nboot, seed, mass=mass, a=a)
+            line = [gkeys[ik][0], str(gkeys[ik][1]), str(gkeys[ik][2]), str(len(rows[ik]))]
+            for key in PROPS:
+                line += [str(mean[key]), str(se[key]), str(ci[key][0]), str(ci[key][1])]
+            fr.write(','.join(line) + '\n')
+    return gkeys
@@ -0,0 +1,186 @@
+#!/usr/bin/python
+
+# Job execution module for lammps simulations:
+#   - SGE backend - submission script piped to qsub (COE cluster)
+#   - Local backend - runs jobs on this computer with a bounded
+#       number of cores, timeouts, retries and completion callbacks
+#
+# Notes:
+#   - Both backends take Job objects from runlmp.lmp_sub
+#   - The local command can be any stand-in for LAMMPS (e.g. a fake
+#       binary for testing), it is formatted with the job attributes
+#       p, fname, seed, name and args
+#   - Jobs with extra LAMMPS arguments (e.g. -partition for packed
+#       runs, see runlmp.make_pack) are submitted to SGE with a job 
+#       script written by sge_script instead of the perl script
+#
+# Last modified: October 18 2026
+#
+
+import re, random, subprocess, threading, time, traceback
+
+class Job:
+    """ LAMMPS job - in. script fname run in directory cwd on p cores. """
+    def __init__(self, name, fname, p, cwd, args=''):
+        self.name = name
+        self.fname = fname
+        self.p = int(p)
+        self.cwd = cwd
+        # Extra LAMMPS command line arguments
+        self.args = args
+        # Random seed for velocity generation, passed to LAMMPS as 
+        # -var seed by both backends
+        self.seed = random.randint(1, 999999)
+        # Scheduler job id (SGE only)
+        self.jobid = None
+        # Status: new, submitted, running, done, failed, timeout
+        self.status = 'new'
+        self.returncode = None
+        self.attempts = 0
+        self.start = None
+        self.end = None
+        # Traceback of an exception raised by the completion callback
+        self.error = None
+
+def sge_script(job):
+    """ SGE job script for job, same as the output of submit_lammps_parallel.pl with job.args. """
+    # Runs with partitions use their own per-partition seeds (pseed)
+    return '\n'.join(['#!/bin/csh', '',
+        '#$ -N ' + job.name, '',
+        '#$ -cwd', '',
+        '# send output to job.log (STDOUT + STDERR)',
+        '#$ -o ' + job.fname + '.out',
+        '#$ -j y', '',
+        '# specify the mpich parallel environment and request ' + str(job.p),
+        '# processors from the available hosts',
+        '#$ -pe mpich2 ' + str(job.p), '',
+        '# specify the hardware platform to run the job on.',
+        '#$ -q mime', '', '',
+        'echo "------------------------------------------------------------------------"',
+        'date',
+        'echo "Got $NSLOTS slots."', '',
+        'date >! TIMING',
+        '/scratch/a1/sge/mpich2/bin/mpiexec -np $NSLOTS -machinefile $TMPDIR/machines '
+        '/nfs/matsci-fserv/share/$USER/bin/lmp_parallel ' + job.args + ' -var seed ' + str(job.seed) + ' -in ' + job.fname,
+        'date >> TIMING', '',
+        'echo " ALL DONE "',
+        'date',
+        'echo "------------------------------------------------------------------------"',
+        'exit 0', ''])
+
+class SGEExecutor:
+    """ Submit jobs to SGE with the cluster submission script. """
+    def __init__(self, script='submit_lammps_parallel.pl'):
+        self.script = script
+
+    def submit(self, job, register=None):
+        """ Submit job with qsub and record its scheduler id. """
+        # register - called with the job once it is submitted (e.g. to
+        #   record it in the run registry)
+        if job.args:
+            fname = 'job_' + job.name + '.csh'
+            with open(job.cwd + fname, 'w') as fp:
+                fp.write(sge_script(job))
+            sub_command = 'qsub ' + fname
+        else:
+            sub_command = (self.script + ' ' + job.fname + ' ' + str(job.p) + ' '  + job.name + ' ' + str(job.seed)
+                           + ' | qsub')
+        proc = subprocess.Popen([sub_command], shell=True, cwd=job.cwd,
+                                stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+        out = proc.communicate()[0].decode()
+        job.returncode = proc.returncode
+        job.attempts += 1
+        # qsub reports: Your job 12345 ("name") has been submitted
+        match = re.search(r'Your job (\d+)', out)
+        if proc.returncode == 0 and match:
+            job.jobid = match.group(1)
+            job.status = 'submitted'
+        else:
+            job.status = 'failed'
+        if register is not None:
+            register(job)
+        return job
+
+    def wait(self):
+        """ Jobs run on the cluster - nothing to wait for. """
+        pass
+
+class LocalExecutor:
+    """ Run jobs on this computer using at most cores cores at a time. """
+    def __init__(self, cores, command='mpirun -np {p} lmp {args} -var seed {seed} -in {fname}',
+                 timeout=None, retries=0, callback=None):
+        # timeout - wall time limit of each attempt, s
+        # retries - number of reruns of failed or timed out jobs
+        # callback - called with the job when it ends, e.g. for
+        #   post-processing as soon as each job finishes
+        self.cores = int(cores)
+        self.command = command
+        self.timeout = timeout
+        self.retries = retries
+        self.callback = callback
+        self.free = self.cores
+        self.cond = threading.Condition()
+        self.threads = []
+
+    def submit(self, job, register=None):
+        """ Start job as soon as enough cores are free, return immediately. """
+        # register - called with the submitted job before it is started,
+        #   so it cannot overwrite the status written by the callback
+        # Jobs larger than the whole node get the whole node, job.p is 
+        # the number of cores actually used
+        job.p = min(job.p, self.cores)
+        job.status = 'submitted'
+        if register is not None:
+            register(job)
+        thread = threading.Thread(target=self.run, args=(job,))
+        thread.daemon = True
+        self.threads.append(thread)
+        thread.start()
+        return job
+
+    def run(self, job):
+        """ Run job (all attempts) holding its cores. """
+        p = job.p
+        with self.cond:
+            while self.free < p:
+                self.cond.wait()
+            self.free -= p
+        try:
+            while job.attempts <= self.retries:
+                self.attempt(job)
+                if job.status == 'done':
+                    break
+        finally:
+            with self.cond:
+                self.free += p
+                self.cond.notify_all()
+        # Errors of the callback are kept with the job, the thread 
+        # would end silently otherwise
+        if self.callback is not None:
+            try:
+                self.callback(job)
+            except Exception:
+                job.error = traceback.format_exc()
+
+    def attempt(self, job):
+        """ Run job once, output goes to fname.out in the job directory. """
+        command = self.command.format(p=job.p, fname=job.fname, seed=job.seed, name=job.name, args=job.args)
+        job.attempts += 1
+        job.status = 'running'
+        job.start = time.time()
+        with open(job.cwd + job.fname + '.out', 'a') as out:
+            proc = subprocess.Popen(command, shell=True, cwd=job.cwd, stdout=out, stderr=subprocess.STDOUT)
+            try:
+                job.returncode = proc.wait(timeout=self.timeout)
+                job.status = 'done' if job.returncode == 0 else 'failed'
+            except subprocess.TimeoutExpired:
+                proc.kill()
+                proc.wait()
+                job.returncode = None
+                job.status = 'timeout'
+        job.end = time.time()
+
+    def wait(self):
+        """ Wait until all submitted jobs have ended. """
+        for thread in self.threads:
+            thread.join()
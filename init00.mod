@@ -31,6 +31,11 @@ variable    P0  equal   1.0
 # Box dimensions
 variable af equal 1.0
 
+# Dump interval of the atom positions (movie.xyz), steps
+variable    dumpN       equal   100
+# Thermo output interval, steps
+variable    thermoN     equal   1
+
 # Time step
 variable    dt          equal   0.5e-3
 # Time of simulation stages
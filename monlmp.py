@@ -0,0 +1,118 @@
+#!/usr/bin/python
+
+# Monitoring module for running lammps simulations:
+#   - Follows log.lammps of each run directory incrementally
+#   - Keeps running estimates of the elastic constants from the
+#       deformation stage
+#   - Stops the deformation once the confidence intervals of the
+#       elastic constants are below a threshold
+#
+# Notes:
+#   - The run is stopped through a sentinel file checked by fix halt
+#       in the LAMMPS input, see runlmp.add_halt
+#   - Directories are polled, only the new part of each log is read
+#   - One monitor process can follow hundreds of directories
+#
+# Last modified: October 18 2026
+#
+
+import os, time, numpy
+import avlmp, statlmp
+
+class LogTail:
+    """ Incremental elastic constant estimates from a growing log.lammps. """
+    def __init__(self, pathd, thermo, dirC44, split, sub, stages=(1, 2), sentinel='STOP'):
+        self.pathd = pathd
+        self.sentinel = sentinel
+        self.stages = stages
+        xvar, lvar, yvars, self.fac = avlmp.fit_spec(dirC44, split, sub)
+        self.ix = thermo.index(xvar)
+        self.il = thermo.index(lvar)
+        self.iy = [thermo.index(var) for var in yvars]
+        self.reset()
+
+    def reset(self):
+        """ Start reading the log from the beginning. """
+        self.offset = 0
+        self.partial = ''
+        self.reader = avlmp.LogReader()
+        self.lfit = statlmp.LinFit(len(self.iy))
+        self.lsum, self.nl = 0.0, 0
+        # Log is complete, sentinel written
+        self.finished = False
+        self.stopped = False
+
+    def poll(self):
+        """ Read the new part of log.lammps and update the estimates. """
+        fname = self.pathd + 'log.lammps'
+        try:
+            size = os.path.getsize(fname)
+        except OSError:
+            return
+        if size < self.offset:
+            # Log was restarted
+            self.reset()
+        if size == self.offset:
+            return
+        with open(fname, 'r') as fp:
+            fp.seek(self.offset)
+            text = self.partial + fp.read(size - self.offset)
+        self.offset = size
+        # Incomplete last line is kept for the next poll
+        lines = text.split('\n')
+        self.partial = lines.pop()
+        lines = [line + '\n' for line in lines]
+        blocks = self.reader.feed(lines)
+        if self.reader.inblock and self.reader.buf:
+            blocks.append((len(self.reader.kinds)-1, self.reader.flush()))
+        for (ik, rows) in blocks:
+            if ik == self.stages[0]:
+                self.lsum += numpy.sum(rows[:,self.il])
+                self.nl += len(rows)
+            elif ik == self.stages[1]:
+                self.lfit.add(rows[:,self.ix], -rows[:,self.iy])
+        if any([line.startswith('Total wall time') for line in lines]):
+            self.finished = True
+
+    def estimate(self, minrows=1000):
+        """ Current elastic constants and their standard errors in GPa, None if not available. """
+        if self.nl == 0 or self.lfit.nrows() < minrows:
+            return None
+        b, a, se, g = self.lfit.fit()
+        l0 = self.lsum/self.nl
+        return b*l0*self.fac, se*l0*self.fac
+
+    def check(self, threshold, z=1.96, minrows=1000):
+        """ Write the sentinel file if all confidence half-widths are below threshold (GPa). """
+        est = self.estimate(minrows)
+        if self.stopped or est is None:
+            return self.stopped
+        C, se = est
+        if numpy.all(z*se < threshold):
+            with open(self.pathd + self.sentinel, 'w') as fp:
+                fp.write(' '.join([str(c) for c in C]) + '\n')
+                fp.write(' '.join([str(s) for s in se]) + '\n')
+            self.stopped = True
+        return self.stopped
+
+def monitor(dirs, thermo, dirC44, split, threshold, interval=30.0, stages=(1, 2), z=1.96):
+    """ Follow runs in dirs until all are stopped or finished.
+
+        Return the last estimates for each directory."""
+    # dirs - list of (pathd, sub) with sub None for split = n
+    # threshold - confidence interval half-width of all constants in GPa
+    # interval - polling period, s
+    tails = [LogTail(pathd, thermo, dirC44, split, sub, stages) for (pathd, sub) in dirs]
+    while True:
+        active = 0
+        for tail in tails:
+            if tail.stopped or tail.finished:
+                continue
+            tail.poll()
+            tail.check(threshold, z)
+            if not (tail.stopped or tail.finished):
+                active += 1
+        if active == 0:
+            break
+        time.sleep(interval)
+    return [tail.estimate() for tail in tails]
@@ -0,0 +1,57 @@
+#!/usr/bin/python
+
+# Parallel execution module for post-processing of lammps output:
+#   - Generates (temperature, subdirectory) work units
+#   - Runs the units on a pool of worker processes and gathers
+#       the results in order
+#
+# Notes:
+#   - Functions run in the workers receive explicit paths, they
+#       must not change the current working directory
+#   - Results written to shared files are returned by the workers
+#       and written by the calling process, in order of the units
+#
+# Last modified: October 18 2026
+#
+
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+def units(pathR, T, split):
+    """ List (T, subdirectory, path) work units in results directory pathR. """
+    # subdirectory is None for split = 'n'
+    work = []
+    for Ti in T:
+        pathT = pathR + 'T_' + Ti + '/'
+        if split == 'n':
+            work.append((Ti, None, pathT))
+        elif split == '3n':
+            subdir = ['x', 'y', 'yz']
+            for sub in subdir:
+                work.append((Ti, sub, pathT + sub + '/'))
+    return work
+
+def run_units(func, args, nproc=None):
+    """ Run func(*arg) for each arg in args using nproc worker processes.
+
+        Return the list of results in order of args."""
+    # nproc = None uses all available cores, nproc = 1 runs serially
+    # in the calling process (useful for debugging)
+    if nproc == 1:
+        return [func(*arg) for arg in args]
+    # Fork the workers where possible - the driver script is not
+    # import-safe and must not be re-executed by the workers
+    try:
+        ctx = multiprocessing.get_context('fork')
+    except ValueError:
+        ctx = None
+    # Leaving the with block joins all the workers
+    with ProcessPoolExecutor(max_workers=nproc, mp_context=ctx) as ex:
+        futures = [ex.submit(func, *arg) for arg in args]
+        results = [fut.result() for fut in futures]
+    return results
+
+def save_res(fname, results):
+    """ Append result strings returned by the workers to fname. """
+    with open(fname, 'a+') as fr:
+        fr.write(''.join(results))
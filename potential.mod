@@ -10,6 +10,6 @@ neighbor 0.3 bin
 neigh_modify delay 10
 
 # Setup output
-thermo          1
+thermo          ${thermoN}
 thermo_style    custom step temp press ke pe pxx pyy pzz pxy pxz pyz lx ly lz xy xz yz
  
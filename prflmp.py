@@ -0,0 +1,141 @@
+#!/usr/bin/python
+
+# Profiling module for the post-processing stages:
+#   - Wall time, CPU time, peak resident memory, bytes read and written
+#       and number of thermo rows of each stage and work unit
+#   - Records are returned by the workers (parlmp) together with the
+#       results and saved by the calling process to prof.json and
+#       prof.csv in the results directory
+#   - Optional cProfile and tracemalloc capture of a single unit
+#
+# Notes:
+#   - Bytes read and written are from /proc/self/io (Linux) and include
+#       page cache hits, they are None where not available
+#   - Peak memory is reset before each unit where the kernel allows it
+#       (/proc/self/clear_refs), otherwise it is the peak of the worker
+#       process so far
+#   - Rows are the rows of the thermo cache of the unit directory, 0 if
+#       it was not parsed yet
+#
+# Last modified: October 18 2026
+#
+
+import os, csv, json, time, resource, cProfile, pstats, tracemalloc
+
+# Columns of the report
+FIELDS = ['stage', 'unit', 'wall', 'cpu', 'rss', 'read', 'write', 'rows', 'pid', 'start']
+
+def io_bytes():
+    """ Bytes read and written by this process so far, (None, None) if not available. """
+    try:
+        with open('/proc/self/io', 'r') as fp:
+            io = dict(line.split(':') for line in fp)
+        return int(io['rchar']), int(io['wchar'])
+    except (OSError, KeyError, ValueError):
+        return None, None
+
+def peak_rss():
+    """ Peak resident memory of this process in MB. """
+    # VmHWM can be reset, ru_maxrss (kB on Linux) is the fallback
+    try:
+        with open('/proc/self/status', 'r') as fp:
+            for line in fp:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1])/1024.0
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss/1024.0
+
+def reset_rss():
+    """ Reset the peak resident memory of this process (Linux). """
+    try:
+        with open('/proc/self/clear_refs', 'w') as fp:
+            fp.write('5')
+    except OSError:
+        pass
+
+def rows(pathd):
+    """ Number of rows in the thermo cache of pathd. """
+    fname = pathd + 'thermo_cache/meta.json'
+    if not os.path.isfile(fname):
+        return 0
+    with open(fname, 'r') as fp:
+        return int(json.load(fp)['stages'][-1])
+
+def timed(func, stage, unit, *args):
+    """ Run func(*args) and measure it as stage of work unit (directory) unit.
+
+        Return the result of func and the record."""
+    # Use with parlmp.run_units, e.g.
+    #   out = parlmp.run_units(prflmp.timed, [(avlmp.save_log, 'log', pathd, pathd) for ...])
+    reset_rss()
+    r0, w0 = io_bytes()
+    start = time.time()
+    t0 = time.perf_counter()
+    c0 = time.process_time()
+    res = func(*args)
+    rec = {'stage': stage, 'unit': unit, 'wall': time.perf_counter() - t0,
+           'cpu': time.process_time() - c0, 'rss': peak_rss(), 'pid': os.getpid(), 'start': start}
+    r1, w1 = io_bytes()
+    rec['read'] = None if r0 is None else r1 - r0
+    rec['write'] = None if w0 is None else w1 - w0
+    rec['rows'] = rows(unit) if os.path.isdir(unit) else 0
+    return res, rec
+
+def split(out):
+    """ Results and records of the list of timed outputs out. """
+    return [res for (res, rec) in out], [rec for (res, rec) in out]
+
+def save_report(pathR, records):
+    """ Add records to the report of results directory pathR (prof.json and prof.csv). """
+    fname = pathR + 'prof.json'
+    old = []
+    if os.path.isfile(fname):
+        with open(fname, 'r') as fp:
+            old = json.load(fp)
+    old += records
+    with open(fname, 'w') as fp:
+        json.dump(old, fp, indent=1)
+    with open(pathR + 'prof.csv', 'w') as fp:
+        wr = csv.DictWriter(fp, FIELDS)
+        wr.writeheader()
+        wr.writerows(old)
+    return old
+
+def summary(records):
+    """ Total wall and CPU time, maximum peak memory, rows and throughput of each stage. """
+    res = {}
+    for rec in records:
+        s = res.setdefault(rec['stage'], {'units': 0, 'wall': 0.0, 'cpu': 0.0, 'rss': 0.0, 'rows': 0})
+        s['units'] += 1
+        s['wall'] += rec['wall']
+        s['cpu'] += rec['cpu']
+        s['rss'] = max(s['rss'], rec['rss'])
+        s['rows'] += rec['rows']
+    for stage in res:
+        s = res[stage]
+        s['rows_per_s'] = s['rows']/s['wall'] if s['wall'] > 0 else 0.0
+    return res
+
+def profile(func, args, out, mem=False, top=30):
+    """ cProfile (and optionally tracemalloc) capture of func(*args).
+
+        Statistics are saved to out.prof and out.txt, return the result of func."""
+    # out.prof can be viewed with e.g. snakeviz, out.txt lists the top
+    # functions by cumulative time and with mem = True the top lines
+    # by allocated memory
+    if mem:
+        tracemalloc.start()
+    prof = cProfile.Profile()
+    res = prof.runcall(func, *args)
+    prof.dump_stats(out + '.prof')
+    with open(out + '.txt', 'w') as fp:
+        pstats.Stats(prof, stream=fp).sort_stats('cumulative').print_stats(top)
+        if mem:
+            snap = tracemalloc.take_snapshot()
+            cur, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            fp.write('Traced memory: current %.1f MB, peak %.1f MB\n' % (cur/2.0**20, peak/2.0**20))
+            for stat in snap.statistics('lineno')[:top]:
+                fp.write(str(stat) + '\n')
+    return res
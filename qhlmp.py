@@ -0,0 +1,150 @@
+#!/usr/bin/python
+
+# Quasi-harmonic module - lattice parameter as a function of temperature:
+#   - Force constants of the FCC lattice from finite displacements of
+#       one atom in a supercell (eamlmp forces)
+#   - Phonon frequencies on a k-point grid, all k-points at once
+#   - Helmholtz free energy F(V, T) = E(V) + F_vib(V, T) on a grid of
+#       lattice parameters, minimum of F + PV for all temperatures
+#   - Box lengths af (= Nat*a(T)) for NiElastic.py
+#
+# Notes:
+#   - Monoatomic FCC lattice only (e.g. pure Ni), all atoms are
+#       equivalent so one displaced atom gives all force constants
+#   - Pressure in bar (LAMMPS metal units), temperature in K
+#   - The quasi-harmonic approximation neglects anharmonic effects
+#       beyond the volume dependence of the frequencies - use the
+#       values as a starting guess for NPT runs at high T
+#   - Tabulated potentials are only piecewise smooth, keep the lattice
+#       parameter grid (da) close to the expected thermal expansion
+#   - Not valid for FeNiCr.eam.alloy - near a0 the 5th neighbour shell
+#       crosses the 5.6 A cutoff and the lattice stiffens on expansion,
+#       the predicted a(T) decreases with T (negative expansion) for
+#       any da and ncell. af_list refuses such results
+#
+# Last modified: October 18 2026
+#
+
+import numpy
+import eamlmp
+
+# Boltzmann constant, eV/K
+KB = 8.617333262e-5
+# hbar*sqrt(eV/(A^2 amu)), eV
+HW = 6.582119569e-16*numpy.sqrt(1.602176634e-19/1.66053906660e-27)*1e10
+# bar*A^3 to eV
+BAR_EV = 1e-4/eamlmp.EV_GPA
+
+def force_constants(pot, a, itype=2, ncell=3, h=0.01):
+    """ Force constants of atom 0 with all atoms of the ncell^3 supercell at lattice parameter a.
+
+        Return minimum image vectors R_j - R_0, their weights and (n,3,3) force constants in eV/A^2."""
+    # Conventional cubic cell with 4 atoms, all of type itype
+    cell0 = a*numpy.eye(3)
+    pos0 = 0.5*a*numpy.array([[0, 0, 0], [1, 1, 0], [1, 0, 1], [0, 1, 1]], dtype=float)
+    cell, pos, types = eamlmp.replicate(cell0, pos0, numpy.array([itype]*4), ncell)
+    n = len(pos)
+    phi = numpy.zeros((n, 3, 3))
+    # Central differences of the forces, phi[j,alpha,beta] = d2E/du0_alpha du_j_beta
+    for alpha in range(3):
+        xp = pos.copy()
+        xp[0,alpha] += h
+        xm = pos.copy()
+        xm[0,alpha] -= h
+        fp = eamlmp.compute(pot, cell, xp, types)[1]
+        fm = eamlmp.compute(pot, cell, xm, types)[1]
+        phi[:,alpha,:] = -(fp - fm)/(2.0*h)
+    # Symmetrize and enforce the acoustic sum rule
+    phi = 0.5*(phi + numpy.transpose(phi, (0, 2, 1)))
+    phi[0] -= numpy.sum(phi, axis=0)
+    # Minimum images of R_j - R_0, equidistant images share the weight
+    L = ncell*a
+    d = pos - pos[0]
+    d -= L*numpy.round(d/L)
+    shifts = L*numpy.array([[i, j, k] for i in (-1, 0, 1) for j in (-1, 0, 1) for k in (-1, 0, 1)])
+    img = d[:,None,:] + shifts[None,:,:]
+    dist = numpy.linalg.norm(img, axis=2)
+    w = (dist < numpy.min(dist, axis=1)[:,None] + 1e-6).astype(float)
+    w /= numpy.sum(w, axis=1)[:,None]
+    return img, w, phi
+
+def kgrid(a, nk):
+    """ Monkhorst-Pack grid of nk^3 k-points in the FCC Brillouin zone. """
+    b = 2.0*numpy.pi/a*numpy.array([[-1, 1, 1], [1, -1, 1], [1, 1, -1]], dtype=float)
+    m = (numpy.arange(nk) + 0.5)/nk - 0.5
+    frac = numpy.array([[i, j, k] for i in m for j in m for k in m])
+    return numpy.dot(frac, b)
+
+def frequencies(img, w, phi, mass, k):
+    """ Phonon energies hbar*omega (eV) at k-points k, rows are k-points. """
+    # Dynamical matrix of all k-points at once
+    ph = numpy.sum(w[None,:,:]*numpy.exp(-1j*numpy.einsum('kx,jsx->kjs', k, img)), axis=2)
+    D = numpy.einsum('kj,jab->kab', ph, phi)/mass
+    D = 0.5*(D + numpy.conj(numpy.transpose(D, (0, 2, 1))))
+    w2 = numpy.linalg.eigvalsh(D)
+    # Numerical noise of the acoustic modes near Gamma
+    return HW*numpy.sqrt(numpy.maximum(w2, 0.0))
+
+def free_energy(hw, T):
+    """ Vibrational free energy per atom (eV) for phonon energies hw at temperatures T. """
+    hw = hw.ravel()
+    hw = hw[hw > 1e-8]
+    kT = KB*numpy.asarray(T, dtype=float)
+    # Three modes per k-point, hw holds 3*nk energies
+    zp = 0.5*numpy.sum(hw)
+    th = kT*numpy.sum(numpy.log(-numpy.expm1(-hw[None,:]/kT[:,None])), axis=1)
+    return (zp + th)/(len(hw)/3.0)
+
+def lattice(potfile, T, P=1.0, itype=2, a0=None, da=0.01, na=9, ncell=3, nk=12, deg=4):
+    """ Quasi-harmonic lattice parameter (A) at temperatures T and pressure P (bar). """
+    # Free energy is computed at na lattice parameters within +-da (relative)
+    # of the static equilibrium a0 and fitted with a polynomial of degree
+    # deg in a for every temperature
+    pot = eamlmp.load_potential(potfile)
+    mass = pot.masses[itype-1]
+    T = numpy.maximum(numpy.asarray(T, dtype=float), 1e-3)
+    if a0 is None:
+        a0 = static_lattice(pot, itype)
+    alat = a0*(1.0 + numpy.linspace(-da, da, na))
+    G = numpy.zeros((len(T), na))
+    for ia, a in enumerate(alat):
+        cell0 = a*numpy.eye(3)
+        pos0 = 0.5*a*numpy.array([[0, 0, 0], [1, 1, 0], [1, 0, 1], [0, 1, 1]], dtype=float)
+        E = eamlmp.compute(pot, cell0, pos0, numpy.array([itype]*4), False)[0]/4.0
+        img, w, phi = force_constants(pot, a, itype, ncell)
+        hw = frequencies(img, w, phi, mass, kgrid(a, nk))
+        G[:,ia] = E + free_energy(hw, T) + P*BAR_EV*a**3/4.0
+    # Minimum of the fitted polynomials, closest to the grid minimum
+    x = alat/a0 - 1.0
+    coef = numpy.polyfit(x, G.T, deg)
+    res = numpy.zeros(len(T))
+    for it in range(len(T)):
+        roots = numpy.roots(numpy.polyder(coef[:,it]))
+        roots = roots[numpy.isreal(roots)].real
+        roots = roots[(roots >= x[0]) & (roots <= x[-1])]
+        xmin = x[numpy.argmin(G[it])]
+        if len(roots):
+            xmin = roots[numpy.argmin(numpy.polyval(coef[:,it], roots))]
+        res[it] = a0*(1.0 + xmin)
+    return res
+
+def static_lattice(pot, itype=2, a=3.5):
+    """ Static (0 K, no zero point motion) equilibrium lattice parameter of the FCC lattice. """
+    cell0 = a*numpy.eye(3)
+    pos0 = 0.5*a*numpy.array([[0, 0, 0], [1, 1, 0], [1, 0, 1], [0, 1, 1]], dtype=float)
+    cell, pos = eamlmp.relax_box(pot, cell0, pos0, numpy.array([itype]*4), ptol=1e-6)
+    return cell[0,0]
+
+def af_list(potfile, T, Nat, P=1.0, itype=2, **kwargs):
+    """ Box lengths Nat*a(T) as strings for the af list in NiElastic.py. """
+    # T, P - temperatures and pressure as strings (or numbers)
+    # The values replace NPT results, a lattice parameter that decreases
+    # with temperature means the quasi-harmonic model does not hold for 
+    # the potential (see Notes)
+    temps = [float(Ti) for Ti in T]
+    a = lattice(potfile, temps, float(P), itype, **kwargs)
+    ik = numpy.argsort(temps)
+    if numpy.any(numpy.diff(a[ik]) < 0.0):
+        raise ValueError('Quasi-harmonic lattice parameter of ' + potfile + ' decreases with T ('
+                         + ', '.join(['%.4f' % ai for ai in a[ik]]) + ' A), use the NPT af list')
+    return ['%.4f' % (int(Nat)*ai) for ai in a]
@@ -0,0 +1,178 @@
+#!/usr/bin/python
+
+# Run registry module - bookkeeping of lammps runs in a results directory:
+#   - One SQLite file (runs.db) in the main results directory
+#   - Records parameters, seed, scheduler job id, status, timings
+#       and checksum of log.lammps of every run directory
+#   - Queries for completed but not averaged runs and bulk
+#       cancel/resubmit of failed runs
+#
+# Notes:
+#   - Every function takes the path of the registry file and opens
+#       its own connection, so it can be used from executor callbacks
+#       running in other threads or processes
+#   - Status: new, submitted, running, done, failed, timeout, cancelled
+#
+# Last modified: October 18 2026
+#
+
+import os, json, time, hashlib, sqlite3, subprocess
+import exelmp
+
+SCHEMA = '''
+create table if not exists runs (
+    id integer primary key,
+    dataset text, T text, sub text,
+    path text unique,
+    fname text, name text, p integer,
+    params text, seed integer, jobid text,
+    status text default 'new',
+    created real, submitted real, started real, finished real,
+    checksum text, averaged integer default 0);
+create index if not exists runs_status on runs (status, averaged);
+create index if not exists runs_jobid on runs (jobid);
+'''
+
+def connect(dbfile):
+    """ Open the registry dbfile, create the tables if needed. """
+    con = sqlite3.connect(dbfile, timeout=60.0)
+    con.executescript(SCHEMA)
+    return con
+
+def add_run(dbfile, dataset, T, sub, path, params=None):
+    """ Register run directory path of dataset at temperature T (subdirectory sub). """
+    con = connect(dbfile)
+    with con:
+        con.execute('insert or replace into runs (dataset, T, sub, path, params, status, created) '
+                    'values (?, ?, ?, ?, ?, ?, ?)',
+                    (dataset, T, sub, path, json.dumps(params or {}, sort_keys=True), 'new', time.time()))
+    con.close()
+
+def checksum(fname):
+    """ SHA1 checksum of file fname, None if it does not exist. """
+    if not os.path.isfile(fname):
+        return None
+    sha = hashlib.sha1()
+    with open(fname, 'rb') as fp:
+        for block in iter(lambda: fp.read(1 << 20), b''):
+            sha.update(block)
+    return sha.hexdigest()
+
+def is_complete(fname):
+    """ True if LAMMPS log fname exists and the run finished. """
+    if not os.path.isfile(fname):
+        return False
+    # LAMMPS writes the total wall time at the very end
+    with open(fname, 'rb') as fp:
+        fp.seek(max(os.path.getsize(fname)-4096, 0))
+        return b'Total wall time' in fp.read()
+
+def set_job(dbfile, job):
+    """ Record submission or completion of exelmp.Job job. """
+    # Can be used as (a part of) the callback of exelmp.LocalExecutor
+    ck = None
+    if job.status == 'done':
+        ck = checksum(job.cwd + 'log.lammps')
+    con = connect(dbfile)
+    with con:
+        con.execute('update runs set fname = ?, name = ?, p = ?, seed = ?, jobid = ?, status = ?, '
+                    'submitted = coalesce(submitted, ?), started = coalesce(?, started), '
+                    'finished = coalesce(?, finished), checksum = coalesce(?, checksum) where path = ?',
+                    (job.fname, job.name, job.p, job.seed, job.jobid, job.status, time.time(),
+                     job.start, job.end, ck, job.cwd))
+    con.close()
+
+def queued():
+    """ Set of SGE job ids known to qstat (queued or running), None if qstat is not available. """
+    try:
+        proc = subprocess.Popen(['qstat'], stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    except OSError:
+        return None
+    out = proc.communicate()[0].decode()
+    if proc.returncode != 0:
+        return None
+    # Job lines start with the job id, header lines do not
+    return set(line.split()[0] for line in out.splitlines() if line.split() and line.split()[0].isdigit())
+
+def refresh(dbfile):
+    """ Mark submitted runs with a complete log.lammps as done.
+
+        Return number of newly completed runs."""
+    # Only runs still recorded as submitted or running are checked
+    # Cluster runs no longer known to qstat without a complete log
+    # (crashed or killed jobs) are marked failed, see resubmit
+    con = connect(dbfile)
+    rows = con.execute("select path, jobid from runs where status in ('submitted', 'running')").fetchall()
+    jobids = queued() if any(jobid for (path, jobid) in rows) else None
+    ndone = 0
+    with con:
+        for (path, jobid) in rows:
+            fname = path + 'log.lammps'
+            if is_complete(fname):
+                con.execute("update runs set status = 'done', finished = ?, checksum = ? where path = ?",
+                            (os.path.getmtime(fname), checksum(fname), path))
+                ndone += 1
+            elif jobid and jobids is not None and jobid not in jobids:
+                con.execute("update runs set status = 'failed' where path = ?", (path,))
+            elif os.path.isfile(fname):
+                con.execute("update runs set status = 'running' where path = ?", (path,))
+    con.close()
+    return ndone
+
+def query(dbfile, status, averaged=None):
+    """ List (T, sub, path) of runs with given status (and averaged flag). """
+    con = connect(dbfile)
+    if averaged is None:
+        rows = con.execute('select T, sub, path from runs where status = ? order by id', (status,))
+    else:
+        rows = con.execute('select T, sub, path from runs where status = ? and averaged = ? order by id',
+                           (status, int(averaged)))
+    rows = rows.fetchall()
+    con.close()
+    return rows
+
+def pending(dbfile):
+    """ List (T, sub, path) of completed runs that are not yet averaged. """
+    return query(dbfile, 'done', False)
+
+def set_averaged(dbfile, paths):
+    """ Mark runs in paths as averaged. """
+    con = connect(dbfile)
+    with con:
+        con.executemany('update runs set averaged = 1 where path = ?', [(path,) for path in paths])
+    con.close()
+
+def cancel(dbfile, status=('submitted', 'running')):
+    """ Cancel (qdel) all cluster jobs with status in status.
+
+        Return the cancelled job ids."""
+    con = connect(dbfile)
+    marks = ','.join(['?']*len(status))
+    rows = con.execute('select jobid from runs where jobid is not null and status in (' + marks + ')',
+                       tuple(status)).fetchall()
+    jobids = [row[0] for row in rows]
+    if jobids:
+        subprocess.call(['qdel ' + ' '.join(jobids)], shell=True)
+        with con:
+            con.execute("update runs set status = 'cancelled' where jobid is not null and status in (" + marks + ')',
+                        tuple(status))
+    con.close()
+    return jobids
+
+def resubmit(dbfile, executor, status=('failed', 'timeout', 'cancelled')):
+    """ Submit again all runs with status in status using executor.
+
+        Return the submitted jobs."""
+    con = connect(dbfile)
+    marks = ','.join(['?']*len(status))
+    rows = con.execute('select name, fname, p, path from runs where fname is not null and status in (' + marks + ')',
+                       tuple(status)).fetchall()
+    with con:
+        con.execute('update runs set averaged = 0, checksum = null, started = null, finished = null '
+                    'where fname is not null and status in (' + marks + ')', tuple(status))
+    con.close()
+    jobs = []
+    for (name, fname, p, path) in rows:
+        job = executor.submit(exelmp.Job(name, fname, p, path), lambda job: set_job(dbfile, job))
+        jobs.append(job)
+    return jobs
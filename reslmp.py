@@ -0,0 +1,135 @@
+#!/usr/bin/python
+
+# Result store module - averages and elastic constants in one database:
+#   - One SQLite file (e.g. results.db) in the main results directory
+#   - Records keyed by dataset, temperature, subdirectory, method and
+#       parameters, every record is written in a single transaction
+#   - Latest record of a key through an index, all temperatures of a
+#       dataset at once as numpy arrays (ellmp, vislmp)
+#
+# Notes:
+#   - Every function takes the path of the store and opens its own
+#       connection, so parallel workers can write to the same store
+#   - Records are never overwritten, a new record of the same key
+#       replaces the old one in all queries (latest id)
+#   - Kinds: 'av' - averages of each stage (rows) of variables
+#       (columns), 'cs' - elastic constants of one work unit
+#   - Dataset, temperature and subdirectory follow from the run
+#       directory, .../<dataset>/T_<T>/<sub>/ (see unit_key)
+#
+# Last modified: October 18 2026
+#
+
+import os, json, time, sqlite3, numpy
+
+SCHEMA = '''
+create table if not exists results (
+    id integer primary key,
+    dataset text, T text, sub text,
+    method text, params text, kind text,
+    names text, shape text, data blob,
+    created real);
+create index if not exists results_key on results (dataset, kind, method, T, sub, params, id);
+'''
+
+def connect(dbfile):
+    """ Open the store dbfile, create the tables if needed. """
+    con = sqlite3.connect(dbfile, timeout=60.0)
+    con.executescript(SCHEMA)
+    return con
+
+def unit_key(pathd):
+    """ Dataset, temperature and subdirectory of run directory pathd. """
+    parts = [part for part in os.path.abspath(pathd).split('/') if part]
+    for ik in range(len(parts)-1, -1, -1):
+        if parts[ik].startswith('T_'):
+            sub = parts[ik+1] if ik+1 < len(parts) else ''
+            return parts[ik-1], parts[ik][2:], sub
+    raise ValueError('No T_ directory in ' + pathd)
+
+def params_key(params):
+    """ Parameters as a canonical string. """
+    return json.dumps(params or {}, sort_keys=True, default=str)
+
+def put(dbfile, pathd, method, params, names, values, kind='av'):
+    """ Record values (1D or 2D, columns are names) of run directory pathd. """
+    dataset, T, sub = unit_key(pathd)
+    values = numpy.asarray(values, dtype=numpy.float64)
+    con = connect(dbfile)
+    with con:
+        con.execute('insert into results (dataset, T, sub, method, params, kind, names, shape, data, created) '
+                    'values (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                    (dataset, T, sub, method, params_key(params), kind, json.dumps(list(names)),
+                     json.dumps(values.shape), sqlite3.Binary(values.tobytes()), time.time()))
+    con.close()
+
+def decode(names, shape, data):
+    """ Column names and array of a record. """
+    return json.loads(names), numpy.frombuffer(data, dtype=numpy.float64).reshape(json.loads(shape))
+
+def latest(dbfile, pathd, method, params=None, kind='av'):
+    """ Column names and values of the latest record of run directory pathd, None if there is none. """
+    # params = None - latest record with any parameters
+    dataset, T, sub = unit_key(pathd)
+    sql = 'select names, shape, data from results where dataset = ? and kind = ? and method = ? and T = ? and sub = ?'
+    args = [dataset, kind, method, T, sub]
+    if params is not None:
+        sql += ' and params = ?'
+        args.append(params_key(params))
+    con = connect(dbfile)
+    row = con.execute(sql + ' order by id desc limit 1', args).fetchone()
+    con.close()
+    if row is None:
+        return None
+    return decode(*row)
+
+def records(dbfile, dataset, method, params=None, kind='cs'):
+    """ Latest records of all temperatures and subdirectories of dataset.
+
+        Return dictionary (T, sub): (names, values)."""
+    sql = ('select T, sub, names, shape, data from results where id in (select max(id) from results '
+           'where dataset = ? and kind = ? and method = ?')
+    args = [dataset, kind, method]
+    if params is not None:
+        sql += ' and params = ?'
+        args.append(params_key(params))
+    con = connect(dbfile)
+    rows = con.execute(sql + ' group by T, sub)', args).fetchall()
+    con.close()
+    return dict(((T, sub), decode(names, shape, data)) for (T, sub, names, shape, data) in rows)
+
+def constants(dbfile, dataset, method, params=None, names=('T', 'C11', 'C12', 'C44')):
+    """ Latest values of columns names (constants) of all temperatures of dataset, sorted by T.
+
+        Return dictionary of arrays."""
+    # Subdirectories (split = 3n) of a temperature are merged, each
+    # record holds the columns of its deformation
+    recs = records(dbfile, dataset, method, params, 'cs')
+    rows = {}
+    for (T, sub) in recs:
+        cols, vals = recs[(T, sub)]
+        row = rows.setdefault(T, {})
+        for jk in range(len(cols)):
+            row[cols[jk]] = vals[jk]
+    temps = sorted(rows, key=float)
+    return dict((name, numpy.array([rows[T].get(name, numpy.nan) for T in temps])) for name in names)
+
+def put_res(dbfile, pathd, method, params, res, split, sub):
+    """ Record the constants in result string res of a fit (avlmp.write_fit). """
+    vals = [float(x) for x in res.strip().strip(',').split(',')]
+    if split == 'n':
+        names = ['T', 'C11', 'C12', 'C44']
+    else:
+        names = {'x': ['T', 'C11'], 'y': ['C12'], 'yz': ['C44']}[sub]
+    put(dbfile, pathd, method, params, names, vals, 'cs')
+
+def load_cs(path, filename, db=None):
+    """ Temperatures, C11, C12 and C44 from path/filename or from store db.
+
+        With db, filename is the method (e.g. 'fitstr', 'cs/moveav') and
+        path the results directory of the dataset."""
+    if db is None:
+        data = numpy.loadtxt(path + filename, delimiter=',', ndmin=2)
+        return data[:,0], data[:,1], data[:,2], data[:,3]
+    cols = constants(db, os.path.basename(os.path.abspath(path)), filename)
+    return cols['T'], cols['C11'], cols['C12'], cols['C44']
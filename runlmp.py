@@ -5,55 +5,169 @@
 #   - Modifies and sets up runs on the computer cluster
 #    
 # Notes:
-#   - init.mod modification needs a template init00.mod 
+#   - init.mod modification needs a template init00.mod, the template
+#       is parsed once and rendered for each parameter set 
+#   - Packed runs - one LAMMPS job with a partition for each parameter
+#       set (e.g. temperature), logs are split back into the run 
+#       directories with unpack
 #
 # Last modified: April 21 2015
 #
 
-import re, os, zipfile, shutil, subprocess
+import re, os, json, random, zipfile, shutil
+import exelmp, reglmp, caslmp
 
 # Functions for modification of init.mod
 #
+# The template is parsed once into a list of lines, lines with 
+# 'variable ... equal' declarations and 'replicate' directives keep 
+# the text before and after their values so new values can be 
+# rendered in memory for any number of parameter sets
+# Comments (also inline) and other lines are kept unchanged
+VARLINE = re.compile(r'^(\s*variable\s+(\S+)\s+equal\s+)(.*?)(\s*)$')
+REPLINE = re.compile(r'^(\s*replicate\s+)(.*?)(\s*)$')
+
+def parse_template(fname):
+    """ Parse template fname into a list of (kind, name, head, value, tail) lines. """
+    # kind - 'variable', 'replicate' or None for any other line
+    model = []
+    with open(fname, 'r') as fp:
+        for line in fp:
+            body = line.rstrip('\r\n')
+            code, sep, comment = body.partition('#')
+            tail = sep + comment + line[len(body):]
+            match = VARLINE.match(code)
+            if match:
+                model.append(('variable', match.group(2), match.group(1), match.group(3), match.group(4) + tail))
+                continue
+            match = REPLINE.match(code)
+            if match:
+                model.append(('replicate', None, match.group(1), match.group(2), match.group(3) + tail))
+                continue
+            model.append((None, None, line, '', ''))
+    return model
+
+def render(model, parameters, n=None):
+    """ Render parsed template model with new parameter values and n replications in each direction. """
+    # Only declared 'equal' variables are substituted, parameters not 
+    # declared in the template are ignored
+    lines = []
+    for (kind, name, head, value, tail) in model:
+        if kind == 'variable' and name in parameters:
+            value = parameters[name]
+        elif kind == 'replicate' and n is not None:
+            value = (n + ' ')*2 + n
+        lines.append(head + value + tail)
+    return ''.join(lines)
+
+def write_init(model, parameters, n, pathT, fname='init.mod'):
+    """ Write init.mod for a new parameter set and number of replications n to pathT. """
+    with open(pathT + fname, 'w') as fpo:
+        fpo.write(render(model, parameters, n))
+
 def mod_init(parameters, pathT):
     """ Include new parameter set in init.mod file. """
-    with open(pathT + 'init0.mod', 'r') as fp:
-       with open(pathT + 'init.mod', 'w') as fpo:
-            lines = fp.readlines()
-            linesOUT = ['\n', '\n']
-            # Substitute parameters in each line
-            for line in lines:
-                linesOUT = sub_input(fp, line, linesOUT, parameters)
-            fpo.write(''.join(linesOUT))
-           
-    
-def sub_input(fp, line, linesOUT, parameters):
-    """ Substitute new parameter values into init.mod file. """
-  	# Find parameters that are to be changed
-    for key in parameters:
-        match = re.search(key, line)
-        if match:
-            # Find if match is a parameter declaration 
-			# this prevents from substituting expressions   
-            mnd = match.end()
-            matchv = re.search('equal', line[mnd:])
-			# If a declaration -- substitute new value                    
-            if matchv:
-                line0 = line[:mnd]
-                line = re.sub("[0-9.]|e-|e[0-9]|e+[0-9]|\n", ' ', line[mnd:])
-                line = line0 + line + parameters[key] + '\n'
-    linesOUT.append(line)
-    return linesOUT		    
+    write_init(parse_template(pathT + 'init0.mod'), parameters, None, pathT)
 
 def num_atoms(n, pathT):
     """ Change number of atoms to use in the simulation. """
-    with open(pathT + 'init00.mod', 'r') as fp:
-        with open(pathT + 'init0.mod', 'w') as fpo: 
-            lines = fp.readlines()
-            for line in lines:
-                fpo.write('replicate\t'+ (n + ' ')*3 if 'replicate' in line else line)
+    write_init(parse_template(pathT + 'init00.mod'), {}, n, pathT, 'init0.mod')
+
+def add_halt(pathT, fname, nevery, sentinel='STOP'):
+    """ Stop the deformation run of fname when file sentinel appears in its directory. """
+    # Inserts fix halt around the last run command (the deformation)
+    # of the in. script, checked every nevery steps - used by monlmp 
+    # to end the run once the elastic constants are converged
+    with open(pathT + fname, 'r') as fp:
+        lines = fp.readlines()
+    irun = [i for i in range(len(lines)) if lines[i].split()[:1] == ['run']][-1]
+    halt = ['variable \thalt equal is_file(' + sentinel + ')\n',
+            'fix \thalt all halt ' + str(nevery) + ' v_halt > 0.0 error soft\n']
+    lines = lines[:irun] + halt + [lines[irun], 'unfix \thalt\n'] + lines[irun+1:]
+    with open(pathT + fname, 'w') as fpo:
+        fpo.write(''.join(lines))
+
+def set_dump(pathT, fname, style='xyz', nevery=None):
+    """ Set the style of the atom position dump of fname, style none removes it. """
+    # nevery - dump interval in steps, None keeps the current interval
+    #   (variable dumpN of init.mod)
+    # The dump of the in. script is 'dump xmol all xyz N movie.xyz', 
+    # trjlmp.py reads the xyz style, other styles are written by 
+    # LAMMPS as dump custom with the atom positions, e.g. style 'bin'
+    # writes LAMMPS binary dump movie.bin
+    with open(pathT + fname, 'r') as fp:
+        lines = fp.readlines()
+    new = []
+    for line in lines:
+        words = line.split()
+        if words[:2] == ['dump', 'xmol']:
+            if style == 'none':
+                continue
+            if nevery is None:
+                nevery = words[4]
+            if style == 'xyz':
+                line = 'dump\txmol all xyz ' + str(nevery) + ' movie.xyz\n'
+            else:
+                line = 'dump\txmol all custom ' + str(nevery) + ' movie.' + style + ' id type x y z\n'
+        elif words[:2] == ['dump_modify', 'xmol'] and style != 'xyz':
+            continue
+        new.append(line)
+    with open(pathT + fname, 'w') as fpo:
+        fpo.write(''.join(new))
 
-def make_main(files, newdir, ensemble, split):
+# Block averaged columns (fix ave/time, see add_ave) in the order of 
+# the output files and their LAMMPS expressions, read with avlmp.read_ave
+AVE_COLS = ['T', 'pxx', 'pyy', 'pzz', 'pxy', 'pxz', 'pyz', 'lx', 'ly', 'lz', 'xy', 'xz', 'yz']
+AVE_EXPR = {'T': 'c_thermo_temp', 'pxx': 'c_thermo_press[1]', 'pyy': 'c_thermo_press[2]', 
+            'pzz': 'c_thermo_press[3]', 'pxy': 'c_thermo_press[4]', 'pxz': 'c_thermo_press[5]', 
+            'pyz': 'c_thermo_press[6]', 'lx': 'v_ave_lx', 'ly': 'v_ave_ly', 'lz': 'v_ave_lz', 
+            'xy': 'v_ave_xy', 'xz': 'v_ave_xz', 'yz': 'v_ave_yz'}
+
+def add_ave(pathT, fname, nevery, nrepeat, prefix='ave', corr=0):
+    """ Write block averages of temperature, pressure tensor and box of every run of fname to prefix.stage.txt. """
+    # Each output row is the average of nrepeat samples taken every nevery 
+    # steps (fix ave/time), stages are numbered as in the log (minimize
+    # and run commands from 0), read with avlmp.read_ave
+    # corr - if > 0 also the autocorrelation functions of the shear 
+    #   stresses up to corr lags of nevery steps are written to 
+    #   cor.stage.txt (fix ave/correlate), read with avlmp.read_corr
+    with open(pathT + fname, 'r') as fp:
+        lines = fp.readlines()
+    new = []
+    stage = 0
+    defined = False
+    cols = ' '.join([AVE_EXPR[var] for var in AVE_COLS])
+    for line in lines:
+        words = line.split()[:1]
+        if words == ['run']:
+            if not defined:
+                new += ['variable \tave_' + var + ' equal ' + var + '\n' for var in ['lx', 'ly', 'lz', 'xy', 'xz', 'yz']]
+                defined = True
+            new.append('fix \tave all ave/time ' + str(nevery) + ' ' + str(nrepeat) + ' ' + str(nevery*nrepeat) + ' '
+                       + cols + ' file ' + prefix + '.' + str(stage) + '.txt\n')
+            if corr:
+                new.append('fix \tcor all ave/correlate ' + str(nevery) + ' ' + str(corr) + ' ' + str(nevery*corr) + ' '
+                           + 'c_thermo_press[4] c_thermo_press[5] c_thermo_press[6] type auto ave running '
+                           + 'file cor.' + str(stage) + '.txt\n')
+            new.append(line)
+            new.append('unfix \tave\n')
+            if corr:
+                new.append('unfix \tcor\n')
+        else:
+            new.append(line)
+        if words in (['run'], ['minimize']):
+            stage += 1
+    with open(pathT + fname, 'w') as fpo:
+        fpo.write(''.join(new))
+
+def make_main(files, newdir, ensemble, split, store=False):
     """ Create main directory for LAMMPS simulations of ensemble with type split. """
+    # store - keep the input files in a content addressed store in 
+    #   newdir/store/ instead of a zip file, the in. scripts are copied
+    #   to newdir and the manifest name (inputs.json) is returned 
+    #   instead of the zip file name, see caslmp.py
+    if store:
+        return make_store(files, newdir, ensemble, split)
     # Remove old (if exists) and create new zipfile of type ensebmble for given split choice
     if split == 'n': 
         inname = 'in.' + 'elastic_' + ensemble
@@ -83,16 +197,52 @@ def make_main(files, newdir, ensemble, split):
     shutil.copy(zipname,newdir)    
     return zipname
 
-def make_dirs(path, newdir, T, zipname, ensemble, split):
+def in_names(ensemble, split):
+    """ Names of in. scripts for ensemble and split. """
+    if split == 'n':
+        return ['in.' + 'elastic_' + ensemble]
+    elif split == '3n':
+        return ['in.' + 'elastic_' + ensemble + '_' + sub for sub in ['x', 'y', 'yz']]
+
+# Executable scripts (e.g. submit_lammps_parallel.pl) are not stored,
+# stored files are read-only and shared, they are copied to each run 
+# directory like the in. scripts and made executable by make_exec
+SCRIPTS = ('.pl', '.sh', '.csh')
+
+def make_store(files, newdir, ensemble, split):
+    """ Create main directory with content addressed store of input files. """
+    os.mkdir(newdir)
+    scripts = [fname for fname in files if fname.endswith(SCRIPTS)]
+    caslmp.make_store(newdir + '/store/', [fname for fname in files if fname not in scripts], newdir + '/inputs.json')
+    for inname in in_names(ensemble, split) + scripts:
+        shutil.copy(inname, newdir)
+    return 'inputs.json'
+
+def get_inputs(pathR, zipname, ensemble, split, pathd, store=False):
+    """ Put the input files of results directory pathR into run directory pathd. """
+    if store:
+        # Link stored inputs and copy the in. and executable scripts
+        keys = caslmp.load_manifest(pathR + zipname)
+        caslmp.link(pathR + 'store/', keys, pathd)
+        scripts = [name for name in os.listdir(pathR) if name.endswith(SCRIPTS)]
+        for inname in in_names(ensemble, split) + scripts:
+            shutil.copy(pathR + inname, pathd)
+    else:
+        # Unzip the zip file with scripts in the run directory
+        zf = zipfile.ZipFile(pathR + zipname)
+        zf.extractall(pathd)
+
+def make_dirs(path, newdir, T, zipname, ensemble, split, reg=None, params=None, store=False):
     """ Create a directory for simulation at temperature T and subdirs if split is 3n. """
+    # reg - optional run registry file, see reglmp.py, each run 
+    #   directory is recorded with the parameter set params
+    # store - zipname is the manifest of the input store, stored files
+    #   are linked into every run directory, see make_main
     # Create the T directory
     dirname = 'T_'+ T
     pathT = path + newdir + '/' + dirname + '/'
     os.mkdir(pathT)
-    # Unzip the zip file with scripts in the T directory
-    zippath = path + newdir + '/' + zipname
-    zf = zipfile.ZipFile(zippath)
-    zf.extractall(pathT)
+    get_inputs(path + newdir + '/', zipname, ensemble, split, pathT, store)
     # Modify according to split - create 3 directories and mv appropriate in. files into them 
     if split == '3n':
         subdir = ['x', 'y', 'yz']
@@ -101,17 +251,34 @@ def make_dirs(path, newdir, T, zipname, ensemble, split):
             os.mkdir(pathsub)
             fname = 'in.' + 'elastic_' + ensemble + '_' + sub
             shutil.move(pathT + fname, pathsub)
+            if reg is not None:
+                reglmp.add_run(reg, newdir, T, sub, pathsub, params)
+    elif reg is not None:
+        reglmp.add_run(reg, newdir, T, None, pathT, params)
 
-def lmp_sub(p, T, pathT, split, ensemble):
-    """ Submit the cluster submission script. """
+def lmp_sub(p, T, pathT, split, ensemble, executor=None, reg=None):
+    """ Submit the jobs for temperature T with executor (default - cluster submission script). 
+
+        Return the list of submitted jobs."""
+    # executor - exelmp.SGEExecutor (default) or exelmp.LocalExecutor,
+    #   see exelmp.py
+    # reg - optional run registry file, the job id, seed and status
+    #   are recorded for each job, see reglmp.py
+    if executor is None:
+        executor = exelmp.SGEExecutor()
+    # Jobs are recorded as soon as they are submitted, before a local
+    # job can end and record its final status
+    register = None
+    if reg is not None:
+        register = lambda job: reglmp.set_job(reg, job)
+    jobs = []
     if split == 'n': 
         # Name and submit job in T_ directory
         # Make files executable
-        subprocess.call(['chmod -R 700 *'], shell=True, cwd=pathT)
+        make_exec(pathT)
         fname = 'in.' + 'elastic_' + ensemble 
         jobname = 'jobT' + T      
-        sub_command = 'submit_lammps_parallel.pl' + ' ' + fname + ' ' + p + ' '  + jobname + ' ' + '| qsub'
-        subprocess.call([sub_command], shell=True, cwd=pathT)
+        jobs.append(executor.submit(exelmp.Job(jobname, fname, p, pathT), register))
     elif split == '3n':
         # Copy all files from /.../Ti/ to each subdirectory
         #   appropriate in. files are mv there in make_dirs
@@ -122,9 +289,106 @@ def lmp_sub(p, T, pathT, split, ensemble):
             pathsub = pathT + sub + '/'
             fname = 'in.' + 'elastic_' + ensemble + '_' + sub 
             jobname = 'jobT' + T + '_' + sub     
-            sub_command = 'submit_lammps_parallel.pl' + ' ' + fname + ' ' + p + ' '  + jobname + ' ' + '| qsub'
-            subprocess.call(['cp *.* '+ pathsub], shell=True, cwd=pathT)
-            subprocess.call(['chmod -R 700 */'], shell=True, cwd=pathT)
-            subprocess.call([sub_command], shell=True, cwd=pathsub)
+            share_inputs(pathT, pathsub)
+            make_exec(pathsub)
+            jobs.append(executor.submit(exelmp.Job(jobname, fname, p, pathsub), register))
+    return jobs
+
+def share_inputs(pathT, pathsub):
+    """ Copy input files (names with an extension) from pathT to pathsub, stored inputs are linked. """
+    for name in os.listdir(pathT):
+        fname = pathT + name
+        if '.' not in name[1:-1] or not os.path.isfile(fname):
+            continue
+        if os.path.lexists(pathsub + name):
+            os.remove(pathsub + name)
+        if caslmp.is_shared(fname):
+            if os.path.islink(fname):
+                os.symlink(os.path.realpath(fname), pathsub + name)
+            else:
+                os.link(fname, pathsub + name)
+        else:
+            shutil.copy(fname, pathsub)
+
+def make_exec(pathd):
+    """ Make files in pathd executable by the owner, stored inputs are left read-only. """
+    for name in os.listdir(pathd):
+        fname = pathd + name
+        if os.path.isfile(fname) and not caslmp.is_shared(fname):
+            os.chmod(fname, 0o700)
+
+# Functions for packed runs
+#
+# Small systems do not scale to many cores, a packed run runs many 
+# parameter sets side by side as LAMMPS partitions (-partition MxQ, 
+# M partitions with Q cores each) of a single job. Parameters that 
+# differ between partitions are world-style variables in init.mod, each
+# partition has its own random seed (pseed) and dump file. LAMMPS writes 
+# log.lammps.k for partition k, unpack moves it to the run directory 
+# of the parameter set so avlmp and parlmp see the usual layout.
+
+def make_pack(path, newdir, name, zipname, ensemble, store=False):
+    """ Create directory name for a packed run in results directory newdir. """
+    pathP = path + newdir + '/' + name + '/'
+    os.mkdir(pathP)
+    get_inputs(path + newdir + '/', zipname, ensemble, 'n', pathP, store)
+    return pathP
+
+def write_pack(model, parameters, n, units, pathP, ensemble, fname='init.mod'):
+    """ Write init.mod and the in. script of packed run pathP, partition k uses the values of units[k]. """
+    # units - list of (pathd, values), pathd - run directory of the 
+    #   partition (see unpack), values - dictionary of parameters that
+    #   differ between partitions (e.g. Tf, T0, af), same keys for all
+    # Other parameters and n are rendered as in write_init
+    names = sorted(units[0][1])
+    lines = []
+    for line in render(model, parameters, n).splitlines(True):
+        match = VARLINE.match(line.partition('#')[0])
+        if match and match.group(2) in names:
+            vals = [str(values[match.group(2)]) for (pathd, values) in units]
+            line = re.sub(r'\bequal\b', 'world', match.group(1), 1) + ' '.join(vals) + '\n'
+        lines.append(line)
+    seeds = [random.randint(1, 999999) for unit in units]
+    lines.append('\n# Packed run - partition index and random seeds\n')
+    lines.append('variable part world ' + ' '.join([str(k) for k in range(len(units))]) + '\n')
+    lines.append('variable pseed world ' + ' '.join([str(seed) for seed in seeds]) + '\n')
+    with open(pathP + fname, 'w') as fpo:
+        fpo.write(''.join(lines))
+    # Per partition seed and dump file in the in. script
+    inname = in_names(ensemble, 'n')[0]
+    with open(pathP + inname, 'r') as fp:
+        text = fp.read()
+    text = text.replace('${seed}', '${pseed}').replace('movie.xyz', 'movie.${part}.xyz')
+    with open(pathP + inname, 'w') as fpo:
+        fpo.write(text)
+    with open(pathP + 'pack.json', 'w') as fp:
+        json.dump({'dirs': [pathd for (pathd, values) in units], 'values': [values for (pathd, values) in units],
+                   'seeds': seeds}, fp, indent=1)
+
+def pack_sub(q, name, pathP, ensemble, executor=None):
+    """ Submit packed run pathP with q cores per partition, return the job. """
+    with open(pathP + 'pack.json', 'r') as fp:
+        npart = len(json.load(fp)['dirs'])
+    if executor is None:
+        executor = exelmp.SGEExecutor()
+    make_exec(pathP)
+    args = '-partition ' + str(npart) + 'x' + str(q)
+    job = exelmp.Job(name, in_names(ensemble, 'n')[0], npart*int(q), pathP, args)
+    return executor.submit(job)
 
+def unpack(pathP):
+    """ Move logs and dumps of the partitions of packed run pathP to their run directories.
 
+        Return the run directories."""
+    with open(pathP + 'pack.json', 'r') as fp:
+        pack = json.load(fp)
+    for k, pathd in enumerate(pack['dirs']):
+        if not os.path.isdir(pathd):
+            os.makedirs(pathd)
+        for (src, dst) in [('log.lammps.' + str(k), 'log.lammps'), ('screen.' + str(k), 'screen'),
+                           ('movie.' + str(k) + '.xyz', 'movie.xyz')]:
+            if os.path.isfile(pathP + src):
+                shutil.move(pathP + src, pathd + dst)
+        with open(pathd + 'partition.json', 'w') as fp:
+            json.dump({'pack': pathP, 'partition': k, 'values': pack['values'][k], 'seed': pack['seeds'][k]}, fp)
+    return pack['dirs']
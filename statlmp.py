@@ -0,0 +1,273 @@
+#!/usr/bin/python
+
+# Statistics module for lammps thermo data:
+#   - Vectorized estimators that work on many columns
+#       (variables and simulation stages) at once
+#
+# Notes:
+#   - Columns of unequal length are stacked into a 2D array
+#       padded with NaN, NaN entries are ignored
+#
+# Last modified: October 18 2026
+#
+
+import numpy
+from scipy import special, signal
+
+def stack_cols(cols):
+    """ Stack 1D arrays of unequal length as NaN padded columns of a 2D array. """
+    nmax = max([len(col) for col in cols])
+    out = numpy.empty((nmax, len(cols)))
+    out.fill(numpy.nan)
+    for k in range(len(cols)):
+        out[:len(cols[k]),k] = cols[k]
+    return out
+
+def stack_windows(x, bounds):
+    """ Stack slices x[b0:b1] for (b0, b1) in bounds as NaN padded columns. """
+    return stack_cols([x[b0:b1] for (b0, b1) in bounds])
+
+def tfit(x, tol=1.0e-6, maxiter=500):
+    """ Fit Student t distribution to each column of x.
+
+        Return location, scale, degrees of freedom and standard error of location."""
+    # ECME algorithm for the t distribution (Liu and Rubin, 1995) run for all
+    # columns simultaneously, started from the median and scaled MAD:
+    #   - location and scale from the EM update
+    #   - degrees of freedom nu from a Newton step on the likelihood in 1/nu
+    # Location and scale match scipy.stats.t.fit prm[1] and prm[2],
+    # the standard error of the location is from the Fisher information
+    # and assumes uncorrelated samples
+    x = numpy.asarray(x, dtype=float)
+    flat = x.ndim == 1
+    if flat:
+        x = x[:,None]
+    # Missing (NaN) entries get zero weight
+    msk = ~numpy.isnan(x)
+    n = numpy.sum(msk, axis=0)
+    # Warm start
+    mu = numpy.nanmedian(x, axis=0)
+    sigma = 1.4826*numpy.nanmedian(numpy.abs(x-mu), axis=0)
+    sigma = numpy.where(sigma > 0.0, sigma, numpy.nanstd(x, axis=0))
+    sigma = numpy.where(sigma > 0.0, sigma, 1.0)
+    nu = numpy.repeat(10.0, x.shape[1])
+    x = numpy.where(msk, x, mu)
+    # Columns are dropped from the iteration once converged, constant
+    # columns are converged from the start
+    act = numpy.flatnonzero(numpy.nanmax(x, axis=0) > numpy.nanmin(x, axis=0))
+    for it in range(maxiter):
+        if len(act) == 0:
+            break
+        xa, ma, na = x[:,act], msk[:,act], n[act]
+        mua, siga, nua = mu[act], sigma[act], nu[act]
+        # E-step - weights of each sample
+        d2 = ((xa-mua)/siga)**2
+        w = ma*((nua+1.0)/(nua+d2))
+        # M-step - location and scale
+        mu_new = numpy.sum(w*xa, axis=0)/numpy.sum(w, axis=0)
+        sigma_new = numpy.sqrt(numpy.sum(w*(xa-mu_new)**2, axis=0)/na)
+        sigma_new = numpy.where(sigma_new > 0.0, sigma_new, 1.0)
+        # Degrees of freedom for the new location and scale
+        d2 = ma*((xa-mu_new)/sigma_new)**2
+        nu_new = tdof(d2, na, nua)
+        # nu is poorly determined for nearly normal data and has
+        # little effect on the location - a loose tolerance on 1/nu
+        conv = numpy.abs(mu_new-mua) <= tol*sigma_new
+        conv &= numpy.abs(sigma_new-siga) <= tol*sigma_new
+        conv &= numpy.abs(1.0/nu_new-1.0/nua) <= 1.0e-3/nua + 1.0e-6
+        mu[act], sigma[act], nu[act] = mu_new, sigma_new, nu_new
+        act = act[~conv]
+    # Constant columns have zero scale
+    sigma = numpy.where(numpy.nanmax(x, axis=0) > numpy.nanmin(x, axis=0), sigma, 0.0)
+    se = sigma*numpy.sqrt((nu+3.0)/((nu+1.0)*n))
+    if flat:
+        return mu[0], sigma[0], nu[0], se[0]
+    return mu, sigma, nu, se
+
+def tdof(d2, n, nu, numin=0.05, numax=1.0e8):
+    """ Newton update of t distribution degrees of freedom nu for squared standardized samples d2. """
+    # d2 must be zero for missing entries, n is the number of samples
+    # Mean log-likelihood L(nu) and its derivatives in nu from one pass
+    # over d2, the step is taken in s = 1/nu which is well behaved
+    # for nearly normal data (nu -> infinity), the result is clipped
+    # to [numin, numax]
+    A = numpy.sum(numpy.log1p(d2/nu), axis=0)/n
+    B = numpy.sum(d2/(nu*(nu+d2)), axis=0)/n
+    C = numpy.sum(d2*(2.0*nu+d2)/(nu*(nu+d2))**2, axis=0)/n
+    dL = 0.5*(special.digamma(0.5*(nu+1.0))-special.digamma(0.5*nu)) - 0.5/nu - 0.5*A + 0.5*(nu+1.0)*B
+    d2L = 0.25*(special.polygamma(1, 0.5*(nu+1.0))-special.polygamma(1, 0.5*nu)) + 0.5/nu**2 + B - 0.5*(nu+1.0)*C
+    # Derivatives in s = 1/nu
+    dLs = -dL*nu**2
+    d2Ls = d2L*nu**4 + 2.0*dL*nu**3
+    s = 1.0/nu
+    # Newton step where L is concave in s, otherwise a bounded step uphill
+    step = numpy.where(d2Ls < 0.0, -dLs/numpy.where(d2Ls < 0.0, d2Ls, -1.0), numpy.sign(dLs)*0.5*s)
+    step = numpy.clip(step, -0.9*s, s)
+    s = numpy.clip(s+step, 1.0/numax, 1.0/numin)
+    return 1.0/s
+
+def movav(x, window):
+    """ Moving average of each column of x over window rows. 
+
+        Same as numpy.convolve(x, numpy.repeat(1.0, window)/window, 'valid')."""
+    # Running sums from a cumulative sum, O(n) for any window, the first
+    # row is subtracted to limit round-off in long columns
+    x = numpy.asarray(x, dtype=float)
+    window = int(window)
+    n = len(x)
+    if n < window:
+        return numpy.zeros((0,) + x.shape[1:])
+    ref = x[0]
+    c = numpy.zeros((n+1,) + x.shape[1:])
+    numpy.cumsum(x-ref, axis=0, out=c[1:])
+    return (c[window:]-c[:-window])/window + ref
+
+def movav_chunks(x, window, chunk=100000):
+    """ Generate the moving average of columns of x in pieces of at most chunk rows. """
+    # Only chunk + window - 1 rows of x are held at a time, x can be 
+    # a memory mapped array
+    window = int(window)
+    nout = len(x) - window + 1
+    for k in range(0, max(nout, 0), chunk):
+        yield movav(x[k:min(k+chunk, nout)+window-1], window)
+
+def ewmav(x, window):
+    """ Exponential moving average of each column of x with span window. """
+    # y[k] = a*x[k] + (1-a)*y[k-1], a = 2/(window+1), started from x[0]
+    x = numpy.asarray(x, dtype=float)
+    a = 2.0/(float(window)+1.0)
+    return signal.lfilter([a], [1.0, a-1.0], x, axis=0, zi=(1.0-a)*x[:1])[0]
+
+def blockav(x, block):
+    """ Averages of each column of x over consecutive blocks of block rows. """
+    # Incomplete block at the end is discarded
+    x = numpy.asarray(x, dtype=float)
+    block = int(block)
+    nb = len(x)//block
+    return x[:nb*block].reshape((nb, block) + x.shape[1:]).mean(axis=1)
+
+def mean_movav(x, window, method='box', chunk=100000):
+    """ Mean over moving averages of each column of x. 
+
+        Methods: box - moving average, exp - exponential, block - block averages."""
+    # The box moving average is streamed so the full output is 
+    # never stored
+    if method == 'box':
+        total = 0.0
+        nout = 0
+        for part in movav_chunks(x, window, chunk):
+            total = total + numpy.sum(part, axis=0)
+            nout += len(part)
+    elif method == 'exp':
+        part = ewmav(x, window)
+        total = numpy.sum(part, axis=0)
+        nout = len(part)
+    elif method == 'block':
+        part = blockav(x, window)
+        total = numpy.sum(part, axis=0)
+        nout = len(part)
+    else:
+        raise ValueError('Unknown moving average method: ' + method)
+    # Columns shorter than window have no averages
+    if nout == 0:
+        return numpy.nan*numpy.ones(numpy.shape(x)[1:])
+    return total/nout
+
+class LinFit:
+    """ Online least squares fit of columns of y against x for time correlated data. """
+    # Sums of x, y, x^2, xy and y^2 are accumulated in blocks of consecutive
+    # rows, when there are more than 2*nblocks blocks, neighbouring blocks
+    # are merged and the block length doubles - memory does not depend on 
+    # the number of rows. Standard errors of the slopes are from the sums
+    # of the least squares scores over blocks (batch means), which accounts
+    # for the time correlation once blocks are longer than the correlation 
+    # time of the data. Values are shifted by the first row to limit 
+    # round-off in the sums.
+    def __init__(self, ny=1, nblocks=32, block=16):
+        self.ny = ny
+        self.nblocks = nblocks
+        self.block = block
+        # Block sums - columns: n, x, x^2, y (ny), xy (ny), y^2 (ny)
+        self.sums = numpy.zeros((0, 3+3*ny))
+        # Rows of the incomplete block
+        self.bufx = numpy.zeros(0)
+        self.bufy = numpy.zeros((0, ny))
+        self.x0 = None
+        self.y0 = None
+
+    def add(self, x, y):
+        """ Add rows x (n) and y (n, ny) to the fit. """
+        x = numpy.asarray(x, dtype=float).reshape(-1)
+        y = numpy.asarray(y, dtype=float).reshape(len(x), self.ny)
+        if len(x) == 0:
+            return
+        if self.x0 is None:
+            self.x0 = x[0]
+            self.y0 = y[0].copy()
+        x = numpy.concatenate((self.bufx, x-self.x0))
+        y = numpy.vstack((self.bufy, y-self.y0))
+        nb = len(x)//self.block
+        nfull = nb*self.block
+        if nb:
+            self.sums = numpy.vstack((self.sums, self.block_sums(x[:nfull], y[:nfull], nb)))
+        self.bufx = x[nfull:]
+        self.bufy = y[nfull:]
+        while len(self.sums) > 2*self.nblocks:
+            # Merge neighbouring blocks
+            nm = len(self.sums)//2
+            merged = self.sums[:2*nm:2] + self.sums[1:2*nm:2]
+            self.sums = numpy.vstack((merged, self.sums[2*nm:]))
+            self.block *= 2
+
+    def block_sums(self, x, y, nb):
+        """ Sums over nb equal blocks of shifted rows x and y. """
+        ny = self.ny
+        x = x.reshape(nb, -1)
+        y = y.reshape(nb, -1, ny)
+        out = numpy.empty((nb, 3+3*ny))
+        out[:,0] = x.shape[1]
+        out[:,1] = x.sum(axis=1)
+        out[:,2] = (x*x).sum(axis=1)
+        out[:,3:3+ny] = y.sum(axis=1)
+        out[:,3+ny:3+2*ny] = (x[:,:,None]*y).sum(axis=1)
+        out[:,3+2*ny:] = (y*y).sum(axis=1)
+        return out
+
+    def fit(self):
+        """ Return slopes, intercepts, standard errors of slopes and statistical inefficiencies. """
+        ny = self.ny
+        # All blocks including the incomplete one
+        sums = self.sums
+        if len(self.bufx):
+            sums = numpy.vstack((sums, self.block_sums(self.bufx, self.bufy, 1)))
+        nk = sums[:,0]
+        Sxk = sums[:,1]
+        Sxxk = sums[:,2]
+        Syk = sums[:,3:3+ny]
+        Sxyk = sums[:,3+ny:3+2*ny]
+        n, Sx, Sxx = nk.sum(), Sxk.sum(), Sxxk.sum()
+        Sy, Sxy, Syy = Syk.sum(axis=0), Sxyk.sum(axis=0), sums[:,3+2*ny:].sum(axis=0)
+        xm = Sx/n
+        ym = Sy/n
+        sxx = Sxx - n*xm*xm
+        sxy = Sxy - n*xm*ym
+        syy = Syy - n*ym*ym
+        b = sxy/sxx
+        a = ym - b*xm
+        # Uncorrelated standard errors
+        s2 = (syy - b*sxy)/max(n-2.0, 1.0)
+        se0 = numpy.sqrt(numpy.maximum(s2, 0.0)/sxx)
+        # Block scores sum((x - xm)*(y - a - b*x)) and batch means errors
+        U = (Sxyk - a*Sxk[:,None] - b*Sxxk[:,None] - xm*Syk + (a*xm)*nk[:,None] + (b*xm)*Sxk[:,None])
+        nb = len(sums)
+        if nb > 2:
+            se = numpy.sqrt(nb/(nb-2.0)*numpy.sum(U*U, axis=0))/sxx
+        else:
+            se = numpy.nan*numpy.ones(ny)
+        # Intercept in the original (unshifted) variables
+        a = a + self.y0 - b*self.x0
+        return b, a, se, (se/se0)**2
+
+    def nrows(self):
+        """ Number of rows added so far. """
+        return int(self.sums[:,0].sum()) + len(self.bufx)
@@ -3,7 +3,8 @@
 # Script to generate submit script for running parallel LAMMPS simulations
 #	modified to include different random seeds in each simulation
 #
-# Usage: submit_lammps_parallel.pl in.file-name number-of-processors job-name | qsub
+# Usage: submit_lammps_parallel.pl in.file-name number-of-processors job-name [seed] | qsub
+#	without seed the random seed is taken from the clock
 #
 # Last modified: submit_lammps_parallel.pl
 #
@@ -20,6 +21,7 @@ my $datestring = int(time*1000000);
 my $datestring2 = "$datestring";
 @datestring3 = split(//, $datestring2);
 my $tme = int(join("", @datestring3[-6..-1]));
+if (@ARGV){$tme = shift(@ARGV);}
 
 print "\#!/bin/csh
 
@@ -0,0 +1,186 @@
+#!/usr/bin/python
+
+# Synthetic lammps output for testing and benchmarks:
+#   - Writes log.lammps files with the thermo layout of potential.mod
+#       (thermo_style custom step temp press ke pe pxx ... yz) and the
+#       stages of in.elastic_nvt - minimize, NVT and deformation in x
+#       and xy
+#   - Stresses are linear in the strain with known elastic constants
+#       plus correlated (AR(1)) noise
+#   - NPT logs of in.elastic_fluct (write_fluct) with box fluctuations
+#       of known elastic constants for the strain fluctuation method
+#
+# Notes:
+#   - Deformation as in in.elastic_nvt, x with strain rate erate and
+#       xy with erate/2, so the constants are recovered by all methods
+#       of avlmp and ellmp with split = n and dirC44 = 'xy'
+#   - The strain at the end of the deformation stage is given, the
+#       strain rate follows from the number of rows, the thermo
+#       interval and the time step
+#   - Rows are generated and written in chunks, any number of rows
+#       needs constant memory
+#
+# Last modified: October 18 2026
+#
+
+import numpy
+from scipy import signal
+
+# Thermo keywords as printed by LAMMPS for potential.mod
+HEADER = ['Step', 'Temp', 'Press', 'KinEng', 'PotEng', 'Pxx', 'Pyy', 'Pzz', 'Pxy', 'Pxz', 'Pyz',
+          'Lx', 'Ly', 'Lz', 'Xy', 'Xz', 'Yz']
+# Boltzmann constant, eV/K
+KB = 8.617333262e-5
+
+class Noise:
+    """ Correlated Gaussian noise with standard deviation sigma and correlation time tau (rows). """
+    # AR(1) process x_i = phi*x_(i-1) + sqrt(1-phi^2)*sigma*e_i, filter
+    # state is kept between chunks
+    def __init__(self, sigma, tau, ncol, rng):
+        self.sigma = numpy.asarray(sigma, dtype=float)
+        self.phi = numpy.exp(-1.0/tau) if tau > 0 else 0.0
+        self.rng = rng
+        self.zi = self.sigma*rng.standard_normal(ncol)*self.phi
+
+    def draw(self, n):
+        """ Next n rows of noise. """
+        e = self.rng.standard_normal((n, len(self.zi)))*self.sigma*numpy.sqrt(1.0 - self.phi**2)
+        x, zf = signal.lfilter([1.0], [1.0, -self.phi], e, axis=0, zi=self.zi[None,:])
+        self.zi = zf[0]
+        return x
+
+def write_log(fname, nrows, C=(250.0, 150.0, 125.0), T=300.0, L0=35.2, strain=0.05, every=1,
+              dt=0.5e-3, nmin=20, psigma=500.0, tsigma=5.0, tau=20.0, natoms=4000, seed=None, chunk=100000):
+    """ Write synthetic log fname with about nrows thermo rows (NVT and deformation stage each nrows/2).
+
+        Return dictionary with the planted values and stage steps."""
+    # C - C11, C12, C44 in GPa
+    # psigma, tsigma - noise of the pressure components (bar) and of the
+    #   temperature (K), tau - correlation time of the noise in rows
+    rng = numpy.random.default_rng(seed)
+    n1 = max(nrows//2, 2)
+    n2 = max(nrows - n1, 2)
+    erate = strain/(n2*every*dt)
+    info = {'C11': C[0], 'C12': C[1], 'C44': C[2], 'T': T, 'L0': L0, 'strain': strain,
+            'erate': erate, 'every': every, 'dt': dt, 'rows': nmin + n1 + n2 + 2}
+    noise = Noise([tsigma] + [psigma]*6, tau, 7, rng)
+    with open(fname, 'w') as fp:
+        fp.write('LAMMPS (synthetic log, synlmp.py)\n')
+        fp.write('Setting up cg style minimization ...\n')
+        fp.write(' '.join(HEADER) + '\n')
+        # Minimization - box relaxation towards L0, no thermal motion
+        s = numpy.arange(nmin)
+        rows = numpy.zeros((nmin, len(HEADER)))
+        rows[:,0] = s
+        rows[:,4] = -4.45*natoms*(1.0 + 1e-3*numpy.exp(-s/5.0))
+        rows[:,11:14] = (L0*(1.0 - 1e-3*numpy.exp(-s/5.0)))[:,None]
+        rows[:,[2,5,6,7]] = 1e3*numpy.exp(-s/5.0)[:,None]
+        write_rows(fp, rows)
+        fp.write('Loop time of 0.1 on 1 procs for %d steps with %d atoms\n\n' % (nmin-1, natoms))
+        step0 = nmin - 1
+        # NVT - fixed box, stresses fluctuate around zero
+        fp.write('Setting up Verlet run ...\n')
+        fp.write(' '.join(HEADER) + '\n')
+        info['stage1'] = [step0, step0 + n1*every]
+        write_stage(fp, step0, n1, every, dt, 0.0, C, T, L0, natoms, noise, rng, chunk)
+        fp.write('Loop time of 1.0 on 1 procs for %d steps with %d atoms\n\n' % (n1*every, natoms))
+        step0 += n1*every
+        # Deformation in x and xy
+        fp.write('Setting up Verlet run ...\n')
+        fp.write(' '.join(HEADER) + '\n')
+        info['stage2'] = [step0, step0 + n2*every]
+        write_stage(fp, step0, n2, every, dt, erate, C, T, L0, natoms, noise, rng, chunk)
+        fp.write('Loop time of 1.0 on 1 procs for %d steps with %d atoms\n\n' % (n2*every, natoms))
+        fp.write('Total wall time: 0:00:02\n')
+    return info
+
+def write_stage(fp, step0, n, every, dt, erate, C, T, L0, natoms, noise, rng, chunk):
+    """ Write n+1 thermo rows of a run stage starting at time step step0. """
+    # Strain eta = erate*t in x, engineering shear strain erate/2*t in xy
+    for i0 in range(0, n+1, chunk):
+        k = numpy.arange(i0, min(i0+chunk, n+1))
+        m = len(k)
+        eta = erate*k*every*dt
+        x = noise.draw(m)
+        rows = numpy.zeros((m, len(HEADER)))
+        rows[:,0] = step0 + k*every
+        rows[:,1] = T + x[:,0]
+        rows[:,5] = -C[0]*1e4*eta + x[:,1]
+        rows[:,6] = -C[1]*1e4*eta + x[:,2]
+        rows[:,7] = -C[1]*1e4*eta + x[:,3]
+        rows[:,8] = -C[2]*1e4*0.5*eta + x[:,4]
+        rows[:,9] = x[:,5]
+        rows[:,10] = x[:,6]
+        rows[:,2] = numpy.mean(rows[:,5:8], axis=1)
+        rows[:,3] = 1.5*natoms*KB*rows[:,1]
+        rows[:,4] = -4.45*natoms + 1.5*natoms*KB*T + 0.01*rng.standard_normal(m)
+        rows[:,11] = L0*(1.0 + eta)
+        rows[:,12] = L0
+        rows[:,13] = L0
+        rows[:,14] = 0.5*eta*L0
+        write_rows(fp, rows)
+
+def write_rows(fp, rows):
+    """ Write thermo rows in the LAMMPS format. """
+    fmt = '%10d ' + ' '.join(['%.8g']*(rows.shape[1]-1))
+    numpy.savetxt(fp, rows, fmt=fmt)
+
+def write_fluct(fname, nrows, C=(250.0, 150.0, 125.0), T=300.0, L0=35.2, every=1, nmin=20, 
+                tau=20.0, natoms=4000, seed=None, chunk=100000):
+    """ Write synthetic NPT log fname of in.elastic_fluct with about nrows thermo rows (two stages).
+
+        Return dictionary with the planted values."""
+    # Voigt strains are Gaussian with covariance kT/V C^-1 (cubic C), 
+    # the box is the upper triangular h with h^T h = h0^T (I + 2e) h0
+    rng = numpy.random.default_rng(seed)
+    Cv = numpy.zeros((6, 6))
+    Cv[:3,:3] = C[1]
+    Cv[range(3), range(3)] = C[0]
+    Cv[range(3, 6), range(3, 6)] = C[2]
+    cov = 1.380649e-2*T/L0**3*numpy.linalg.inv(Cv)
+    lc = numpy.linalg.cholesky(cov)
+    noise = Noise([1.0]*7, tau, 7, rng)
+    n1 = max(nrows//2, 2)
+    n2 = max(nrows - n1, 2)
+    info = {'C11': C[0], 'C12': C[1], 'C44': C[2], 'T': T, 'L0': L0, 'every': every, 'rows': nmin + n1 + n2 + 2}
+    with open(fname, 'w') as fp:
+        fp.write('LAMMPS (synthetic log, synlmp.py)\n')
+        fp.write('Setting up cg style minimization ...\n')
+        fp.write(' '.join(HEADER) + '\n')
+        rows = numpy.zeros((nmin, len(HEADER)))
+        rows[:,0] = numpy.arange(nmin)
+        rows[:,11:14] = L0
+        write_rows(fp, rows)
+        fp.write('Loop time of 0.1 on 1 procs for %d steps with %d atoms\n\n' % (nmin-1, natoms))
+        step0 = nmin - 1
+        for (stage, n) in ((1, n1), (2, n2)):
+            fp.write('Setting up Verlet run ...\n')
+            fp.write(' '.join(HEADER) + '\n')
+            info['stage' + str(stage)] = [step0, step0 + n*every]
+            for i0 in range(0, n+1, chunk):
+                k = numpy.arange(i0, min(i0+chunk, n+1))
+                x = noise.draw(len(k))
+                e = numpy.dot(x[:,1:], lc.T)
+                # Symmetric strain tensors and the upper triangular boxes
+                E = numpy.zeros((len(k), 3, 3))
+                E[:,[0, 1, 2], [0, 1, 2]] = e[:,:3]
+                E[:,1,2] = E[:,2,1] = 0.5*e[:,3]
+                E[:,0,2] = E[:,2,0] = 0.5*e[:,4]
+                E[:,0,1] = E[:,1,0] = 0.5*e[:,5]
+                U = numpy.transpose(numpy.linalg.cholesky(numpy.eye(3) + 2.0*E), (0, 2, 1))*L0
+                rows = numpy.zeros((len(k), len(HEADER)))
+                rows[:,0] = step0 + k*every
+                rows[:,1] = T + 5.0*x[:,0]
+                rows[:,3] = 1.5*natoms*KB*rows[:,1]
+                rows[:,4] = -4.45*natoms + 1.5*natoms*KB*T
+                rows[:,11] = U[:,0,0]
+                rows[:,12] = U[:,1,1]
+                rows[:,13] = U[:,2,2]
+                rows[:,14] = U[:,0,1]
+                rows[:,15] = U[:,0,2]
+                rows[:,16] = U[:,1,2]
+                write_rows(fp, rows)
+            fp.write('Loop time of 1.0 on 1 procs for %d steps with %d atoms\n\n' % (n*every, natoms))
+            step0 += n*every
+        fp.write('Total wall time: 0:00:02\n')
+    return info
@@ -0,0 +1,6 @@
+# Tests of the post-processing modules - the modules are in the
+# repository root, synthetic logs are written with synlmp.py
+
+import os, sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,26 @@
+#!/usr/bin/python
+
+# Fake LAMMPS binary for testing the executors:
+#   - Takes the arguments of the lammps command line (-in, -var seed)
+#   - Writes a small synthetic log.lammps (synlmp.py) in the working
+#       directory with the given seed
+#
+# Usage: $ python fakelmp.py [-fail] -var seed 1234 -in in.elastic_nvt
+#   -fail - exit with an error without writing the log
+#
+
+import os, sys
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    if '-fail' in args:
+        sys.exit(1)
+    # synlmp (scipy) is imported only for runs writing a log
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    import synlmp
+    seed = int(args[args.index('seed')+1])
+    fname = args[args.index('-in')+1]
+    if not os.path.isfile(fname):
+        sys.exit('No input script ' + fname)
+    synlmp.write_log('log.lammps', 200, seed=seed)
+    print('seed ' + str(seed))
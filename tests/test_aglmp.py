@@ -0,0 +1,63 @@
+# Aggregation over small datasets
+
+import os, json, numpy, pytest
+import aglmp
+
+def dataset(path, name, rows, material='Ni', Nat=10):
+    pathR = path + name + '/'
+    os.mkdir(pathR)
+    aglmp.save_info(pathR, material, Nat)
+    with open(pathR + 'res_CsFit.txt', 'w') as fp:
+        fp.write(''.join([','.join([str(x) for x in row]) + '\n' for row in rows]))
+    return pathR
+
+def test_aggregate(tmp_path):
+    path = str(tmp_path) + '/'
+    dataset(path, 'RES_1', [[301.0, 250.0, 150.0], [598.0, 240.0, 148.0]])
+    dataset(path, 'RES_2', [[297.0, 252.0, 152.0]])
+    dataset(path, 'RES_3', [[300.0, 100.0, 50.0]], Nat=4)
+    gkeys, mean, se, count = aglmp.aggregate(path)
+    # Temperatures in bins of 25 K, Nat kept apart
+    assert gkeys == [('Ni', 4, 300.0), ('Ni', 10, 300.0), ('Ni', 10, 600.0)]
+    assert list(count) == [1, 2, 1]
+    assert numpy.allclose(mean[1], [251.0, 151.0]) and numpy.allclose(se[1], [1.0, 1.0])
+    assert numpy.all(se[[0, 2]] == 0.0)
+    with open(path + 'agg_res_CsFit.txt', 'r') as fp:
+        lines = fp.read().splitlines()
+    assert lines[2].split(',')[:4] == ['Ni', '10', '300.0', '2']
+
+def test_repeated_rows_and_cache(tmp_path, monkeypatch):
+    path = str(tmp_path) + '/'
+    pathR = dataset(path, 'RES_1', [[300.0, 250.0, 150.0]])
+    dataset(path, 'RES_2', [[300.0, 254.0, 150.0]])
+    aglmp.aggregate(path)
+    read = []
+    summary = aglmp.summary
+    monkeypatch.setattr(aglmp, 'summary', lambda pathR, resfile: read.append(pathR) or summary(pathR, resfile))
+    # Appended (repeated) fit - only the latest row of the dataset counts
+    with open(pathR + 'res_CsFit.txt', 'a') as fp:
+        fp.write('300.0,252.0,150.0\n')
+    gkeys, mean, se, count = aglmp.aggregate(path)
+    assert list(count) == [2] and numpy.allclose(mean[0], [253.0, 150.0])
+    # Only the changed dataset is read again
+    assert read == [pathR]
+    with open(path + 'agg_cache.json', 'r') as fp:
+        cache = json.load(fp)
+    assert cache['RES_1']['rows'] == [300.0, 250.0, 150.0, 300.0, 252.0, 150.0]
+    aglmp.update(path)
+    assert read == [pathR]
+
+def test_column_mismatch(tmp_path):
+    path = str(tmp_path) + '/'
+    dataset(path, 'RES_1', [[300.0, 250.0, 150.0]])
+    dataset(path, 'RES_2', [[300.0, 254.0]])
+    with pytest.warns(UserWarning, match='RES_2 skipped'):
+        gkeys, mean, se, count = aglmp.aggregate(path)
+    assert list(count) == [1]
+
+def test_info_from_init(tmp_path):
+    pathR = str(tmp_path) + '/RES_1/'
+    os.makedirs(pathR + 'T_300/')
+    with open(pathR + 'T_300/init.mod', 'w') as fp:
+        fp.write('read_data data.Ni-unit\nreplicate 8 8 8\n')
+    assert aglmp.load_info(pathR) == ('unknown', 8)
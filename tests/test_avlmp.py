@@ -0,0 +1,133 @@
+# Log parsing and averaging of synthetic logs (synlmp.py)
+
+import os, numpy
+import avlmp, reslmp, runlmp, statlmp, synlmp
+from benchlmp import THERMO, AVARS
+
+def log_rows(fname):
+    """ Complete numeric lines of the thermo blocks of fname. """
+    with open(fname, 'r') as fp:
+        rows = [line.split() for line in fp if line.lstrip()[:1].isdigit()]
+    return numpy.array([row for row in rows if len(row) == len(synlmp.HEADER)], dtype=float)
+
+def test_read_log(tmp_path):
+    fname = str(tmp_path) + '/log.lammps'
+    info = synlmp.write_log(fname, 1000, seed=1)
+    header, data, stages, kinds = avlmp.read_log(fname)
+    assert header == synlmp.HEADER and kinds == ['minimize', 'run', 'run']
+    assert stages == [0, 20, 521, info['rows']]
+    assert numpy.array_equal(data, log_rows(fname))
+    # Small chunks give the same result
+    assert numpy.array_equal(avlmp.read_log(fname, chunk=7)[1], data)
+
+def test_read_log_warnings_truncated(tmp_path):
+    fname = str(tmp_path) + '/log.lammps'
+    synlmp.write_log(fname, 200, seed=1)
+    with open(fname, 'r') as fp:
+        lines = fp.readlines()
+    # Warning inside a thermo block and a run cut short
+    lines.insert(30, 'WARNING: Dihedral problem\n')
+    end = [ik for ik, line in enumerate(lines) if line.startswith('Loop time')][-1]
+    with open(fname, 'w') as fp:
+        fp.write(''.join(lines[:end-5]) + '  175 301.2 5.')
+    header, data, stages, kinds = avlmp.read_log(fname)
+    assert len(kinds) == 3 and stages[-1] == len(data)
+    assert numpy.array_equal(data, log_rows(fname))
+
+def test_thermo_cache(tmp_path):
+    pathd = str(tmp_path) + '/'
+    synlmp.write_log(pathd + 'log.lammps', 1000, seed=1)
+    data, logL = avlmp.imp_data(['pxx', 'lx'], THERMO, pathd)
+    assert isinstance(data['pxx'], numpy.memmap)
+    assert numpy.array_equal(data['lx'], log_rows(pathd + 'log.lammps')[:,11])
+    mtime = os.path.getmtime(pathd + 'thermo_cache/meta.json')
+    avlmp.save_log(pathd)
+    assert os.path.getmtime(pathd + 'thermo_cache/meta.json') == mtime
+    # Changed log - cache rebuilt
+    info = synlmp.write_log(pathd + 'log.lammps', 400, seed=2)
+    data, logL = avlmp.imp_data(['pxx'], THERMO, pathd)
+    assert logL[-1] == len(data['pxx']) == info['rows']
+    # Cache without the log
+    os.remove(pathd + 'log.lammps')
+    assert numpy.array_equal(avlmp.imp_data(['pxx'], THERMO, pathd)[0]['pxx'], data['pxx'])
+
+def test_thermo_interval(tmp_path):
+    pathd = str(tmp_path) + '/'
+    info = synlmp.write_log(pathd + 'log.lammps', 20000, every=5, seed=1)
+    s1, s2 = info['stage1'], info['stage2']
+    data, logL = avlmp.imp_data(['Step', 'pxx'], THERMO, pathd)
+    # Windows are time steps within the stage
+    r0, r1 = avlmp.step_rows(data['Step'], logL, 2, s2[0] + 1000, s2[0] + 2000)
+    assert list(data['Step'][r0:r1]) == list(range(s2[0] + 1000, s2[0] + 2000, 5))
+    assert logL[2] <= r0 < r1 <= logL[3]
+    res = avlmp.fitstr(AVARS, THERMO, '', s1[0], s1[1]+1, s2[0], s2[1]+1, 'xy', 'n', None, pathd, False)
+    C = numpy.array([float(x) for x in res.split(',')[1:]])
+    assert numpy.all(abs(C/[250.0, 150.0, 125.0] - 1.0) < 0.01)
+    # Moving average window of 50 steps is 10 rows
+    mv = avlmp.moveav(AVARS, THERMO, 50, pathd, save=False)
+    rows = numpy.array(data['pxx'][logL[1]:logL[2]])
+    assert numpy.isclose(mv[1, AVARS.index('pxx')], statlmp.mean_movav(rows, 10))
+
+def write_ave(pathd, block, prefix='ave'):
+    """ Block averages of the thermo rows of stages 1 and 2 as written by runlmp.add_ave. """
+    cols = ['Step'] + runlmp.AVE_COLS
+    data, logL = avlmp.imp_data(cols, THERMO, pathd)
+    for ik in (1, 2):
+        rows = numpy.column_stack([data[var][logL[ik]:logL[ik+1]] for var in cols])
+        ave = statlmp.blockav(rows, block)
+        ave[:,0] = rows[block-1:len(ave)*block:block, 0]
+        numpy.savetxt(pathd + prefix + '.' + str(ik) + '.txt', ave, header='Time-averaged data')
+
+def test_block_averages(tmp_path):
+    pathd = str(tmp_path) + '/'
+    synlmp.write_log(pathd + 'log.lammps', 40000, seed=5)
+    write_ave(pathd, 20)
+    res, err = avlmp.fitstr_log(THERMO, '', 'xy', 'n', None, pathd, (1, 2), False)
+    resa, erra = avlmp.fitstr_log(THERMO, '', 'xy', 'n', None, pathd, (1, 2), False, None, 'ave')
+    C = numpy.array([float(x) for x in res.split(',')[1:]])
+    Ca = numpy.array([float(x) for x in resa.split(',')[1:]])
+    assert numpy.all(abs(Ca - C) < 2.0*err) and numpy.all(abs(Ca/[250.0, 150.0, 125.0] - 1.0) < 0.02)
+    # Errors of the block averages include the reference length
+    assert numpy.all(erra > 0.0) and numpy.all(erra < 3.0*err)
+    avvar, averr = avlmp.aveav(AVARS, pathd)
+    data, logL = avlmp.imp_data(['pxx'], THERMO, pathd)
+    n = (logL[2] - logL[1])//20*20
+    assert numpy.isclose(avvar[0, AVARS.index('pxx')], numpy.mean(data['pxx'][logL[1]:logL[1]+n]))
+
+def test_add_ave(tmp_path):
+    pathT = str(tmp_path) + '/'
+    with open(pathT + 'in.elastic_nvt', 'w') as fp:
+        fp.write('minimize 0 1e-8 100 1000\nrun 1000\nfix 1 all deform 1 x erate 1e-4\nrun 2000\n')
+    runlmp.add_ave(pathT, 'in.elastic_nvt', 10, 20, corr=5)
+    with open(pathT + 'in.elastic_nvt', 'r') as fp:
+        lines = fp.read().splitlines()
+    fixes = [line.split() for line in lines if line.startswith('fix \tave')]
+    # Stages numbered as in the log, the minimization is stage 0
+    assert [fix[4:7] + fix[-2:] for fix in fixes] == [['10', '20', '200', 'file', 'ave.1.txt'],
+                                                     ['10', '20', '200', 'file', 'ave.2.txt']]
+    assert len(fixes[0]) == 7 + len(runlmp.AVE_COLS) + 2
+    # Fixes enclose each run
+    ik = lines.index('run 2000')
+    assert lines[ik-2].startswith('fix \tave') and lines[ik-1].startswith('fix \tcor')
+    assert lines[ik+1:ik+3] == ['unfix \tave', 'unfix \tcor']
+    assert lines.count('unfix \tave') == 2
+
+def test_fluct(tmp_path):
+    path = str(tmp_path) + '/RES/'
+    pathd = path + 'T_300/'
+    os.makedirs(pathd)
+    synlmp.write_fluct(pathd + 'log.lammps', 100000, seed=6)
+    db = path + 'results.db'
+    res, C, se = avlmp.fluct(THERMO, path, pathd, db=db)
+    ref = numpy.zeros((6, 6))
+    ref[:3,:3] = 150.0
+    ref[range(3), range(3)] = 250.0
+    ref[range(3, 6), range(3, 6)] = 125.0
+    # Planted tensor within the jackknife errors
+    assert numpy.all(abs(C - ref) < 4.0*se + 1.0)
+    with open(path + 'res_CsFit.txt', 'r') as fp:
+        assert fp.read() == res
+    assert reslmp.load_cs(path, 'fluct', db)[1][0] == float(res.split(',')[1])
+    names, vals = reslmp.latest(db, pathd, 'fluct', kind='tensor')
+    assert names[0] == 'C11' and numpy.array_equal(vals, C.ravel())
+    assert numpy.allclose(numpy.loadtxt(pathd + 'fluct_res.txt'), numpy.vstack((C, se)))
@@ -0,0 +1,28 @@
+# Benchmark of all stages on a small synthetic log
+
+import os
+import benchlmp, synlmp
+
+def test_bench(tmp_path):
+    path = str(tmp_path) + '/'
+    recs = benchlmp.bench(path, (20000,), out=path + 'bench_output.txt')
+    stages = [rec['stage'] for rec in recs]
+    assert stages == ['parse', 'imp_data', 'simpav', 'cs/simpav', 'moveav', 'cs/moveav', 'distav', 'cs/distav',
+                      'fitstr', 'fitstr_log']
+    # Planted constants recovered by every method
+    assert all(rec['ok'] for rec in recs if 'ok' in rec)
+    assert os.path.isfile(path + 'prof.csv') and os.path.isfile(path + 'bench_output.txt')
+    # Log reused for the same size and seed
+    mtime = os.path.getmtime(path + 'rows_20000/log.lammps')
+    info = benchlmp.case(path + 'rows_20000/', 20000)
+    assert os.path.getmtime(path + 'rows_20000/log.lammps') == mtime and info['nrows'] == 20000
+
+def test_write_log(tmp_path):
+    fname = str(tmp_path) + '/log.lammps'
+    info = synlmp.write_log(fname, 1000, every=10, seed=1, chunk=64)
+    with open(fname, 'r') as fp:
+        lines = fp.read().splitlines()
+    assert lines[-1].startswith('Total wall time')
+    rows = [line.split() for line in lines if line.lstrip()[:1].isdigit()]
+    assert len(rows) == info['rows']
+    assert int(rows[-1][0]) == info['stage2'][1]
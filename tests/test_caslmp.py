@@ -0,0 +1,49 @@
+# Content addressed store of the input files
+
+import os, stat
+import caslmp, runlmp
+
+def write(fname, text):
+    with open(fname, 'w') as fp:
+        fp.write(text)
+
+def test_store_link_verify(tmp_path):
+    path = str(tmp_path) + '/'
+    write(path + 'a.mod', 'units metal\n')
+    write(path + 'b.mod', 'units metal\n')
+    keys = caslmp.make_store(path + 'store/', [path + 'a.mod', path + 'b.mod'], path + 'inputs.json')
+    # Same content stored once, read-only
+    assert keys['a.mod'] == keys['b.mod'] and os.listdir(path + 'store/') == [keys['a.mod']]
+    assert not os.stat(path + 'store/' + keys['a.mod']).st_mode & stat.S_IWUSR
+    assert caslmp.load_manifest(path + 'inputs.json') == keys
+    os.mkdir(path + 'run/')
+    caslmp.link(path + 'store/', keys, path + 'run/')
+    assert caslmp.is_shared(path + 'run/a.mod')
+    assert caslmp.verify(path + 'store/', keys) == []
+    assert caslmp.verify(path + 'store/', keys, path + 'run/') == []
+    os.remove(path + 'run/b.mod')
+    assert caslmp.verify(path + 'store/', keys, path + 'run/') == [path + 'run/b.mod']
+
+def test_run_dirs(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    for name in ['potential.mod', 'init.mod', 'in.elastic_nvt_x', 'in.elastic_nvt_y', 'in.elastic_nvt_yz']:
+        write(name, name + '\n')
+    write('submit_lammps_parallel.pl', '#!/usr/bin/perl\n')
+    files = ['potential.mod', 'init.mod', 'submit_lammps_parallel.pl']
+    zipname = runlmp.make_main(files, 'RES', 'nvt', '3n', store=True)
+    runlmp.make_dirs('', 'RES', '300', zipname, 'nvt', '3n', store=True)
+    pathT = 'RES/T_300/'
+    keys = caslmp.load_manifest('RES/' + zipname)
+    # The submission script is not stored
+    assert sorted(keys) == ['init.mod', 'potential.mod']
+    for sub in ['x', 'y', 'yz']:
+        pathsub = pathT + sub + '/'
+        runlmp.share_inputs(pathT, pathsub)
+        runlmp.make_exec(pathsub)
+        assert caslmp.verify('RES/store/', keys, pathsub) == []
+        assert caslmp.is_shared(pathsub + 'potential.mod')
+        # Copied and executable, stored inputs stay read-only
+        assert not caslmp.is_shared(pathsub + 'submit_lammps_parallel.pl')
+        assert os.access(pathsub + 'submit_lammps_parallel.pl', os.X_OK)
+        assert not os.stat(pathsub + 'potential.mod').st_mode & stat.S_IWUSR
+        assert os.path.isfile(pathsub + 'in.elastic_nvt_' + sub)
@@ -0,0 +1,41 @@
+# Autocorrelation and block averaging on AR(1) series with known
+# correlation time
+
+import numpy
+from scipy import signal
+import corlmp, synlmp
+from benchlmp import THERMO, AVARS
+
+def ar1(phi, n, ncol, seed):
+    e = numpy.random.default_rng(seed).standard_normal((n, ncol))
+    return signal.lfilter([1.0], [1.0, -phi], e, axis=0)
+
+def test_tau_int():
+    phi = 0.8
+    x = ar1(phi, 200000, 2, 7)
+    tau, win = corlmp.tau_int(x)
+    exact = 0.5*(1.0 + phi)/(1.0 - phi)
+    assert numpy.all(abs(tau/exact - 1.0) < 0.1)
+    assert numpy.allclose(corlmp.neff(x), 200000/(2.0*tau))
+    # Uncorrelated and constant columns
+    tau, win = corlmp.tau_int(numpy.column_stack([ar1(0.0, 50000, 1, 8)[:,0], numpy.ones(50000)]))
+    assert numpy.allclose(tau, 0.5, atol=0.05)
+
+def test_block_se():
+    phi = 0.8
+    x = ar1(phi, 2**17, 1, 9)
+    se = corlmp.block_se(x)[0]
+    # Standard error of the mean of an AR(1) process
+    exact = numpy.sqrt(1.0/(1.0 - phi**2)*(1.0 + phi)/(1.0 - phi)/len(x))
+    assert abs(se/exact - 1.0) < 0.2
+
+def test_stat_stages(tmp_path):
+    pathd = str(tmp_path) + '/'
+    synlmp.write_log(pathd + 'log.lammps', 20000, seed=1)
+    tau, ness, se = corlmp.stat_stages(AVARS, THERMO, pathd)
+    # Minimization, NVT and deformation stages
+    assert tau.shape == (3, len(AVARS))
+    # Noise of the synthetic pressures has tau = 20 rows
+    assert 10.0 < tau[1, AVARS.index('pxx')] < 40.0
+    req, err = corlmp.run_length(THERMO, 1.0, 'xy', 'n', None, pathd)
+    assert len(req) == 3 and numpy.all(err > 0.0)
@@ -0,0 +1,64 @@
+# Stage graph from synthetic logs to the elastic constants
+
+import os, json, pytest
+import daglmp, synlmp
+from benchlmp import THERMO, AVARS
+
+def make_dataset(tmp_path, T=('300', '500')):
+    pathR = str(tmp_path) + '/RES/'
+    for Ti in T:
+        os.makedirs(pathR + 'T_' + Ti + '/')
+        synlmp.write_log(pathR + 'T_' + Ti + '/log.lammps', 4000, T=float(Ti), seed=int(Ti))
+    return pathR
+
+def graph(pathR, window, T=('300', '500')):
+    return daglmp.elastic_graph(pathR, list(T), 'n', AVARS, THERMO, 'moveav', 'xy', nsteps=2, window=window,
+                                plot=False)
+
+def test_window_change(tmp_path):
+    pathR = make_dataset(tmp_path)
+    status = daglmp.run(graph(pathR, 1000), pathR, 2)
+    assert set(status.values()) == {'done'}
+    with open(pathR + 'res_Cs.txt', 'r') as fp:
+        assert len(fp.read().splitlines()) == 2
+    assert os.path.isfile(pathR + 'res_props.txt')
+    # New window - only the averaging and the stages after it are run
+    status = daglmp.run(graph(pathR, 2000), pathR, 2)
+    assert status['log:T_300/'] == status['log:T_500/'] == 'cached'
+    assert status['moveav:T_300/'] == status['cs:T_300'] == status['res:res_Cs.txt'] == 'done'
+    # Back to the first window - averages cached, the result files
+    # are written again from the cached constants
+    status = daglmp.run(graph(pathR, 1000), pathR, 2)
+    assert status['moveav:T_300/'] == status['cs:T_500'] == 'cached'
+    assert status['res:res_Cs.txt'] == status['elprops:res_Cs.txt'] == 'done'
+    status = daglmp.run(graph(pathR, 1000), pathR, 2)
+    assert set(status.values()) == {'cached'}
+    # Averages are kept only as artifacts
+    assert not os.path.isfile(pathR + 'T_300/av_res.txt')
+    with open(pathR + 'dag/nodes.json', 'r') as fp:
+        assert sorted(json.load(fp)) == sorted(status)
+
+def test_outputs_and_waiting(tmp_path):
+    pathR = make_dataset(tmp_path)
+    daglmp.run(graph(pathR, 1000), pathR, 1)
+    with open(pathR + 'res_Cs.txt', 'r') as fp:
+        text = fp.read()
+    # Modified output file is written again from the cached results
+    with open(pathR + 'res_Cs.txt', 'a') as fp:
+        fp.write('0,0,0,0\n')
+    status = daglmp.run(graph(pathR, 1000), pathR, 1)
+    assert status['cs:T_300'] == 'cached' and status['res:res_Cs.txt'] == 'done'
+    with open(pathR + 'res_Cs.txt', 'r') as fp:
+        assert fp.read() == text
+    # Run that has not finished - its nodes and all nodes after them wait
+    os.makedirs(pathR + 'T_700/')
+    with open(pathR + 'T_700/log.lammps', 'w') as fp:
+        fp.write('LAMMPS\n')
+    status = daglmp.run(graph(pathR, 1000, ('300', '700')), pathR, 1)
+    assert status['log:T_300/'] == status['cs:T_300'] == 'cached'
+    assert status['log:T_700/'] == status['cs:T_700'] == status['res:res_Cs.txt'] == 'waiting'
+
+def test_cycle():
+    nodes = [daglmp.Node('a', len, deps=['b']), daglmp.Node('b', len, deps=['a'])]
+    with pytest.raises(ValueError, match='Cycle'):
+        daglmp.order(nodes)
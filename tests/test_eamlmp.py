@@ -0,0 +1,39 @@
+# EAM/alloy evaluator on the repository potential and Ni cell
+
+import os, numpy
+import eamlmp
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__))) + '/'
+POT = ROOT + 'FeNiCr.eam.alloy'
+DATA = ROOT + 'data.Ni-unit'
+
+def test_statics():
+    C11, C12, C44, scale = eamlmp.statics(POT, DATA, 1)
+    assert abs(C11 - 246.93) < 0.5 and abs(C12 - 147.07) < 0.5 and abs(C44 - 125.03) < 0.5
+    assert abs(scale - 1.0) < 1e-3
+    # Supercell gives the same constants
+    assert numpy.allclose(eamlmp.statics(POT, DATA, 2)[:3], (C11, C12, C44), atol=1e-6)
+
+def test_forces_and_stress():
+    pot = eamlmp.load_potential(POT)
+    cell, pos, types = eamlmp.read_data(DATA)
+    cell, pos, types = eamlmp.replicate(cell, pos, types, 2)
+    types = eamlmp.random_alloy(types, {1: 0.2, 2: 0.6, 3: 0.2}, seed=1)
+    pos = pos + numpy.random.default_rng(2).normal(0.0, 0.05, pos.shape)
+    energy, f, stress = eamlmp.compute(pot, cell, pos, types)
+    # Forces from finite differences of the energy
+    h = 1e-5
+    for (ia, k) in [(0, 0), (5, 1), (17, 2)]:
+        dp = numpy.zeros_like(pos)
+        dp[ia,k] = h
+        ep = eamlmp.compute(pot, cell, pos + dp, types, False)[0]
+        em = eamlmp.compute(pot, cell, pos - dp, types, False)[0]
+        assert abs(-(ep - em)/(2*h) - f[ia,k]) < 1e-5
+    # Pressure xx from the energy of a strained cell
+    eps = numpy.eye(3)
+    eps[0,0] += h
+    ep = eamlmp.compute(pot, numpy.dot(cell, eps), numpy.dot(pos, eps), types, False)[0]
+    eps[0,0] -= 2*h
+    em = eamlmp.compute(pot, numpy.dot(cell, eps), numpy.dot(pos, eps), types, False)[0]
+    vol = abs(numpy.linalg.det(cell))
+    assert abs(-(ep - em)/(2*h)/vol*eamlmp.EV_GPA - stress[0]) < 1e-3
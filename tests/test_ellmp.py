@@ -0,0 +1,38 @@
+# Elastic properties and bootstrap errors
+
+import os, numpy
+import aglmp, ellmp
+
+def test_props_isotropic():
+    res = ellmp.props(300.0, 100.0, 100.0)
+    assert numpy.isclose(res['A'], 1.0) and numpy.isclose(res['GV'], res['GR'])
+    assert numpy.isclose(res['B'], 500.0/3.0) and numpy.isclose(res['GH'], 100.0)
+    # Isotropic relations E = 2G(1 + nu), B = E/(3(1 - 2nu))
+    assert numpy.isclose(res['EH'], 2.0*100.0*(1.0 + res['nuH']))
+    assert numpy.isclose(res['B'], res['EH']/(3.0*(1.0 - 2.0*res['nuH'])))
+
+def test_props_ni():
+    res = ellmp.props(numpy.array([246.5, 246.5]), 147.3, 124.7)
+    assert res['thetaD'].shape == (2,)
+    # Debye temperature of Ni from its elastic constants, about 470 K
+    assert abs(res['thetaD'][0] - 470.0) < 20.0
+    assert res['GR'][0] < res['GH'][0] < res['GV'][0]
+
+def test_bootstrap(tmp_path):
+    C = numpy.array([[246.0, 147.0, 125.0], [248.0, 149.0, 124.0], [250.0, 146.0, 126.0]])
+    mean, se, ci = ellmp.bootstrap(C, 2000, seed=1)
+    assert numpy.isclose(mean['B'], numpy.mean(C[:,0] + 2.0*C[:,1])/3.0)
+    assert 0.0 < se['B'] < 2.0 and ci['B'][0] < mean['B'] < ci['B'][1]
+    # Single dataset - no spread
+    assert ellmp.bootstrap(C[:1], 100, seed=1)[1]['B'] == 0.0
+    path = str(tmp_path) + '/'
+    for ik in range(3):
+        os.mkdir(path + 'RES_' + str(ik))
+        aglmp.save_info(path + 'RES_' + str(ik) + '/', 'Ni', 10)
+        with open(path + 'RES_' + str(ik) + '/res_CsFit.txt', 'w') as fp:
+            fp.write('300.0,' + ','.join([str(x) for x in C[ik]]) + '\n')
+    assert ellmp.elprops_boot(path, nboot=2000, seed=1) == [('Ni', 10, 300.0)]
+    with open(path + 'boot_res_CsFit.txt', 'r') as fp:
+        lines = fp.read().splitlines()
+    row = lines[1].split(',')
+    assert row[:4] == ['Ni', '10', '300.0', '3'] and numpy.isclose(float(row[5]), se['B'])
@@ -0,0 +1,65 @@
+# Local executor with a fake LAMMPS binary (fakelmp.py)
+
+import os, sys
+import exelmp
+
+FAKE = sys.executable + ' ' + os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fakelmp.py')
+COMMAND = FAKE + ' {args} -var seed {seed} -in {fname}'
+
+def make_job(tmp_path, name='job', p=4, args=''):
+    pathd = str(tmp_path) + '/' + name + '/'
+    os.mkdir(pathd)
+    with open(pathd + 'in.elastic_nvt', 'w') as fp:
+        fp.write('# input\n')
+    return exelmp.Job(name, 'in.elastic_nvt', p, pathd, args)
+
+def test_local_run(tmp_path):
+    ended = []
+    ex = exelmp.LocalExecutor(2, COMMAND, callback=ended.append)
+    job = make_job(tmp_path, p=8)
+    ex.submit(job)
+    ex.wait()
+    # Core count clamped to the node, seed passed to the binary
+    assert job.p == 2
+    assert job.status == 'done' and job.returncode == 0 and job.attempts == 1
+    assert ended == [job] and job.error is None
+    assert os.path.isfile(job.cwd + 'log.lammps')
+    with open(job.cwd + job.fname + '.out', 'r') as fp:
+        assert fp.read().strip() == 'seed ' + str(job.seed)
+
+def test_register_before_start(tmp_path):
+    seen = []
+    ex = exelmp.LocalExecutor(1, COMMAND)
+    job = make_job(tmp_path)
+    ex.submit(job, lambda job: seen.append(job.status))
+    ex.wait()
+    assert seen == ['submitted']
+    assert job.status == 'done'
+
+def test_retries_and_callback_error(tmp_path):
+    def callback(job):
+        raise RuntimeError('post-processing failed')
+    ex = exelmp.LocalExecutor(1, COMMAND, retries=2, callback=callback)
+    job = make_job(tmp_path, args='-fail')
+    ex.submit(job)
+    ex.wait()
+    assert job.status == 'failed' and job.returncode == 1 and job.attempts == 3
+    assert 'post-processing failed' in job.error
+
+def test_timeout(tmp_path):
+    ex = exelmp.LocalExecutor(1, 'sleep 10', timeout=0.2)
+    job = make_job(tmp_path)
+    ex.submit(job)
+    ex.wait()
+    assert job.status == 'timeout' and job.returncode is None
+    assert job.end - job.start < 5.0
+
+def test_bounded_cores(tmp_path):
+    ex = exelmp.LocalExecutor(2, COMMAND)
+    jobs = [ex.submit(make_job(tmp_path, 'job' + str(ik), p=2)) for ik in range(3)]
+    ex.wait()
+    assert [job.status for job in jobs] == ['done']*3
+    # Jobs using the whole node run one after another
+    runs = sorted((job.start, job.end) for job in jobs)
+    assert all(runs[ik][1] <= runs[ik+1][0] for ik in range(2))
+    assert ex.free == 2
@@ -0,0 +1,40 @@
+# Incremental estimates from a growing synthetic log
+
+import os, numpy
+import monlmp, synlmp
+from benchlmp import THERMO
+
+def test_logtail(tmp_path):
+    pathd = str(tmp_path) + '/'
+    synlmp.write_log(pathd + 'full.log', 40000, seed=2)
+    with open(pathd + 'full.log', 'r') as fp:
+        text = fp.read()
+    tail = monlmp.LogTail(pathd, THERMO, 'xy', 'n', None)
+    # Log written in pieces, cut in the middle of lines
+    cuts = [0, len(text)//3 + 7, 2*len(text)//3 + 3, len(text)]
+    for k in range(3):
+        with open(pathd + 'log.lammps', 'a') as fp:
+            fp.write(text[cuts[k]:cuts[k+1]])
+        tail.poll()
+        assert tail.finished == (k == 2)
+    C, se = tail.estimate()
+    assert numpy.all(abs(C/[250.0, 150.0, 125.0] - 1.0) < 0.02)
+    # Loose threshold stops the run with the sentinel file
+    assert tail.check(threshold=100.0)
+    with open(pathd + 'STOP', 'r') as fp:
+        assert numpy.allclose([float(x) for x in fp.readline().split()], C)
+
+def test_logtail_restart(tmp_path):
+    pathd = str(tmp_path) + '/'
+    tail = monlmp.LogTail(pathd, THERMO, 'xy', 'n', None)
+    tail.poll()
+    assert tail.estimate() is None
+    synlmp.write_log(pathd + 'log.lammps', 4000, seed=3)
+    tail.poll()
+    n = tail.lfit.nrows()
+    # Shorter log - new run in the same directory
+    synlmp.write_log(pathd + 'log.lammps', 2000, seed=4)
+    tail.poll()
+    assert 0 < tail.lfit.nrows() < n
+    assert not tail.check(threshold=1e-6)
+    assert not os.path.isfile(pathd + 'STOP')
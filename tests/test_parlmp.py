@@ -0,0 +1,29 @@
+# Work units and the process pool
+
+import os
+import parlmp
+
+def square(x, y):
+    return (x*x + y, os.getpid())
+
+def test_units():
+    assert parlmp.units('R/', ['300', '500'], 'n') == [('300', None, 'R/T_300/'), ('500', None, 'R/T_500/')]
+    work = parlmp.units('R/', ['300'], '3n')
+    assert [sub for (T, sub, pathd) in work] == ['x', 'y', 'yz']
+    assert work[2][2] == 'R/T_300/yz/'
+
+def test_run_units():
+    args = [(x, 1) for x in range(8)]
+    serial = parlmp.run_units(square, args, 1)
+    pool = parlmp.run_units(square, args, 2)
+    # Results in order of the units, computed in the workers
+    assert [r[0] for r in pool] == [r[0] for r in serial] == [x*x + 1 for x in range(8)]
+    assert set(r[1] for r in serial) == {os.getpid()}
+    assert os.getpid() not in set(r[1] for r in pool)
+
+def test_save_res(tmp_path):
+    fname = str(tmp_path) + '/res_Cs.txt'
+    parlmp.save_res(fname, ['300,1\n', '500,2\n'])
+    parlmp.save_res(fname, ['700,3\n'])
+    with open(fname, 'r') as fp:
+        assert fp.read() == '300,1\n500,2\n700,3\n'
@@ -0,0 +1,32 @@
+# Profiling records of the post-processing stages
+
+import os, csv
+import avlmp, parlmp, prflmp, synlmp
+
+def test_timed_units(tmp_path):
+    pathR = str(tmp_path) + '/'
+    work = parlmp.units(pathR, ['300', '500'], 'n')
+    for (T, sub, pathd) in work:
+        os.mkdir(pathd)
+        synlmp.write_log(pathd + 'log.lammps', 2000, seed=int(T))
+    out = parlmp.run_units(prflmp.timed, [(avlmp.save_log, 'log', pathd, pathd) for (T, sub, pathd) in work], 2)
+    res, recs = prflmp.split(out)
+    assert res == [None, None]
+    for rec, (T, sub, pathd) in zip(recs, work):
+        assert sorted(rec) == sorted(prflmp.FIELDS)
+        assert rec['unit'] == pathd and rec['rows'] == prflmp.rows(pathd) > 2000
+        assert rec['wall'] > 0.0 and rec['rss'] > 0.0 and rec['pid'] != os.getpid()
+    prflmp.save_report(pathR, recs)
+    old = prflmp.save_report(pathR, recs[:1])
+    assert len(old) == 3
+    with open(pathR + 'prof.csv', 'r') as fp:
+        assert [row['unit'] for row in csv.DictReader(fp)] == [work[0][2], work[1][2], work[0][2]]
+    s = prflmp.summary(old)['log']
+    assert s['units'] == 3 and s['rows'] == 2*recs[0]['rows'] + recs[1]['rows']
+
+def test_profile(tmp_path):
+    out = str(tmp_path) + '/sum'
+    assert prflmp.profile(sum, (range(1000),), out, mem=True) == 499500
+    with open(out + '.txt', 'r') as fp:
+        assert 'Traced memory' in fp.read()
+    assert os.path.isfile(out + '.prof')
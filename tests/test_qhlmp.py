@@ -0,0 +1,34 @@
+# Quasi-harmonic model - phonons against the static elastic constants
+
+import os, numpy, pytest
+import eamlmp, qhlmp
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__))) + '/'
+POT = ROOT + 'FeNiCr.eam.alloy'
+
+def test_sound_velocities():
+    pot = eamlmp.load_potential(POT)
+    a = qhlmp.static_lattice(pot)
+    mass = pot.masses[1]
+    img, w, phi = qhlmp.force_constants(pot, a, 2, 3)
+    k = numpy.array([[0.0, 0.0, 0.0], [0.02*2.0*numpy.pi/a, 0.0, 0.0]])
+    hw = qhlmp.frequencies(img, w, phi, mass, k)
+    assert numpy.all(hw[0] < 1e-8)
+    # Long wavelength [100] modes - transverse C44, longitudinal C11
+    C11, C12, C44, scale = eamlmp.statics(POT, ROOT + 'data.Ni-unit')
+    rho = 4.0*mass/a**3
+    v = numpy.sqrt(numpy.array([C44, C44, C11])/eamlmp.EV_GPA/rho)
+    assert numpy.allclose(hw[1], qhlmp.HW*k[1,0]*v, rtol=5e-3)
+
+def test_free_energy():
+    hw = numpy.array([0.01, 0.02, 0.03])
+    T = numpy.array([1e-3, 300.0])
+    kT = qhlmp.KB*T[1]
+    F = qhlmp.free_energy(hw, T)
+    assert abs(F[0] - 0.03) < 1e-12
+    assert abs(F[1] - 0.03 - kT*numpy.sum(numpy.log(1.0 - numpy.exp(-hw/kT)))) < 1e-12
+
+def test_af_list_negative_expansion():
+    # The repository potential stiffens on expansion (see qhlmp Notes)
+    with pytest.raises(ValueError, match='decreases with T'):
+        qhlmp.af_list(POT, ['300', '1000'], 10, nk=6)
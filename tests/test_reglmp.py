@@ -0,0 +1,83 @@
+# Run registry with the local executor (fake LAMMPS binary) and a
+# fake SGE (qsub and qstat scripts on PATH)
+
+import os, shutil, stat, sqlite3
+import exelmp, reglmp, runlmp
+from test_exelmp import COMMAND
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__))) + '/'
+
+def make_run(tmp_path, T='300'):
+    pathR = str(tmp_path) + '/RES/'
+    pathT = pathR + 'T_' + T + '/'
+    os.makedirs(pathT)
+    with open(pathT + 'in.elastic_nvt', 'w') as fp:
+        fp.write('# input\n')
+    reg = pathR + 'runs.db'
+    reglmp.add_run(reg, 'RES', T, None, pathT, {'T': T})
+    return reg, pathT
+
+def row(reg, pathT):
+    con = sqlite3.connect(reg)
+    con.row_factory = sqlite3.Row
+    r = con.execute('select * from runs where path = ?', (pathT,)).fetchone()
+    con.close()
+    return r
+
+def fake_sge(tmp_path, monkeypatch, qstat=''):
+    """ qsub saving the job script, qstat listing qstat, the submission script on PATH. """
+    pathb = str(tmp_path) + '/bin/'
+    os.mkdir(pathb)
+    scripts = {'qsub': 'cat > job_script.csh\necho \'Your job 777 ("job") has been submitted\'\n',
+               'qstat': 'echo "job-ID  prior   name"\n' + (('echo "' + qstat + ' 0.5 job"\n') if qstat else '')}
+    for name in scripts:
+        with open(pathb + name, 'w') as fp:
+            fp.write('#!/bin/sh\n' + scripts[name])
+    shutil.copy(ROOT + 'submit_lammps_parallel.pl', pathb)
+    for name in os.listdir(pathb):
+        os.chmod(pathb + name, stat.S_IRWXU)
+    monkeypatch.setenv('PATH', pathb + os.pathsep + os.environ['PATH'])
+
+def test_local_registry(tmp_path):
+    reg, pathT = make_run(tmp_path)
+    ex = exelmp.LocalExecutor(2, COMMAND)
+    jobs = runlmp.lmp_sub(8, '300', pathT, 'n', 'nvt', ex, reg)
+    assert row(reg, pathT)['status'] in ('submitted', 'done')
+    ex.wait()
+    assert reglmp.refresh(reg) == 1
+    r = row(reg, pathT)
+    # Seed passed to the binary and the cores actually used
+    assert r['status'] == 'done' and r['seed'] == jobs[0].seed and r['p'] == 2
+    assert r['checksum'] == reglmp.checksum(pathT + 'log.lammps')
+    assert reglmp.pending(reg) == [('300', None, pathT)]
+    reglmp.set_averaged(reg, [pathT])
+    assert reglmp.pending(reg) == []
+
+def test_sge_seed(tmp_path, monkeypatch):
+    fake_sge(tmp_path, monkeypatch, qstat='777')
+    reg, pathT = make_run(tmp_path)
+    jobs = runlmp.lmp_sub(4, '300', pathT, 'n', 'nvt', None, reg)
+    r = row(reg, pathT)
+    assert r['status'] == 'submitted' and r['jobid'] == '777' and r['p'] == 4
+    assert r['seed'] == jobs[0].seed
+    # The seed of the registry is the one in the job script
+    with open(pathT + 'job_script.csh', 'r') as fp:
+        assert '-var seed ' + str(jobs[0].seed) + ' ' in fp.read()
+    # Still queued
+    reglmp.refresh(reg)
+    assert row(reg, pathT)['status'] == 'submitted'
+
+def test_failed_and_resubmit(tmp_path, monkeypatch):
+    fake_sge(tmp_path, monkeypatch)
+    reg, pathT = make_run(tmp_path)
+    runlmp.lmp_sub(4, '300', pathT, 'n', 'nvt', None, reg)
+    # Job left the queue without a complete log
+    assert reglmp.refresh(reg) == 0
+    assert row(reg, pathT)['status'] == 'failed'
+    ex = exelmp.LocalExecutor(1, COMMAND)
+    jobs = reglmp.resubmit(reg, ex)
+    ex.wait()
+    assert len(jobs) == 1 and jobs[0].status == 'done'
+    assert reglmp.refresh(reg) == 1
+    r = row(reg, pathT)
+    assert r['status'] == 'done' and r['seed'] == jobs[0].seed and r['p'] == 1
@@ -0,0 +1,50 @@
+# Result store - averages and elastic constants
+
+import os, re, numpy, pytest
+import avlmp, ellmp, reslmp, synlmp
+from benchlmp import THERMO, AVARS
+
+def test_put_latest(tmp_path):
+    db = str(tmp_path) + '/results.db'
+    pathd = str(tmp_path) + '/RES_1/T_300/x/'
+    assert reslmp.unit_key(pathd) == ('RES_1', '300', 'x')
+    assert reslmp.latest(db, pathd, 'moveav') is None
+    vals = numpy.arange(6.0).reshape(2, 3)
+    reslmp.put(db, pathd, 'moveav', {'window': 1000}, ['T', 'pxx', 'lx'], vals)
+    reslmp.put(db, pathd, 'moveav', {'window': 2000}, ['T', 'pxx', 'lx'], vals + 1.0)
+    names, got = reslmp.latest(db, pathd, 'moveav', {'window': 1000})
+    assert names == ['T', 'pxx', 'lx'] and numpy.array_equal(got, vals)
+    # Latest record with any parameters
+    assert numpy.array_equal(reslmp.latest(db, pathd, 'moveav')[1], vals + 1.0)
+    assert reslmp.latest(db, pathd, 'simpav') is None
+    with pytest.raises(ValueError):
+        reslmp.unit_key(str(tmp_path) + '/RES_1/')
+
+def test_constants_split(tmp_path):
+    db = str(tmp_path) + '/results.db'
+    path = str(tmp_path) + '/RES_1/'
+    for T in ['500', '300']:
+        reslmp.put_res(db, path + 'T_' + T + '/x/', 'fitstr', None, T + '.5,250.0,', '3n', 'x')
+        reslmp.put_res(db, path + 'T_' + T + '/y/', 'fitstr', None, '150.0,', '3n', 'y')
+        reslmp.put_res(db, path + 'T_' + T + '/yz/', 'fitstr', None, '125.0\n', '3n', 'yz')
+    # Repeated fit replaces the old constants
+    reslmp.put_res(db, path + 'T_300/yz/', 'fitstr', None, '120.0\n', '3n', 'yz')
+    assert len(reslmp.records(db, 'RES_1', 'fitstr')) == 6
+    T, C11, C12, C44 = reslmp.load_cs(path, 'fitstr', db)
+    assert list(T) == [300.5, 500.5] and list(C11) == [250.0]*2 and list(C44) == [120.0, 125.0]
+
+def test_cs_from_store(tmp_path):
+    db = str(tmp_path) + '/results.db'
+    path = str(tmp_path) + '/RES_1/'
+    pathT = path + 'T_300/'
+    os.makedirs(pathT)
+    synlmp.write_log(pathT + 'log.lammps', 4000, seed=1)
+    avlmp.simpav(AVARS, THERMO, pathT)
+    avlmp.simpav(AVARS, THERMO, pathT, db)
+    # Same constants from av_res.txt and from the store
+    res = ellmp.cs(AVARS, 2, '300', path, pathT, 'n', False)
+    assert ellmp.cs(AVARS, 2, '300', path, pathT, 'n', False, db, 'simpav') == res
+    assert numpy.isclose(reslmp.load_cs(path, 'cs/simpav', db)[1][0], float(res.split(',')[1]))
+    # Missing averages name the run and the method
+    with pytest.raises(ValueError, match=re.escape('No moveav averages stored for ' + pathT)):
+        ellmp.cs(AVARS, 2, '300', path, pathT, 'n', False, db, 'moveav')
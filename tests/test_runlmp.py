@@ -0,0 +1,51 @@
+# Rendering of init.mod from the parsed template and packed runs
+
+import os, json
+import exelmp, runlmp
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__))) + '/'
+
+def test_render_unchanged():
+    model = runlmp.parse_template(ROOT + 'init00.mod')
+    with open(ROOT + 'init00.mod', 'r') as fp:
+        assert runlmp.render(model, {}) == fp.read()
+
+def test_render_parameters(tmp_path):
+    pathT = str(tmp_path) + '/'
+    with open(pathT + 'init00.mod', 'w') as fp:
+        fp.write('variable    T0  equal   872.0 # initial\nvariable Tf equal 872.0\n'
+                 'replicate \t10 10 10\n# variable T0 equal 1.0\n')
+    runlmp.num_atoms('4', pathT)
+    runlmp.mod_init({'T0': '300.0', 'a': '3.52'}, pathT)
+    with open(pathT + 'init.mod', 'r') as fp:
+        # Comments and spacing kept, undeclared parameters ignored
+        assert fp.read() == ('variable    T0  equal   300.0 # initial\nvariable Tf equal 872.0\n'
+                             'replicate \t4 4 4\n# variable T0 equal 1.0\n')
+
+def test_packed_run(tmp_path):
+    pathP = str(tmp_path) + '/pack/'
+    os.mkdir(pathP)
+    with open(pathP + 'init00.mod', 'w') as fp:
+        fp.write('variable T0 equal 872.0\nvariable P0 equal 1.0\nreplicate 10 10 10\n')
+    with open(pathP + 'in.elastic_nvt', 'w') as fp:
+        fp.write('velocity all create ${T0} ${seed}\ndump 1 all xyz 100 movie.xyz\n')
+    dirs = [str(tmp_path) + '/RES/T_' + T + '/' for T in ['300', '500']]
+    model = runlmp.parse_template(pathP + 'init00.mod')
+    runlmp.write_pack(model, {'P0': '2.0'}, '4', [(dirs[0], {'T0': 300}), (dirs[1], {'T0': 500})], pathP, 'nvt')
+    with open(pathP + 'init.mod', 'r') as fp:
+        lines = fp.read().splitlines()
+    assert lines[:3] == ['variable T0 world 300 500', 'variable P0 equal 2.0', 'replicate 4 4 4']
+    assert 'variable part world 0 1' in lines
+    with open(pathP + 'in.elastic_nvt', 'r') as fp:
+        assert fp.read() == 'velocity all create ${T0} ${pseed}\ndump 1 all xyz 100 movie.${part}.xyz\n'
+    # Stand-in for LAMMPS writing a log for each partition
+    ex = exelmp.LocalExecutor(8, 'for k in 0 1; do echo "{args} $k" > log.lammps.$k; done')
+    job = runlmp.pack_sub(2, 'pack', pathP, 'nvt', ex)
+    ex.wait()
+    assert job.status == 'done' and job.p == 4
+    assert runlmp.unpack(pathP) == dirs
+    for k, pathd in enumerate(dirs):
+        with open(pathd + 'log.lammps', 'r') as fp:
+            assert fp.read() == '-partition 2x2 ' + str(k) + '\n'
+        with open(pathd + 'partition.json', 'r') as fp:
+            assert json.load(fp)['values'] == {'T0': 300 + 200*k}
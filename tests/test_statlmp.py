@@ -0,0 +1,56 @@
+# Vectorized estimators of statlmp
+
+import numpy
+from scipy import stats
+import statlmp
+
+def test_tfit():
+    rng = numpy.random.default_rng(3)
+    x = numpy.column_stack([stats.t.rvs(4.0, loc=2.0, scale=0.5, size=5000, random_state=rng),
+                            rng.normal(-1.0, 2.0, 5000), numpy.repeat(7.0, 5000)])
+    mu, sigma, nu, se = statlmp.tfit(x)
+    prm = stats.t.fit(x[:,0])
+    assert abs(mu[0] - prm[1]) < 1e-3 and abs(sigma[0] - prm[2]) < 1e-3
+    assert abs(mu[1] + 1.0) < 5*se[1]
+    # Constant column
+    assert mu[2] == 7.0 and sigma[2] == 0.0
+
+def test_tfit_nan_columns():
+    rng = numpy.random.default_rng(4)
+    a, b = rng.normal(1.0, 1.0, 3000), rng.normal(5.0, 1.0, 1000)
+    mu, sigma, nu, se = statlmp.tfit(statlmp.stack_cols([a, b]))
+    assert numpy.allclose(mu, [statlmp.tfit(a)[0], statlmp.tfit(b)[0]])
+
+def test_movav():
+    rng = numpy.random.default_rng(5)
+    x = rng.normal(1e4, 1.0, (1000, 3))
+    ref = numpy.column_stack([numpy.convolve(x[:,jk], numpy.repeat(1.0, 50)/50, 'valid') for jk in range(3)])
+    assert numpy.allclose(statlmp.movav(x, 50), ref, rtol=0.0, atol=1e-9)
+    # Streamed in chunks
+    assert numpy.allclose(numpy.vstack(list(statlmp.movav_chunks(x, 50, 128))), ref, rtol=0.0, atol=1e-9)
+    assert numpy.allclose(statlmp.mean_movav(x, 50, 'box', 128), ref.mean(axis=0))
+    assert statlmp.movav(x[:10], 50).shape == (0, 3)
+    assert numpy.all(numpy.isnan(statlmp.mean_movav(x[:10], 50)))
+
+def test_blockav_ewmav():
+    x = numpy.arange(10.0)[:,None]
+    assert numpy.allclose(statlmp.blockav(x, 3)[:,0], [1.0, 4.0, 7.0])
+    # Span 1 returns the data
+    assert numpy.allclose(statlmp.ewmav(x, 1), x)
+
+def test_linfit():
+    rng = numpy.random.default_rng(6)
+    x = 1000.0 + numpy.arange(20000.0)
+    y = numpy.column_stack([2.0*x + 5.0, -0.5*x]) + rng.normal(0.0, 10.0, (20000, 2))
+    lfit = statlmp.LinFit(2)
+    # Rows added in pieces of any length
+    for k in range(0, 20000, 3001):
+        lfit.add(x[k:k+3001], y[k:k+3001])
+    b, a, se, g = lfit.fit()
+    assert lfit.nrows() == 20000
+    for jk in range(2):
+        pb, pa = numpy.polyfit(x, y[:,jk], 1)
+        assert abs(b[jk] - pb) < 1e-9 and abs(a[jk] - pa) < 1e-5
+    # Uncorrelated noise - error close to the ordinary one
+    se0 = 10.0/numpy.sqrt(numpy.sum((x - x.mean())**2))
+    assert numpy.all(abs(se/se0 - 1.0) < 0.5)
@@ -0,0 +1,71 @@
+# Indexed xyz trajectories - random walkers in a periodic box
+
+import os, numpy
+import trjlmp
+
+L = 10.0
+
+def walk(nf=30, n=16, seed=1):
+    """ Unwrapped and wrapped positions of random walkers. """
+    rng = numpy.random.default_rng(seed)
+    u = rng.uniform(0.0, L, (1, n, 3)) + numpy.cumsum(rng.normal(0.0, 0.5, (nf, n, 3)), axis=0)
+    return u, u % L
+
+def write_xyz(fname, pos, steps, partial=False):
+    with open(fname, 'w') as fp:
+        for (step, x) in zip(steps, pos):
+            fp.write('%d\nAtoms. Timestep: %d\n' % (len(x), step))
+            for xi in x:
+                fp.write('1 %.6f %.6f %.6f\n' % tuple(xi))
+        if partial:
+            # Frame still being written
+            fp.write('%d\nAtoms. Timestep: 99999\n1 0.0' % len(pos[0]))
+
+def test_index_frames(tmp_path):
+    fname = str(tmp_path) + '/movie.xyz'
+    u, pos = walk()
+    steps = 100*numpy.arange(len(pos))
+    write_xyz(fname, pos, steps, partial=True)
+    # Small read chunks split lines and frames
+    offsets, st, natoms = trjlmp.index(fname, chunk=97)
+    os.remove(fname + '.idx.npz')
+    assert numpy.array_equal(offsets, trjlmp.index(fname)[0])
+    assert numpy.array_equal(st, steps) and natoms == 16
+    traj = trjlmp.Trajectory(fname)
+    assert len(traj) == len(pos)
+    elements, x = traj.frame(7)
+    assert list(elements) == ['1']*16 and numpy.allclose(x, pos[7], atol=1e-6)
+    assert numpy.allclose(traj.positions(slice(0, None, 10)), pos[::10], atol=1e-6)
+    traj.close()
+
+def test_binary(tmp_path):
+    fname = str(tmp_path) + '/movie.xyz'
+    u, pos = walk()
+    write_xyz(fname, pos, numpy.arange(len(pos)))
+    out = trjlmp.to_binary(fname, stride=3, batch=4)
+    x, steps, elements = trjlmp.load_binary(out)
+    assert x.dtype == numpy.float32 and x.shape == (10, 16, 3)
+    assert numpy.allclose(x, pos[::3], atol=1e-5) and numpy.array_equal(steps, numpy.arange(0, 30, 3))
+
+def test_unwrap_msd():
+    u, pos = walk()
+    cell = L*numpy.eye(3)
+    assert numpy.allclose(trjlmp.unwrap(pos, cell) - u, (pos[0] - u[0])[None])
+    # Direct average over time origins
+    nf = len(u)
+    ref = [numpy.mean(numpy.sum((u[m:] - u[:nf-m])**2, axis=2)) for m in range(nf)]
+    assert numpy.allclose(trjlmp.msd(pos, cell, chunk=5), ref)
+
+def test_rdf_fcc():
+    a = 3.52
+    base = 0.5*numpy.array([[0, 0, 0], [1, 1, 0], [1, 0, 1], [0, 1, 1]])
+    grid = numpy.array([[i, j, k] for i in range(3) for j in range(3) for k in range(3)])
+    pos = (a*(grid[:,None,:] + base[None,:,:])).reshape(1, -1, 3)
+    r, g = trjlmp.rdf(pos, 3*a*numpy.eye(3), 4.0, nbins=400, chunk=1000)
+    # 12 nearest neighbours at a/sqrt(2)
+    assert abs(r[numpy.argmax(g)] - a/numpy.sqrt(2.0)) < 0.01
+    dr = r[1] - r[0]
+    n = pos.shape[1]
+    near = r < 0.5*(a/numpy.sqrt(2.0) + a)
+    count = numpy.sum(g[near]*4.0*numpy.pi*r[near]**2*dr)*(n - 1)/(3*a)**3
+    assert abs(count - 12.0) < 0.1
@@ -0,0 +1,223 @@
+#!/usr/bin/python
+
+# Trajectory module for lammps xyz dumps (movie.xyz):
+#   - Frame index (byte offsets) built in one streaming pass and saved
+#       next to the dump as <dump>.idx.npz
+#   - Random access to any frame through a memory map of the dump
+#   - Conversion to float32 binary (<name>.npy + <name>.json) with
+#       optional frame stride
+#   - Radial distribution function and mean squared displacement
+#
+# Notes:
+#   - The number of atoms is the same in all frames (LAMMPS dumps)
+#   - xyz dumps do not contain the box, it is given as a cell matrix
+#       (rows are lattice vectors) for each frame or for all frames,
+#       see boxes for the box from the thermo cache
+#   - Index is rebuilt when the size or modification time of the dump
+#       changes, e.g. a running simulation
+#
+# Last modified: October 18 2026
+#
+
+import os, mmap, json, numpy
+import avlmp
+
+def index(fname, chunk=1<<24):
+    """ Byte offsets, time steps and number of atoms of all frames in xyz dump fname.
+
+        Saved to fname.idx.npz, loaded from it if the dump did not change."""
+    st = os.stat(fname)
+    iname = fname + '.idx.npz'
+    if os.path.isfile(iname):
+        idx = numpy.load(iname)
+        if int(idx['size']) == st.st_size and float(idx['mtime']) == st.st_mtime:
+            return idx['offsets'], idx['steps'], int(idx['natoms'])
+    with open(fname, 'rb') as fp:
+        natoms = int(fp.readline())
+        fp.seek(0)
+        # Frames are natoms + 2 lines, only the line starts of frame
+        # headers are kept
+        nlf = natoms + 2
+        offsets = [numpy.zeros(1, dtype=numpy.int64)]
+        pos = 0
+        nline = 0
+        while True:
+            buf = fp.read(chunk)
+            if not buf:
+                break
+            ends = numpy.nonzero(numpy.frombuffer(buf, dtype=numpy.uint8) == 10)[0]
+            # Line numbers of the lines starting after each newline
+            num = nline + 1 + numpy.arange(len(ends))
+            offsets.append(pos + ends[num % nlf == 0] + 1)
+            nline += len(ends)
+            pos += len(buf)
+    # Last offset is the end of the last complete frame (the end of the
+    # file or the start of a frame that is still being written)
+    offsets = numpy.concatenate(offsets)
+    steps = read_steps(fname, offsets)
+    numpy.savez(iname, offsets=offsets, steps=steps, natoms=natoms, size=st.st_size, mtime=st.st_mtime)
+    return offsets, steps, natoms
+
+def read_steps(fname, offsets):
+    """ Time steps from the comment lines of frames starting at offsets. """
+    # LAMMPS writes 'Atoms. Timestep: N', older versions only 'Atoms',
+    # then frame numbers are returned
+    steps = numpy.arange(len(offsets)-1, dtype=numpy.int64)
+    with open(fname, 'rb') as fp:
+        for ik in range(len(offsets)-1):
+            fp.seek(offsets[ik])
+            fp.readline()
+            words = fp.readline().split(b'Timestep:')
+            if len(words) < 2:
+                break
+            steps[ik] = int(words[1])
+    return steps
+
+class Trajectory:
+    """ Random access to the frames of xyz dump fname. """
+    def __init__(self, fname):
+        self.fname = fname
+        self.offsets, self.steps, self.natoms = index(fname)
+        self.fp = open(fname, 'rb')
+        self.mm = mmap.mmap(self.fp.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def frame(self, ik):
+        """ Element names and positions (natoms, 3) of frame ik. """
+        text = self.mm[self.offsets[ik]:self.offsets[ik+1]]
+        # Skip the two header lines
+        start = text.index(b'\n', text.index(b'\n') + 1) + 1
+        words = numpy.array(text[start:].split()).reshape(self.natoms, 4)
+        return words[:,0].astype(str), words[:,1:].astype(float)
+
+    def positions(self, frames):
+        """ Positions of frames (list of indices or a slice), shape (nframes, natoms, 3). """
+        if isinstance(frames, slice):
+            frames = range(*frames.indices(len(self)))
+        return numpy.array([self.frame(ik)[1] for ik in frames])
+
+    def close(self):
+        self.mm.close()
+        self.fp.close()
+
+def to_binary(fname, out=None, stride=1, batch=100):
+    """ Convert xyz dump fname to float32 binary, every stride-th frame.
+
+        Positions are saved to out.npy, time steps and element names to out.json."""
+    # out - default is fname without the extension
+    traj = Trajectory(fname)
+    if out is None:
+        out = os.path.splitext(fname)[0]
+    frames = numpy.arange(0, len(traj), stride)
+    pos = numpy.lib.format.open_memmap(out + '.npy', mode='w+', dtype=numpy.float32,
+                                       shape=(len(frames), traj.natoms, 3))
+    for ik in range(0, len(frames), batch):
+        pos[ik:ik+batch] = traj.positions(frames[ik:ik+batch])
+    pos.flush()
+    elements = traj.frame(0)[0] if len(traj) else []
+    with open(out + '.json', 'w') as fp:
+        json.dump({'steps': traj.steps[frames].tolist(), 'elements': list(elements), 'source': fname}, fp)
+    traj.close()
+    return out
+
+def load_binary(out):
+    """ Memory mapped positions, time steps and element names saved by to_binary. """
+    with open(out + '.json', 'r') as fp:
+        meta = json.load(fp)
+    pos = numpy.load(out + '.npy', mmap_mode='r')
+    return pos, numpy.array(meta['steps']), numpy.array(meta['elements'])
+
+def boxes(pathd, thermo, steps):
+    """ Cell matrices at time steps steps from the thermo cache of pathd. """
+    # The thermo output has to include the dump steps (thermo interval
+    # dividing the dump interval), the last row with each step is used
+    # (steps repeat between stages)
+    keys = ['Step', 'lx', 'ly', 'lz', 'xy', 'xz', 'yz']
+    meta = avlmp.cache_log(pathd)
+    cols = [meta['header'][thermo.index(key)] for key in keys]
+    data, logL = avlmp.load_cols(pathd, cols)
+    step = data[cols[0]]
+    # Last occurrence of each step
+    order = numpy.argsort(step, kind='stable')
+    last = numpy.searchsorted(step[order], steps, 'right') - 1
+    rows = order[numpy.maximum(last, 0)]
+    cell = numpy.zeros((len(steps), 3, 3))
+    cell[:,0,0] = data[cols[1]][rows]
+    cell[:,1,1] = data[cols[2]][rows]
+    cell[:,2,2] = data[cols[3]][rows]
+    cell[:,1,0] = data[cols[4]][rows]
+    cell[:,2,0] = data[cols[5]][rows]
+    cell[:,2,1] = data[cols[6]][rows]
+    return cell
+
+def rdf(pos, cell, rmax, nbins=200, chunk=1<<20):
+    """ Radial distribution function of frames pos (nframes, natoms, 3).
+
+        Return bin centres and g(r)."""
+    # cell - (3,3) or (nframes,3,3), rmax has to be below half of the
+    # smallest box width (minimum image)
+    pos = numpy.asarray(pos)
+    nf, n = pos.shape[:2]
+    cell = numpy.broadcast_to(cell, (nf, 3, 3))
+    hist = numpy.zeros(nbins)
+    dr = rmax/nbins
+    # Rows of atoms per batch so that frames x rows x atoms <= chunk
+    rows = max(1, min(n, chunk//(n*nf)))
+    inv = numpy.linalg.inv(cell)
+    frac = numpy.einsum('fnx,fxy->fny', pos, inv)
+    for i0 in range(0, n, rows):
+        # Pairs i < j only, all frames at once
+        d = frac[:,i0:i0+rows,None,:] - frac[:,None,:,:]
+        d -= numpy.round(d)
+        d = numpy.einsum('fijx,fxy->fijy', d, cell)
+        r = numpy.sqrt(numpy.sum(d*d, axis=3))
+        iu = numpy.arange(i0, min(i0+rows, n))[:,None] < numpy.arange(n)[None,:]
+        r = r[:,iu]
+        r = r[r < rmax]
+        hist += numpy.bincount((r/dr).astype(int), minlength=nbins)[:nbins]
+    vol = numpy.mean(numpy.abs(numpy.linalg.det(cell)))
+    edges = dr*numpy.arange(nbins+1)
+    shell = 4.0/3.0*numpy.pi*(edges[1:]**3 - edges[:-1]**3)
+    # Each pair counted once, ideal gas count n(n-1)/2 * shell/vol
+    g = hist/(nf*0.5*n*(n-1)*shell/vol)
+    return 0.5*(edges[1:] + edges[:-1]), g
+
+def unwrap(pos, cell):
+    """ Unwrap periodic positions pos (nframes, natoms, 3) with cells cell. """
+    # Displacements between frames have to be below half of the box
+    pos = numpy.asarray(pos, dtype=float)
+    nf = len(pos)
+    cell = numpy.broadcast_to(cell, (nf, 3, 3))
+    frac = numpy.einsum('fnx,fxy->fny', pos, numpy.linalg.inv(cell))
+    dfrac = numpy.diff(frac, axis=0)
+    dfrac -= numpy.round(dfrac)
+    frac = numpy.concatenate((frac[:1], frac[:1] + numpy.cumsum(dfrac, axis=0)))
+    return numpy.einsum('fnx,fxy->fny', frac, cell)
+
+def msd(pos, cell, chunk=256):
+    """ Mean squared displacement as a function of the frame lag, averaged over atoms and time origins. """
+    # FFT algorithm, MSD(m) = S1(m) - 2*S2(m), atoms in batches of chunk
+    u = unwrap(pos, cell)
+    nf, n = u.shape[:2]
+    nfft = 1
+    while nfft < 2*nf:
+        nfft *= 2
+    res = numpy.zeros(nf)
+    for i0 in range(0, n, chunk):
+        x = u[:,i0:i0+chunk,:]
+        # S2 - autocorrelation of the positions
+        f = numpy.fft.rfft(x, nfft, axis=0)
+        s2 = numpy.fft.irfft(f*numpy.conj(f), nfft, axis=0)[:nf]
+        s2 = numpy.sum(s2, axis=2)/(nf - numpy.arange(nf))[:,None]
+        # S1 - recursive sum of squares
+        d = numpy.sum(x*x, axis=2)
+        d = numpy.concatenate((d, numpy.zeros((1, d.shape[1]))))
+        q = 2.0*numpy.sum(d[:nf], axis=0)
+        s1 = numpy.zeros((nf, d.shape[1]))
+        for m in range(nf):
+            q = q - d[m-1] - d[nf-m]
+            s1[m] = q/(nf - m)
+        res += numpy.sum(s1 - 2.0*s2, axis=1)
+    return res/n
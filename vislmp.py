@@ -6,9 +6,12 @@
 
 import matplotlib.pyplot as plt
 import numpy
+import reslmp
 
-def vis_cs(path, filename):
+def vis_cs(path, filename, statics=None, db=None):
     """ Plot elastic constants as a function of temperature. """
+    # statics - optional 0 K (C11, C12, C44), e.g. from eamlmp.statics,
+    #   default are the values for Ni
     # Experimental data
     Te = [0.0, 20.0, 320.0, 360.0, 420.0, 460.0, 520.0, 560.0, 620.0, 660.0, 760.0]
     C11e = [261.2, 261.2, 249.7, 247.7, 244.3, 241.9, 238.1, 235.2, 230.9, 228.2, 223.2]
@@ -20,13 +23,12 @@ def vis_cs(path, filename):
     C11s = [246.55]
     C12s = [147.34]
     C44s = [104.51]
+    if statics is not None:
+        C11s, C12s, C44s = [statics[0]], [statics[1]], [statics[2]]
 
-    # Load the data stored in path/res_Cs.txt
-    data = numpy.loadtxt(path + filename, delimiter=',')    
-    T = data[0:,0]
-    C11 = data[0:,1]
-    C12 = data[0:,2]
-    C44 = data[0:,3]
+    # Load the data stored in path/res_Cs.txt (or of method filename 
+    # in the result store db, see reslmp.load_cs)
+    T, C11, C12, C44 = reslmp.load_cs(path, filename, db)
 
     # C11 plot
     plt.figure(1)
@@ -49,3 +51,27 @@ def vis_cs(path, filename):
 
     plt.show()
 
+
+def vis_boot(path, filename='boot_res_CsFit.txt', props=('EV', 'ER', 'EH')):
+    """ Plot derived properties with bootstrap 95% intervals as a function of temperature. """
+    # filename is the output of ellmp.elprops_boot, one line per 
+    # material and number of atoms (Nat)
+    with open(path + filename, 'r') as fp:
+        cols = fp.readline().lstrip('# ').strip().split(',')
+        rows = [line.strip().split(',') for line in fp if line.strip()]
+    groups = sorted(set((row[0], row[1]) for row in rows))
+    for ik, prop in enumerate(props):
+        plt.figure(10+ik)
+        jk = cols.index(prop)
+        for (mat, nat) in groups:
+            sel = sorted([row for row in rows if (row[0], row[1]) == (mat, nat)], key=lambda row: float(row[2]))
+            T = numpy.array([float(row[2]) for row in sel])
+            val = numpy.array([float(row[jk]) for row in sel])
+            lo = numpy.array([float(row[jk+2]) for row in sel])
+            hi = numpy.array([float(row[jk+3]) for row in sel])
+            plt.errorbar(T, val, yerr=[val-lo, hi-val], fmt='o-', capsize=3, label=mat + ', Nat = ' + nat)
+        plt.xlabel('T, K')
+        plt.ylabel(prop + ', GPa' if prop[0] in 'BGE' else prop)
+        plt.legend()
+
+    plt.show()